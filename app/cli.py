@@ -0,0 +1,226 @@
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.core.browser_profiles import BROWSER_PROFILES
+from app.core.downloader import DOWNLOAD_ENGINES
+from app.core.record_io import OUTPUT_FORMATS
+from app.core.scraper import BACKENDS
+from app.core.waits import WAIT_STRATEGIES
+from app.jobs import JobError, load_job_file, normalize_job, run_job
+from app.job_queue import JobQueue, QUEUE_FILE, STATUSES
+
+# Command-line entry point for servers and cron: drives the core classes
+# directly and never imports tkinter. Logs go to stderr; stdout carries one
+# JSON summary per job so the output can be piped into other tools.
+# "run" and "scrape" execute jobs in place; "submit" hands them to the local
+# job queue, where a long-running "worker" picks them up.
+
+def run_jobs(jobs, processes):
+    # Each job runs in its own process so browsers and downloads of different
+    # jobs never share an interpreter; summaries are printed as jobs finish
+    summaries = []
+    if processes <= 1 or len(jobs) == 1:
+        for job in jobs:
+            summaries.append(run_job(job))
+            print(json.dumps(summaries[-1]), flush=True)
+        return summaries
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(jobs))) as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            summaries.append(future.result())
+            print(json.dumps(summaries[-1]), flush=True)
+
+    # Report in job-file order regardless of finishing order
+    order = {job["name"]: index for index, job in enumerate(jobs)}
+    summaries.sort(key=lambda summary: order.get(summary["name"], len(order)))
+    return summaries
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Run web scraper jobs without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the jobs in one or more YAML/JSON job files")
+    run.add_argument("job_files", nargs="+")
+    run.add_argument("-p", "--processes", type=int, default=1, help="Jobs to run in parallel (default: 1)")
+    run.add_argument("--summary", help="Also write all job summaries to this JSON file")
+
+    scrape = commands.add_parser("scrape", help="Run a single job described by command-line options")
+    scrape.add_argument("url")
+    scrape.add_argument("selector")
+    scrape.add_argument("-o", "--output-file", required=True)
+    scrape.add_argument("--selector-type", default="class",
+                        choices=["class", "id", "tag", "css_selector", "xpath"])
+    scrape.add_argument("--content-type", default="image", choices=["image", "text"])
+    scrape.add_argument("--config", default="{}", help="Extraction config as a JSON object")
+    scrape.add_argument("--wait-time", type=int, default=5)
+    scrape.add_argument("--no-headless", dest="headless", action="store_false")
+    scrape.add_argument("--output-format", choices=OUTPUT_FORMATS)
+    scrape.add_argument("--backend", default="selenium", choices=BACKENDS)
+    scrape.add_argument("--wait-strategy", default="fixed", choices=WAIT_STRATEGIES)
+    scrape.add_argument("--browser-profile", default="standard", choices=list(BROWSER_PROFILES),
+                        help="lean blocks images, media, fonts and analytics for faster page loads")
+    scrape.add_argument("--cold-browser", dest="warm_browser", action="store_false",
+                        help="Start and quit a browser for this run instead of using the warm pool")
+    scrape.add_argument("--warm-pool-size", type=int, help="Browsers kept warm per profile (default: 2)")
+    scrape.add_argument("--warm-max-uses", type=int, help="Jobs a warm browser serves before it is replaced "
+                                                          "(default: 50)")
+    scrape.add_argument("--warm-max-rss-mb", type=int, help="Memory above which a warm browser is replaced "
+                                                            "(default: 1024, needs psutil)")
+    scrape.add_argument("--warm-idle-timeout", type=float, help="Seconds before an unused warm browser is quit "
+                                                                "(default: 300)")
+    scrape.add_argument("--incremental", action="store_true",
+                        help="Also write the items added, changed or removed since the last run to a delta file "
+                             "and download only those")
+    scrape.add_argument("--download-to", help="Download the scraped images into this folder")
+    scrape.add_argument("--delay", type=float, default=0.5)
+    scrape.add_argument("--download-workers", type=int, default=4)
+    scrape.add_argument("--download-engine", default="threads", choices=DOWNLOAD_ENGINES,
+                        help="async needs aiohttp and suits thousands of concurrent requests")
+
+    # Queue commands: submit jobs to the local broker, run a worker, watch and cancel
+    queue_options = argparse.ArgumentParser(add_help=False)
+    queue_options.add_argument("--queue", default=QUEUE_FILE, help=f"Queue database (default: {QUEUE_FILE})")
+
+    submit = commands.add_parser("submit", parents=[queue_options], help="Queue the jobs in job files for a worker")
+    submit.add_argument("job_files", nargs="+")
+    submit.add_argument("--priority", type=int, default=0, help="Higher runs first (default: 0)")
+
+    worker = commands.add_parser("worker", parents=[queue_options], help="Run queued jobs until stopped")
+    worker.add_argument("-j", "--jobs", type=int, default=2, help="Jobs to run at once (default: 2)")
+    worker.add_argument("--limit", action="append", default=[], metavar="KIND=N",
+                        help="Cap running jobs of one kind, e.g. --limit scrape=1")
+    worker.add_argument("--until-idle", action="store_true", help="Exit once the queue is empty")
+
+    jobs = commands.add_parser("jobs", parents=[queue_options], help="List queued and recent jobs")
+    jobs.add_argument("--status", choices=STATUSES)
+    jobs.add_argument("-n", "--limit", type=int, default=50)
+
+    status = commands.add_parser("status", parents=[queue_options], help="Show a job with its summary")
+    status.add_argument("job_id", type=int)
+
+    cancel = commands.add_parser("cancel", parents=[queue_options], help="Cancel queued or running jobs")
+    cancel.add_argument("job_ids", type=int, nargs="+")
+
+    pause = commands.add_parser("pause", parents=[queue_options], help="Stop jobs from issuing new requests")
+    pause.add_argument("job_ids", type=int, nargs="+")
+
+    resume = commands.add_parser("resume", parents=[queue_options], help="Resume paused jobs")
+    resume.add_argument("job_ids", type=int, nargs="+")
+    return parser
+
+def parse_limits(values):
+    limits = {}
+    for value in values:
+        kind, _, limit = value.partition("=")
+        try:
+            limits[kind] = int(limit)
+        except ValueError:
+            raise JobError(f"--limit expects KIND=N, got {value!r}")
+    return limits
+
+def queue_command(args):
+    # Exit status of the queue commands; job records go to stdout as JSON lines
+    if args.command == "worker":
+        from app.worker import JobWorker
+        worker = JobWorker(args.queue, args.jobs, parse_limits(args.limit))
+        try:
+            worker.run(until_idle=args.until_idle)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == "submit":
+            jobs = [job for path in args.job_files for job in load_job_file(path)]
+            for job in jobs:
+                job_id = queue.submit(job, args.priority)
+                print(json.dumps({"id": job_id, "name": job["name"], "status": "queued"}), flush=True)
+        elif args.command == "jobs":
+            for job in reversed(queue.list(args.status, args.limit)):
+                print(json.dumps({key: job[key] for key in ("id", "name", "kind", "priority", "status", "progress",
+                                                            "message")}))
+        elif args.command == "status":
+            job = queue.get(args.job_id)
+            if job is None:
+                raise JobError(f"No job with id {args.job_id}")
+            print(json.dumps(job, indent=2))
+        else:
+            for job_id in args.job_ids:
+                if args.command == "cancel":
+                    status = queue.cancel(job_id)
+                else:
+                    status = queue.set_paused(job_id, args.command == "pause")
+                if status is None:
+                    raise JobError(f"No job with id {job_id}")
+                print(json.dumps({"id": job_id, "status": status}))
+    finally:
+        queue.close()
+    return 0
+
+def job_from_args(args):
+    try:
+        extraction_config = json.loads(args.config)
+    except ValueError as e:
+        raise JobError(f"--config is not valid JSON: {str(e)}")
+    job = {
+        "name": "scrape",
+        "url": args.url,
+        "selector": args.selector,
+        "selector_type": args.selector_type,
+        "content_type": args.content_type,
+        "output_file": args.output_file,
+        "wait_time": args.wait_time,
+        "headless": args.headless,
+        "extraction_config": extraction_config,
+        "backend": args.backend,
+        "wait_strategy": args.wait_strategy,
+        "incremental": args.incremental,
+        "browser_profile": args.browser_profile,
+        "warm_browser": args.warm_browser
+    }
+    warm_pool = {key: value for key, value in (("size", args.warm_pool_size), ("max_uses", args.warm_max_uses),
+                                               ("max_rss_mb", args.warm_max_rss_mb),
+                                               ("idle_timeout", args.warm_idle_timeout)) if value is not None}
+    if warm_pool and args.warm_browser:
+        job["warm_browser"] = warm_pool
+    if args.output_format:
+        job["output_format"] = args.output_format
+    if args.download_to:
+        job["download"] = {
+            "output_folder": args.download_to,
+            "delay": args.delay,
+            "max_workers": args.download_workers,
+            "engine": args.download_engine
+        }
+    return normalize_job(job)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command in ("submit", "worker", "jobs", "status", "cancel", "pause", "resume"):
+            return queue_command(args)
+        if args.command == "run":
+            jobs = [job for path in args.job_files for job in load_job_file(path)]
+            names = [job["name"] for job in jobs]
+            duplicates = sorted({name for name in names if names.count(name) > 1})
+            if duplicates:
+                raise JobError(f"Job names must be unique: {', '.join(duplicates)}")
+            summaries = run_jobs(jobs, args.processes)
+            if args.summary:
+                with open(args.summary, "w", encoding="utf-8") as f:
+                    json.dump({"jobs": summaries}, f, indent=2)
+        else:
+            summaries = run_jobs([job_from_args(args)], 1)
+    except (JobError, OSError, ValueError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+
+    # Non-zero exit status when any job did not fully succeed, for cron and CI
+    return 0 if all(summary["status"] == "ok" for summary in summaries) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
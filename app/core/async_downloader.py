@@ -0,0 +1,229 @@
+import asyncio
+import importlib.util
+import time
+from contextlib import nullcontext
+
+from app.core.downloader import CHUNK_SIZE, WRITE_BUFFER
+from app.core.http_session import DEFAULT_HEADERS
+
+# How often paused or sleeping coroutines look at the cancel token
+CANCEL_POLL_INTERVAL = 0.2
+
+# asyncio download engine (needs aiohttp). One producer reads the records
+# lazily into a bounded queue and a fixed number of consumer coroutines fetch
+# them over a single aiohttp session, so memory stays flat however long the
+# input is. Manifest decisions, part files and post-processing are the ones
+# ImageDownloader uses for its thread engine; they touch SQLite and the disk,
+# so they run in the loop's thread pool instead of on the loop, and chunks are
+# written (and hashed) in batches of WRITE_BUFFER bytes.
+
+def aiohttp_available():
+    return importlib.util.find_spec("aiohttp") is not None
+
+class _Claims:
+    # asyncio counterpart of ContentStore.claim: one coroutine per canonical URL
+    def __init__(self):
+        self._locks = {}
+
+    def claim(self, key):
+        claim = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        return _Claim(self._locks, key, claim)
+
+class _Claim:
+    def __init__(self, locks, key, claim):
+        self._locks = locks
+        self._key = key
+        self._claim = claim
+
+    async def __aenter__(self):
+        self._claim[1] += 1
+        await self._claim[0].acquire()
+
+    async def __aexit__(self, *exc_info):
+        self._claim[0].release()
+        self._claim[1] -= 1
+        if not self._claim[1]:
+            del self._locks[self._key]
+
+class AsyncDownloadEngine:
+    def __init__(self, downloader, run, total, output_folder, concurrency):
+        self.downloader = downloader
+        self.run = run
+        self.total = total
+        self.output_folder = output_folder
+        self.concurrency = concurrency
+        self.claims = _Claims()
+        self.session = None
+        self.successful = 0
+        self.failed = 0
+        self.completed = 0
+
+    def download(self, data):
+        # Returns (successful, failed) once every record was handled
+        return asyncio.run(self._main(data))
+
+    async def _main(self, data):
+        import aiohttp
+
+        # Separate connect and read timeouts so a large, slow image is not
+        # cut off as long as bytes keep arriving
+        policy = self.run["retry"]
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=policy.connect_timeout, sock_read=policy.read_timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, timeout=timeout, connector=connector) as session:
+            self.session = session
+            consumers = [asyncio.create_task(self._consume(queue)) for _ in range(self.concurrency)]
+            try:
+                await self._produce(queue, data)
+            finally:
+                for _ in consumers:
+                    await queue.put(None)
+                await asyncio.gather(*consumers)
+        return self.successful, self.failed
+
+    async def _produce(self, queue, data):
+        # put() waits while the queue is full, which is the backpressure on reading
+        for i, item in enumerate(data):
+            if not await self._wait_if_paused():
+                return
+            await queue.put((i, item))
+
+    async def _consume(self, queue):
+        while True:
+            entry = await queue.get()
+            if entry is None:
+                return
+            i, item = entry
+            try:
+                ok = await self._download_item(i, item)
+            except Exception as e:
+                self.downloader.logger(f"✗ Error downloading item {i}: {str(e)}")
+                ok = False
+            if ok:
+                self.successful += 1
+            elif ok is not None:
+                self.failed += 1
+            self.completed += 1
+            self.downloader.update_progress(10 + (80 * self.completed / max(self.total, 1)))
+
+    async def _download_item(self, i, item):
+        downloader = self.downloader
+        run = self.run
+        job = downloader._describe_item(i, item, self.output_folder)
+        if job is None:
+            return False
+
+        async with self.claims.claim(job["normalized_url"]) if run["store"] else nullcontext():
+            for attempt in range(run["retry"].max_retries + 1):
+                if not await self._wait_if_paused():
+                    return None
+                if not run["breaker"].allow(job["url"]):
+                    return await self._blocking(downloader._fail_fast, run, job)
+                done = await self._blocking(downloader._prepare_item, run, job)
+                if done is not None:
+                    return done
+
+                try:
+                    if attempt == 0:
+                        downloader.logger(f"Downloading {i+1}/{self.total}: {job['id']} - {job['filename']}")
+                    response = await self._get_politely(job["url"], job["headers"])
+                    if response is None:
+                        return None
+                    try:
+                        delay = downloader._retry_delay(run, job, attempt, status=response.status,
+                                                        retry_after=response.headers.get("Retry-After"))
+                        if delay is None:
+                            if response.status in (200, 206):
+                                return await self._save_response(response, job)
+                            return await self._blocking(downloader._handle_status, run, job, response.status)
+                    finally:
+                        response.release()
+                except Exception as e:
+                    delay = downloader._retry_delay(run, job, attempt, error=e)
+                    if delay is None:
+                        return await self._blocking(downloader._handle_error, run, job, e)
+
+                with run["metrics"].phase("retry_wait"):
+                    if not await self._sleep(delay):
+                        return None
+
+    async def _blocking(self, function, *args):
+        # Runs manifest, file system and hashing work off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def _wait_if_paused(self):
+        # CancelToken.wait_if_paused() without blocking the event loop
+        token = self.downloader.cancel_token
+        while token.paused:
+            await asyncio.sleep(CANCEL_POLL_INTERVAL)
+        return not token.cancelled
+
+    async def _sleep(self, seconds):
+        # Returns False if the run is cancelled before the time is up
+        token = self.downloader.cancel_token
+        deadline = time.monotonic() + seconds
+        while not token.cancelled:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            await asyncio.sleep(min(remaining, CANCEL_POLL_INTERVAL))
+        return False
+
+    async def _save_response(self, response, job):
+        downloader = self.downloader
+        run = self.run
+        # Opening a resumed part file hashes what is already on disk
+        part = await self._blocking(downloader._open_part, run, job, response.status == 206, response.headers)
+        stopped = False
+        try:
+            with run["metrics"].phase("transfer"):
+                batch = []
+                buffered = 0
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    if downloader.cancel_token.cancelled:
+                        stopped = True
+                        break
+                    batch.append(chunk)
+                    buffered += len(chunk)
+                    if buffered >= WRITE_BUFFER:
+                        accepted = await self._blocking(self._write_batch, part, batch)
+                        batch = []
+                        buffered = 0
+                        if not accepted:
+                            break
+                else:
+                    if batch:
+                        await self._blocking(self._write_batch, part, batch)
+        finally:
+            await self._blocking(part.close)
+            run["metrics"].increment("bytes", part.received)
+        if stopped:
+            return downloader._stop_part(job)
+
+        # Renaming, linking and handing work to the post-processor may block
+        return await self._blocking(downloader._finish_part, run, job, part)
+
+    def _write_batch(self, part, chunks):
+        # False once the body is rejected and the transfer should stop
+        for chunk in chunks:
+            if not part.write(chunk):
+                return False
+        return True
+
+    async def _get_politely(self, url, headers):
+        # One request once the host allows it, or None when the run is stopped
+        # while waiting; retries are up to the caller
+        run = self.run
+        wait_time = run["scheduler"].reserve(url)
+        if wait_time > 0:
+            with run["metrics"].phase("host_wait"):
+                if not await self._sleep(wait_time):
+                    return None
+        # A pause that started during the wait holds the request back too
+        if not await self._wait_if_paused():
+            return None
+        start = time.perf_counter()
+        response = await self.session.get(url, headers=headers)
+        run["metrics"].observe("request_latency", time.perf_counter() - start)
+        return response
@@ -0,0 +1,72 @@
+# Chrome launch profiles for the Selenium backend. "standard" is a plain
+# browser; "lean" skips everything a scrape never reads: images are neither
+# fetched nor decoded (their src attributes are still in the DOM), fonts,
+# media and analytics requests are blocked through the DevTools protocol,
+# extensions and the GPU are off, and pages count as loaded once the DOM is
+# ready instead of waiting for every subresource. A job may also pass its
+# own dict, e.g. {"base": "lean", "block_resources": ["font"]}.
+
+PROFILE_DEFAULTS = {
+    "block_resources": [],          # resource types, see RESOURCE_PATTERNS
+    "block_urls": [],               # extra URL patterns ("*" wildcards)
+    "images": True,                 # fetch and decode images
+    "extensions": True,
+    "gpu": True,
+    "page_load_strategy": "normal"  # "normal", "eager" or "none"
+}
+
+# Third-party analytics and ad scripts
+ANALYTICS_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*connect.facebook.net*", "*hotjar.com*", "*segment.com*", "*segment.io*", "*mixpanel.com*",
+    "*/analytics.js*", "*/gtag/js*"
+]
+
+BROWSER_PROFILES = {
+    "standard": PROFILE_DEFAULTS,
+    "lean": dict(
+        PROFILE_DEFAULTS,
+        block_resources=["image", "media", "font"],
+        block_urls=ANALYTICS_PATTERNS,
+        images=False,
+        extensions=False,
+        gpu=False,
+        page_load_strategy="eager"
+    )
+}
+
+# Network.setBlockedURLs matches URL patterns, so resource types are blocked by extension
+RESOURCE_EXTENSIONS = {
+    "image": ["jpg", "jpeg", "png", "gif", "webp", "avif", "svg", "ico", "bmp"],
+    "media": ["mp4", "webm", "ogg", "ogv", "mp3", "wav", "m4a", "mov", "m3u8"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheet": ["css"]
+}
+RESOURCE_PATTERNS = {
+    resource: [pattern for extension in extensions for pattern in (f"*.{extension}", f"*.{extension}?*")]
+    for resource, extensions in RESOURCE_EXTENSIONS.items()
+}
+
+def resolve_profile(profile=None):
+    # A profile name or a dict of overrides on top of its "base" profile
+    if not profile:
+        profile = "standard"
+    if isinstance(profile, str):
+        if profile not in BROWSER_PROFILES:
+            raise ValueError(f"Unknown browser profile: {profile}")
+        return dict(BROWSER_PROFILES[profile])
+    overrides = dict(profile)
+    resolved = resolve_profile(overrides.pop("base", "standard"))
+    unknown = [key for key in overrides if key not in PROFILE_DEFAULTS]
+    if unknown:
+        raise ValueError(f"Unknown browser profile settings: {', '.join(unknown)}")
+    resolved.update(overrides)
+    return resolved
+
+def blocked_url_patterns(profile):
+    patterns = []
+    for resource in profile["block_resources"]:
+        if resource not in RESOURCE_PATTERNS:
+            raise ValueError(f"Unknown resource type to block: {resource}")
+        patterns.extend(RESOURCE_PATTERNS[resource])
+    return patterns + list(profile["block_urls"])
@@ -0,0 +1,108 @@
+# Extracts every matched element in a single execute_script call instead of
+# several WebDriver round-trips per element. The script runs the same compiled
+# ExtractionPlan as the Python backends, so every path gives the same records.
+BULK_EXTRACT_SCRIPT = """
+var elements = arguments[0], fields = arguments[1], startIndex = arguments[2] || 0;
+var LAZY_SRC = ['data-src', 'data-lazy-src', 'data-original', 'data-lazy', 'data-url'];
+var LAZY_SRCSET = ['srcset', 'data-srcset', 'data-lazy-srcset'];
+
+// Same resolution order as WebElement.get_attribute: a scalar property wins,
+// otherwise the raw attribute, and null when neither exists
+function getAttribute(el, name) {
+    var propertyName = name === 'class' ? 'className' : name;
+    var value = el[propertyName];
+    if (value === undefined || value === null || typeof value === 'object' || typeof value === 'function') {
+        value = el.getAttribute(name);
+    }
+    return value === undefined || value === null ? null : String(value);
+}
+
+// Approximates WebElement.text: rendered text only, whitespace trimmed
+function getText(el) {
+    if (!el.getClientRects().length) {
+        return '';
+    }
+    return (el.innerText || '').replace(/[ \\t\\u00a0]+/g, ' ').replace(/ *\\n */g, '\\n').trim();
+}
+
+// Same rules as app/core/lazy_images.py
+function isPlaceholder(src) {
+    return !src || src === 'not_found' || src.indexOf('data:') === 0 || /\\/(blank|spacer)\\.gif$/.test(src);
+}
+
+function bestSrcset(srcset) {
+    var bestUrl = null, bestSize = -1;
+    srcset.split(',').forEach(function (candidate) {
+        var parts = candidate.trim().split(/\\s+/);
+        if (!parts[0]) return;
+        var size = 1, match = parts[1] ? /^([\\d.]+)[wx]$/.exec(parts[1]) : null;
+        if (match) size = parseFloat(match[1]);
+        if (size > bestSize) { bestUrl = parts[0]; bestSize = size; }
+    });
+    return bestUrl;
+}
+
+function absolute(url) {
+    try { return new URL(url, document.baseURI).href; } catch (e) { return url; }
+}
+
+function resolveLazy(img, src) {
+    if (!isPlaceholder(src)) return src;
+    for (var i = 0; i < LAZY_SRC.length; i++) {
+        var value = img.getAttribute(LAZY_SRC[i]);
+        if (value && !isPlaceholder(value)) return absolute(value);
+    }
+    for (var j = 0; j < LAZY_SRCSET.length; j++) {
+        var set = img.getAttribute(LAZY_SRCSET[j]);
+        var candidate = set ? bestSrcset(set) : null;
+        if (candidate) return absolute(candidate);
+    }
+    return src;
+}
+
+function find(el, selector) {
+    try {
+        return el.querySelector(selector);
+    } catch (e) {
+        return null;
+    }
+}
+
+function fallback(field, el, index) {
+    if (field.default === '@text') return getText(el);
+    return typeof field.default === 'string' ? field.default.split('{index}').join(String(index)) : field.default;
+}
+
+var records = [];
+for (var i = 0; i < elements.length; i++) {
+    var el = elements[i], index = startIndex + i;
+    try {
+        var record = {};
+        for (var f = 0; f < fields.length; f++) {
+            var field = fields[f], target = null, value;
+            if (field.source !== 'default') {
+                target = field.selector ? find(el, field.selector) : el;
+            }
+            if (!target) {
+                value = fallback(field, el, index);
+            } else if (field.source === 'text') {
+                value = getText(target);
+            } else {
+                value = getAttribute(target, field.attribute);
+                if (field.lazy) {
+                    value = resolveLazy(target, value);
+                }
+            }
+            record[field.name] = value;
+        }
+        records.push({record: record});
+    } catch (e) {
+        records.push({error: String(e)});
+    }
+}
+return records;
+"""
+
+def bulk_extract(driver, elements, plan, start_index=0):
+    # Returns one {"record": ...} or {"error": ...} entry per element, in order
+    return driver.execute_script(BULK_EXTRACT_SCRIPT, elements, plan.to_dict()["fields"], start_index)
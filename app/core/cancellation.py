@@ -0,0 +1,51 @@
+import threading
+
+# Cooperative stop and pause for scrapes and downloads. The code that owns a
+# run (the GUI, a job process) holds the token and flips it; the scraper,
+# crawler and downloader check it between elements, pages, requests and
+# chunks, so they stop at a clean point: writers are closed with what was
+# extracted, browsers and sessions are released by the usual finally blocks,
+# and interrupted downloads keep their .part files for the next run.
+
+class Cancelled(Exception):
+    pass
+
+class CancelToken:
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # Wake anything waiting in a pause so it can see the cancellation
+        self._running.set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def wait_if_paused(self):
+        # Blocks while paused; returns False once the run is cancelled
+        self._running.wait()
+        return not self.cancelled
+
+    def check(self):
+        # wait_if_paused() for code that unwinds with an exception
+        if not self.wait_if_paused():
+            raise Cancelled()
+
+    def sleep(self, seconds):
+        # time.sleep() that ends early on cancellation; returns False if cancelled
+        return not self._cancelled.wait(seconds)
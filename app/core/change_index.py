@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+from app.core.record_io import open_writer
+
+# Incremental scraping. A ChangeIndex remembers the fingerprint of every record
+# a listing produced on its last run, keyed by the record's id (or its src /
+# content when the page has no ids), in a SQLite file next to the output.
+# DeltaWriter sits in front of the normal output writer and also writes the
+# records that were added or changed since that run, plus the ones that
+# disappeared, to a delta file the downloader can work from.
+
+CHANGE_ADDED = "added"
+CHANGE_CHANGED = "changed"
+CHANGE_REMOVED = "removed"
+
+# Provenance the crawler adds, which moves when an item moves to another page
+# of the listing without the item itself changing
+VOLATILE_FIELDS = ("page_url", "page_index")
+
+def fingerprint(record):
+    stable = {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+    encoded = json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+def delta_path_for(output_file):
+    # gallery.jsonl -> gallery.delta.jsonl, in the same format as the output
+    lower = output_file.lower()
+    for suffix in (".jsonl.gz", ".ndjson.gz"):
+        if lower.endswith(suffix):
+            return output_file[:-len(suffix)] + ".delta" + output_file[-len(suffix):]
+    root, extension = os.path.splitext(output_file)
+    return root + ".delta" + extension
+
+class ChangeIndex:
+    # source identifies the listing (its URLs and extraction plan); an index
+    # built for another source is cleared, so every record counts as added
+    def __init__(self, path, source, key_field):
+        self.path = path
+        self.key_field = key_field
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                record_key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                record TEXT,
+                updated_at REAL
+            )
+        """)
+        # Keys seen in this run; removed records are the indexed ones not in here
+        self._conn.execute("CREATE TEMP TABLE seen (record_key TEXT PRIMARY KEY)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        self.is_new = row is None or row[0] != source
+        if self.is_new:
+            self._conn.execute("DELETE FROM records")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('source', ?)", (source,))
+
+    @staticmethod
+    def path_for(output_file):
+        return output_file + ".index.sqlite"
+
+    def observe(self, record):
+        # Returns CHANGE_ADDED, CHANGE_CHANGED or None for an unchanged record
+        key = str(record.get(self.key_field))
+        if self._conn.execute("INSERT OR IGNORE INTO seen (record_key) VALUES (?)", (key,)).rowcount == 0:
+            # The same item twice in one run (e.g. on two pages) is only reported once
+            return None
+        current = fingerprint(record)
+        row = self._conn.execute("SELECT fingerprint FROM records WHERE record_key = ?", (key,)).fetchone()
+        if row and row[0] == current:
+            return None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO records (record_key, fingerprint, record, updated_at) VALUES (?, ?, ?, ?)",
+            (key, current, json.dumps(record, ensure_ascii=False, default=str), time.time())
+        )
+        return CHANGE_CHANGED if row else CHANGE_ADDED
+
+    def pop_removed(self):
+        # Indexed records not seen in this run, dropped from the index
+        rows = self._conn.execute(
+            "SELECT record_key, record FROM records WHERE record_key NOT IN (SELECT record_key FROM seen)"
+        ).fetchall()
+        self._conn.execute("DELETE FROM records WHERE record_key NOT IN (SELECT record_key FROM seen)")
+        return [json.loads(record) for _, record in rows]
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        # Changes not committed (a failed or cancelled run) are rolled back
+        self._conn.rollback()
+        self._conn.close()
+
+class DeltaWriter:
+    # Every record still goes to the full output; added and changed ones also
+    # go to the delta file with a "change" field. finish() appends the removed
+    # records and commits the index; without it the index is left untouched,
+    # so the next run reports the same changes again.
+    def __init__(self, writer, output_file, output_format, source, key_field):
+        self.writer = writer
+        self.delta_file = delta_path_for(output_file)
+        self.index = ChangeIndex(ChangeIndex.path_for(output_file), source, key_field)
+        try:
+            self.delta = open_writer(self.delta_file, output_format)
+        except Exception:
+            self.index.close()
+            raise
+        self.counts = {CHANGE_ADDED: 0, CHANGE_CHANGED: 0, CHANGE_REMOVED: 0}
+        self.finished = False
+
+    @property
+    def count(self):
+        return self.writer.count
+
+    def write(self, record):
+        self.writer.write(record)
+        change = self.index.observe(record)
+        if change:
+            self.delta.write(dict(record, change=change))
+            self.counts[change] += 1
+
+    def finish(self, complete=True):
+        # Removals are only trusted from a run that saw the whole listing
+        if complete:
+            for record in self.index.pop_removed():
+                self.delta.write(dict(record, change=CHANGE_REMOVED))
+                self.counts[CHANGE_REMOVED] += 1
+        self.index.commit()
+        self.finished = True
+
+    def close(self):
+        try:
+            return self.writer.close()
+        finally:
+            self.delta.close()
+            self.index.close()
+
+    def summary(self):
+        return dict(self.counts, file=self.delta_file)
@@ -0,0 +1,82 @@
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that never change which image a URL points to
+TRACKING_PARAMS = ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "fbclid", "gclid")
+
+def normalize_url(url):
+    # Reduce equivalent spellings of a URL to one canonical form
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+
+    path = quote(unquote(parts.path), safe="/%:@!$&'()*+,;=-._~") or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+class ContentStore:
+    # Stores each distinct image once under its SHA-256 and exposes the
+    # titled filenames as hardlinks to the stored object
+    def __init__(self, output_folder):
+        self.root = os.path.join(output_folder, ".objects")
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._claims = {}
+
+    @contextmanager
+    def claim(self, key):
+        # Serialize work on one key across threads; the lock is dropped once nobody holds it
+        with self._lock:
+            claim = self._claims.setdefault(key, [threading.Lock(), 0])
+            claim[1] += 1
+        try:
+            with claim[0]:
+                yield
+        finally:
+            with self._lock:
+                claim[1] -= 1
+                if not claim[1]:
+                    del self._claims[key]
+
+    def object_path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def has(self, sha256):
+        return bool(sha256) and os.path.exists(self.object_path(sha256))
+
+    def adopt(self, file_path, sha256):
+        # Move a finished download into the store, or drop it if the content is already there
+        object_path = self.object_path(sha256)
+        with self._lock:
+            if os.path.exists(object_path):
+                os.remove(file_path)
+                return object_path, False
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.replace(file_path, object_path)
+            return object_path, True
+
+    def link(self, sha256, dest_path):
+        object_path = self.object_path(sha256)
+        if os.path.exists(dest_path):
+            if os.path.samefile(object_path, dest_path):
+                return dest_path
+            os.remove(dest_path)
+        try:
+            os.link(object_path, dest_path)
+        except OSError:
+            # Filesystems without hardlinks get a plain copy instead
+            shutil.copyfile(object_path, dest_path)
+        return dest_path
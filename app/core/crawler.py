@@ -0,0 +1,206 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.scraper import WebScraper
+from app.core.http_session import create_session
+from app.core.record_io import open_writer, format_from_extension
+from app.core.metrics import Metrics
+from app.core.cancellation import CancelToken, Cancelled
+
+def parse_page_range(text):
+    # "1-5,8,10-12" -> [1, 2, 3, 4, 5, 8, 10, 11, 12]
+    pages = []
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            pages.extend(range(int(start), int(end) + 1))
+        else:
+            pages.append(int(part))
+    return pages
+
+def expand_page_urls(urls, page_range=None):
+    # A "{page}" placeholder in a URL is replaced by every number in page_range
+    pages = []
+    for url in urls:
+        if "{page}" in url and page_range:
+            pages.extend(url.replace("{page}", str(number)) for number in parse_page_range(page_range))
+        else:
+            pages.append(url)
+    return pages
+
+class Crawler(WebScraper):
+    # Scrapes many pages into one output, reusing a small pool of browsers
+    # (or one pooled HTTP session for the static backend) across all of them
+    def crawl(self, *args, metrics_file=None, http_cache=None, cancel_token=None, browser_profile=None,
+              warm_browser=True, **kwargs):
+        # Metrics cover the whole crawl, including runs that end early
+        self.metrics = Metrics("crawl")
+        self.cancel_token = cancel_token or CancelToken()
+        self.delta = None
+        self.browser_profile = browser_profile
+        self.warm_browser = warm_browser
+        self.cache = self._open_cache(http_cache)
+        try:
+            return self._crawl(*args, **kwargs)
+        finally:
+            self._close_cache()
+            self._report_metrics(metrics_file)
+
+    def _crawl(self, urls, selector, selector_type, content_type, output_file, wait_time, headless,
+              extraction_config, output_format=None, backend="selenium", page_range=None,
+              next_page_selector=None, max_pages=50, workers=2, wait_strategy="fixed", wait_min_count=1,
+              scroll_rounds=0, scroll_pause=1.0, max_items=None, incremental=False):
+        pages = expand_page_urls(urls, page_range)
+        workers = max(1, min(int(workers), len(pages))) if not next_page_selector else 1
+        self.logger(f"Starting to crawl {len(pages)} start page(s) with {workers} worker(s)")
+        self.update_status("Crawling in progress...")
+        self.update_progress(5)
+
+        if not pages:
+            self.logger("No pages to crawl.")
+            self.update_status("No pages to crawl")
+            self.update_progress(0)
+            return None, None
+
+        output_format = output_format or format_from_extension(output_file)
+        try:
+            writer = open_writer(output_file, output_format)
+        except Exception as e:
+            self.logger(f"Error saving JSON file: {str(e)}")
+            return None, None
+
+        plan = self._compile_plan(content_type, extraction_config, scroll_rounds)
+        if incremental:
+            writer = self._track_changes(writer, output_file, output_format, pages, plan)
+            if writer is None:
+                return None, None
+
+        pool = None
+        if backend != "static":
+            from app.core.driver_pool import DriverPool, shared_pool
+            # The crawl's browsers come from the warm pool and go back to it when the crawl ends
+            parent = shared_pool(headless, self.browser_profile, self.warm_browser) if self.warm_browser else None
+            pool = DriverPool(workers, headless, self.logger, self.browser_profile, parent)
+        session = create_session(workers, self.cache) if backend != "selenium" else None
+        crawl = {
+            "backend": backend, "selector": selector, "selector_type": selector_type,
+            "content_type": content_type, "wait_time": wait_time, "headless": headless,
+            "plan": plan, "pool": pool, "session": session,
+            "wait_strategy": wait_strategy, "wait_min_count": wait_min_count,
+            "scroll_rounds": scroll_rounds, "scroll_pause": scroll_pause, "max_items": max_items
+        }
+
+        try:
+            if next_page_selector:
+                visited = self._follow_next_pages(crawl, pages[0], next_page_selector, max_pages, writer)
+            else:
+                visited = self._crawl_pages(crawl, pages, workers, writer)
+        except Cancelled:
+            # Pages finished before the stop are kept in the output file
+            self.logger(f"Crawling cancelled, {writer.count} items saved to {output_file}")
+            self.update_status("Crawling cancelled")
+            self.update_progress(0)
+            writer.close()
+            return None, None
+        except Exception as e:
+            self.logger(f"Error during crawling: {str(e)}")
+            self.update_status("Error occurred")
+            self.update_progress(0)
+            writer.close()
+            return None, None
+        finally:
+            if pool:
+                pool.close()
+            if session:
+                session.close()
+
+        self.update_progress(95)
+        try:
+            if incremental:
+                # Items of pages that failed this time are not removals
+                writer.finish(complete=not self.metrics.counters.get("failed_pages"))
+            data = writer.close()
+        except Exception as e:
+            self.logger(f"Error saving JSON file: {str(e)}")
+            return None, None
+
+        self.logger(f"Crawled {visited} page(s), saved {writer.count} items to {output_file}")
+        if incremental:
+            self._report_changes(writer)
+        self.update_status("Crawling completed")
+        self.update_progress(100)
+        return output_file, data
+
+    def _crawl_pages(self, crawl, pages, workers, writer):
+        # map() yields pages in order, so the merged output follows the page list
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda args: self._scrape_page(crawl, *args), enumerate(pages))
+            for index, (records, _) in enumerate(results):
+                with self.metrics.phase("write"):
+                    for record in records:
+                        writer.write(record)
+                self.update_progress(5 + (90 * (index + 1) / len(pages)))
+        return len(pages)
+
+    def _follow_next_pages(self, crawl, url, next_page_selector, max_pages, writer):
+        visited = set()
+        while url and url not in visited and len(visited) < max_pages:
+            visited.add(url)
+            records, url = self._scrape_page(crawl, len(visited) - 1, url, next_page_selector)
+            with self.metrics.phase("write"):
+                for record in records:
+                    writer.write(record)
+            self.update_progress(5 + (90 * len(visited) / max_pages))
+        return len(visited)
+
+    def _scrape_page(self, crawl, page_index, url, next_page_selector=None):
+        # Returns the page's records tagged with their provenance, and the next page URL
+        # Paused crawls open no new pages; cancelled ones skip the rest
+        self.cancel_token.check()
+        self.logger(f"Page {page_index + 1}: {url}")
+        page = None
+        try:
+            page, elements = self._open_page(
+                crawl["backend"], url, crawl["selector"], crawl["selector_type"], crawl["wait_time"],
+                crawl["headless"], crawl["pool"], crawl["session"], crawl["wait_strategy"], crawl["wait_min_count"]
+            )
+            records = []
+            start = time.perf_counter()
+            if elements and crawl["scroll_rounds"] and hasattr(page, "harvest"):
+                page_records = page.harvest(
+                    crawl["selector_type"], crawl["selector"], crawl["plan"], crawl["scroll_rounds"],
+                    crawl["scroll_pause"], crawl["max_items"]
+                )
+            elif elements:
+                page_records = page.iter_records(elements, crawl["plan"])
+            else:
+                page_records = []
+            for record in page_records:
+                self.cancel_token.check()
+                record["page_url"] = url
+                record["page_index"] = page_index
+                records.append(record)
+            self.metrics.add_time("extraction", time.perf_counter() - start)
+            self.metrics.increment("pages")
+            self.metrics.increment("items", len(records))
+            self.logger(f"Page {page_index + 1}: {len(records)} items")
+
+            next_url = page.next_page_url(next_page_selector) if next_page_selector else None
+            return records, next_url
+        except Cancelled:
+            raise
+        except Exception as e:
+            self.logger(f"Error scraping page {page_index + 1} ({url}): {str(e)}")
+            self.metrics.increment("failed_pages")
+            return [], None
+        finally:
+            if page:
+                page.close()
+
+    def _create_backend(self, name, headless, pool=None, session=None):
+        # Pages run in parallel, so progress is reported per page rather than per element
+        page = super()._create_backend(name, headless, pool, session)
+        page.update_progress = lambda value: None
+        return page
@@ -1,106 +1,632 @@
 import os
-import json
+import hashlib
+import itertools
 import time
-import requests
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from app.core.http_session import create_session
+from app.core.host_scheduler import HostScheduler, host_of, parse_retry_after
+from app.core.manifest import DownloadManifest, STATUS_COMPLETE, STATUS_PARTIAL, STATUS_FAILED
+from app.core.content_store import ContentStore, normalize_url
+from app.core.record_io import open_records
+from app.core.metrics import Metrics
+from app.core.http_cache import HttpCache
+from app.core.image_processing import ImagePostProcessor, MAX_INLINE_BYTES
+from app.core.retry_policy import create_retry
+from app.core.cancellation import CancelToken
+from app.core.change_index import CHANGE_CHANGED, CHANGE_REMOVED
+
+# Statuses that mean the host wants us to slow down
+RATE_LIMIT_STATUSES = (429, 503)
+
+# Bodies are read in 64 KB chunks and written through a 1 MB buffer
+CHUNK_SIZE = 64 * 1024
+WRITE_BUFFER = 1024 * 1024
+
+DOWNLOAD_ENGINES = ["threads", "async"]
+
+class PartFile:
+    # Receives one response body chunk by chunk: writes it to the .part file
+    # through a large buffer, hashes it, checks the image type on the first
+    # chunk when post-processing is on and keeps the bytes the workers need
+    def __init__(self, path, resuming, postprocessor=None, etag=None, last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.hasher = hashlib.sha256()
+        self.postprocessor = postprocessor
+        self.resuming = resuming
+        self.received = 0
+        self.resumed_from = 0
+        self.image_type = None
+        self.error = None
+        self.body = None
+        self._checked = postprocessor is None
+        self._head = None
+
+        if resuming:
+            # Seed the hash with the bytes we already have before appending
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(WRITE_BUFFER), b''):
+                    if self._head is None:
+                        self._head = chunk[:64]
+                    self.hasher.update(chunk)
+                    self.resumed_from += len(chunk)
+        self._file = open(path, 'ab' if resuming else 'wb', buffering=WRITE_BUFFER)
+
+    def write(self, chunk):
+        # Returns False once the body is rejected and the transfer should stop
+        if not self._checked:
+            self._check(chunk)
+            if self.error:
+                return False
+            if not self.resuming and self.postprocessor.keep_bytes(self.image_type):
+                self.body = []
+        self._file.write(chunk)
+        self.hasher.update(chunk)
+        self.received += len(chunk)
+        if self.body is not None:
+            if self.received > MAX_INLINE_BYTES:
+                # Too large to hand over by value; the workers read the file instead
+                self.body = None
+            else:
+                self.body.append(chunk)
+        return True
+
+    def _check(self, chunk):
+        self._checked = True
+        self.image_type, self.error = self.postprocessor.check(self._head or chunk)
+
+    def close(self):
+        self._file.close()
+        if not self._checked:
+            self._check(b"")
+
+    def body_bytes(self):
+        return b"".join(self.body) if self.body is not None else None
 
 class ImageDownloader:
     def __init__(self, logger, progress_updater, status_updater):
         self.logger = logger
         self.update_progress = progress_updater
         self.update_status = status_updater
+        self.metrics = Metrics("download")
+        self.cancel_token = CancelToken()
+
+    def download(self, json_file, output_folder, delay, max_workers=1, resume=True, revalidate=False,
+                 dedupe=False, metrics_file=None, http_cache=None, postprocess=None, engine="threads",
+                 retry=None, retry_failed=False, cancel_token=None):
+        # Metrics cover the whole run, including runs that end early.
+        # cancel_token lets the caller stop or pause the run between requests.
+        self.metrics = Metrics("download")
+        self.cancel_token = cancel_token or CancelToken()
+        cache = None
+        try:
+            if http_cache:
+                # Settings for an HttpCache shared with the static scraping backend
+                cache = HttpCache(**http_cache)
+                self.logger(f"Using HTTP cache: {cache.directory}")
+            return self._download(json_file, output_folder, delay, max_workers, resume, revalidate, dedupe, cache,
+                                  postprocess, engine, retry, retry_failed)
+        finally:
+            if cache:
+                cache.close()
+            self._report_metrics(metrics_file)
+
+    def _report_metrics(self, metrics_file):
+        self.metrics.finish()
+        snapshot = self.metrics.snapshot()
+        self.logger(f"Transferred {snapshot['counters'].get('bytes', 0) / 1048576:.1f} MB at "
+                    f"{snapshot['bytes_per_second'] / 1048576:.2f} MB/s, {snapshot['items_per_second']} images/s")
+        if "postprocess" in snapshot["phases"]:
+            self.logger(f"Post-processed {snapshot['counters'].get('postprocessed', 0)} images in "
+                        f"{snapshot['phases']['postprocess']['seconds']:.1f}s of worker time")
+        if snapshot["host_errors"]:
+            self.logger(f"Errors by host: {snapshot['host_errors']}")
+        if metrics_file:
+            try:
+                self.metrics.write(metrics_file)
+                self.logger(f"Metrics saved to {metrics_file}")
+            except Exception as e:
+                self.logger(f"Error saving metrics: {str(e)}")
 
-    def download(self, json_file, output_folder, delay):
+    def _download(self, json_file, output_folder, delay, max_workers, resume, revalidate, dedupe, cache=None,
+                  postprocess=None, engine="threads", retry=None, retry_failed=False):
         self.logger(f"Starting to download images from: {json_file}")
         self.update_status("Downloading in progress...")
         self.update_progress(10)
-        
+
         # Create output folder if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
         self.logger(f"Output folder created: {output_folder}")
-        
-        # Load JSON file
+
+        # Open the records; JSON Lines input is read lazily instead of loaded whole
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            total, records = open_records(json_file)
+            first = next(records, None)
         except Exception as e:
             self.logger(f"Error loading JSON file: {str(e)}")
             self.update_status("Error loading JSON")
             self.update_progress(0)
             return
-            
-        self.logger(f"Loaded {len(data)} items from JSON file")
-        
+
+        self.logger(f"Loaded {total} items from JSON file")
+
         # Check if data contains images
-        if data and isinstance(data, list) and "src" not in data[0]:
+        if first is not None and "src" not in first:
             self.logger("JSON does not contain image URLs (src field)")
             self.update_status("Invalid JSON format")
             self.update_progress(0)
             return
-            
+
+        data = itertools.chain([first], records) if first is not None else []
+        # A delta file from an incremental scrape also lists removed items, which need no download
+        data = self._skip_removed(data)
+
+        if engine not in DOWNLOAD_ENGINES:
+            self.logger(f"Unsupported download engine: {engine}")
+            self.update_status("Invalid download settings")
+            self.update_progress(0)
+            return
+
+        # Retry policy and per-host circuit breaker (see RETRY_DEFAULTS)
+        try:
+            retry_policy, breaker = create_retry(retry)
+        except (TypeError, ValueError) as e:
+            self.logger(f"Invalid retry settings: {str(e)}")
+            self.update_status("Invalid download settings")
+            self.update_progress(0)
+            return
+
+        # Optional image checks and CPU work; True means the default settings
+        postprocessor = None
+        if postprocess:
+            try:
+                postprocessor = ImagePostProcessor({} if postprocess is True else postprocess, output_folder,
+                                                   self.logger, self.metrics)
+            except Exception as e:
+                self.logger(f"Error starting image post-processing: {str(e)}")
+                self.update_status("Invalid post-processing settings")
+                self.update_progress(0)
+                return
+
         # Download each image
+        max_workers = max(1, int(max_workers))
         successful = 0
         failed = 0
-        
-        for i, item in enumerate(data):
-            progress = 10 + (80 * i / len(data))
-            self.update_progress(progress)
-            
-            image_id = item.get("id", f"img_{i}")
-            image_title = item.get("title", f"image_{i}")
-            image_url = item.get("src", "")
-            
-            if not image_url or image_url == "not_found":
-                self.logger(f"Skipping {image_id}: No valid URL")
-                failed += 1
-                continue
-                
-            # Generate safe filename
-            if not image_title:
-                image_title = f"image_{i}"
-                
-            # Add file extension if missing
-            if "." not in image_title:
-                extension = os.path.splitext(image_url.split("?")[0])[1]
-                if not extension:
-                    extension = ".jpg"
-                image_title += extension
-                
-            # Create safe filename
-            safe_filename = ''.join(c for c in image_title if c.isalnum() or c in '._- ')
-            
-            # Full path for saving
-            save_path = os.path.join(output_folder, safe_filename)
-            
-            # Download the image
-            try:
-                self.logger(f"Downloading {i+1}/{len(data)}: {image_id} - {safe_filename}")
-                
-                # Add headers to mimic browser request
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                
-                response = requests.get(image_url, headers=headers, stream=True, timeout=10)
-                
-                # Check if the request was successful
-                if response.status_code == 200:
-                    with open(save_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    self.logger(f"✓ Successfully saved to {save_path}")
-                    successful += 1
-                else:
-                    self.logger(f"✗ Failed to download {image_id}. Status code: {response.status_code}")
-                    failed += 1
-                    
-                # Add a small delay to be nice to the server
-                time.sleep(delay)
-                
-            except Exception as e:
-                self.logger(f"✗ Error downloading {image_id}: {str(e)}")
-                failed += 1
-                
+        engine = self._choose_engine(engine, cache)
+
+        # One pooled keep-alive session is shared by all workers, the delay is
+        # enforced per host so different CDNs can overlap, and the manifest
+        # remembers finished and partial downloads across runs
+        run = {
+            "session": create_session(max_workers, cache) if engine == "threads" else None,
+            "cache": cache,
+            "scheduler": HostScheduler(delay),
+            "manifest": DownloadManifest(DownloadManifest.path_for(output_folder)),
+            "store": ContentStore(output_folder) if dedupe else None,
+            "resume": resume,
+            "revalidate": revalidate,
+            "metrics": self.metrics,
+            "postprocess": postprocessor,
+            "retry": retry_policy,
+            "breaker": breaker
+        }
+        self.logger(f"Using download manifest: {run['manifest'].path}")
+        if retry_failed:
+            total, data = self._failed_only(run["manifest"], data)
+            self.logger(f"Retrying {total} failed or incomplete downloads from the manifest")
+        if dedupe:
+            self.logger(f"Storing images by content hash in: {run['store'].root}")
+        try:
+            if engine == "async":
+                from app.core.async_downloader import AsyncDownloadEngine
+                self.logger(f"Downloading with the async engine, {max_workers} concurrent requests")
+                successful, failed = AsyncDownloadEngine(self, run, total, output_folder, max_workers).download(data)
+            elif max_workers == 1:
+                for i, item in enumerate(data):
+                    if not self.cancel_token.wait_if_paused():
+                        break
+                    progress = 10 + (80 * i / total)
+                    self.update_progress(progress)
+
+                    result = self._download_item(run, i, item, total, output_folder)
+                    if result:
+                        successful += 1
+                    elif result is not None:
+                        failed += 1
+            else:
+                self.logger(f"Downloading with {max_workers} concurrent workers")
+
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    pending = set()
+                    completed = 0
+
+                    for i, item in enumerate(data):
+                        # Keep a bounded number of downloads in flight
+                        if not self.cancel_token.wait_if_paused():
+                            break
+                        if len(pending) >= max_workers * 2:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                completed += 1
+                                result = future.result()
+                                if result:
+                                    successful += 1
+                                elif result is not None:
+                                    failed += 1
+                            self.update_progress(10 + (80 * completed / total))
+
+                        pending.add(executor.submit(
+                            self._download_item, run, i, item, total, output_folder
+                        ))
+
+                    while pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            completed += 1
+                            result = future.result()
+                            if result:
+                                successful += 1
+                            elif result is not None:
+                                failed += 1
+                        self.update_progress(10 + (80 * completed / total))
+        finally:
+            if run["session"]:
+                run["session"].close()
+            run["manifest"].close()
+            if postprocessor:
+                self.update_status("Finishing image post-processing...")
+                postprocessor.close()
+
         # Summary
+        if not retry_failed:
+            total -= self.metrics.counters.get("removed", 0)
+        self.metrics.increment("items", successful)
+        self.metrics.increment("failed", failed)
+        if self.cancel_token.cancelled:
+            # The manifest lets the next run pick up where this one stopped
+            self.logger(f"\nDownload cancelled. {successful} images saved, {failed} failed, "
+                        f"the rest is left for the next run.")
+            self.update_status("Download cancelled")
+            return {"total": total, "successful": successful, "failed": failed, "cancelled": True}
         self.update_progress(100)
         self.logger(f"\nDownload completed. {successful} images saved, {failed} failed.")
-        self.update_status(f"Downloaded {successful}/{len(data)} images")
\ No newline at end of file
+        self.update_status(f"Downloaded {successful}/{total} images")
+        return {"total": total, "successful": successful, "failed": failed}
+
+    def _skip_removed(self, data):
+        for item in data:
+            if item.get("change") == CHANGE_REMOVED:
+                self.metrics.increment("removed")
+                continue
+            yield item
+
+    def _failed_only(self, manifest, data):
+        # Keep the records whose last attempt the manifest recorded as failed or partial
+        counts = manifest.counts()
+        total = counts.get(STATUS_FAILED, 0) + counts.get(STATUS_PARTIAL, 0)
+
+        def failed_records():
+            for item in data:
+                entry = manifest.get(item.get("src", ""))
+                if entry and entry["status"] in (STATUS_FAILED, STATUS_PARTIAL):
+                    yield item
+        return total, failed_records()
+
+    def _choose_engine(self, engine, cache):
+        # The async engine needs aiohttp and does not go through the HTTP cache
+        if engine == "async":
+            from app.core.async_downloader import aiohttp_available
+            if not aiohttp_available():
+                self.logger("aiohttp is not installed; using the thread engine")
+                return "threads"
+            if cache:
+                self.logger("The HTTP cache is only used by the thread engine; using threads")
+                return "threads"
+        return engine
+
+    def _download_item(self, run, i, item, total, output_folder):
+        # True/False for a saved/failed image, None when the run was cancelled first
+        job = self._describe_item(i, item, output_folder)
+        if job is None:
+            return False
+        store = run["store"]
+
+        # Only one worker at a time handles a given canonical URL so that
+        # duplicates wait for the first copy instead of fetching it again
+        with store.claim(job["normalized_url"]) if store else nullcontext():
+            for attempt in range(run["retry"].max_retries + 1):
+                # Paused runs issue no new requests
+                if not self.cancel_token.wait_if_paused():
+                    return None
+                if not run["breaker"].allow(job["url"]):
+                    return self._fail_fast(run, job)
+                done = self._prepare_item(run, job)
+                if done is not None:
+                    return done
+
+                # Download the image
+                try:
+                    if attempt == 0:
+                        self.logger(f"Downloading {i+1}/{total}: {job['id']} - {job['filename']}")
+
+                    response = self._get_politely(run, job["url"], job["headers"])
+                    if response is None:
+                        return None
+
+                    # Check if the request was successful
+                    with response:
+                        delay = self._retry_delay(run, job, attempt, status=response.status_code,
+                                                  retry_after=response.headers.get("Retry-After"))
+                        if delay is None:
+                            if response.status_code in (200, 206):
+                                return self._save_response(run, response, job)
+                            return self._handle_status(run, job, response.status_code)
+
+                except Exception as e:
+                    delay = self._retry_delay(run, job, attempt, error=e)
+                    if delay is None:
+                        return self._handle_error(run, job, e)
+
+                with run["metrics"].phase("retry_wait"):
+                    if not self.cancel_token.sleep(delay):
+                        return None
+
+    def _describe_item(self, i, item, output_folder):
+        # File names and paths for one record, shared by both download engines
+        image_id = item.get("id", f"img_{i}")
+        image_title = item.get("title", f"image_{i}")
+        image_url = item.get("src", "")
+
+        if not image_url or image_url == "not_found":
+            self.logger(f"Skipping {image_id}: No valid URL")
+            return None
+
+        # Generate safe filename
+        if not image_title:
+            image_title = f"image_{i}"
+
+        # Add file extension if missing
+        if "." not in image_title:
+            extension = os.path.splitext(image_url.split("?")[0])[1]
+            if not extension:
+                extension = ".jpg"
+            image_title += extension
+
+        # Create safe filename
+        safe_filename = ''.join(c for c in image_title if c.isalnum() or c in '._- ')
+
+        # Full path for saving
+        save_path = os.path.join(output_folder, safe_filename)
+
+        return {
+            "id": image_id,
+            "url": image_url,
+            "normalized_url": normalize_url(image_url),
+            "filename": safe_filename,
+            "save_path": save_path,
+            "saved_path": save_path,
+            "part_path": save_path + ".part",
+            "change": item.get("change"),
+            "headers": {}
+        }
+
+    def _prepare_item(self, run, job):
+        # Decide from the manifest whether the image needs a request at all.
+        # Returns True/False when the item is already settled, else None after
+        # filling in the conditional or Range headers for the request.
+        manifest = run["manifest"]
+        entry = manifest.get(job["url"]) if run["resume"] else None
+        headers = job["headers"] = {}
+        save_path = job["save_path"]
+        part_path = job["part_path"]
+
+        # Post-processing may have saved the file under its real extension
+        if entry and entry["path"]:
+            job["saved_path"] = entry["path"]
+        if entry and entry["status"] == STATUS_COMPLETE and self._is_intact(entry, job["saved_path"]):
+            if job["change"] == CHANGE_CHANGED:
+                self._rename_changed(run, job, entry)
+            if not run["revalidate"]:
+                self.logger(f"Skipping {job['id']}: already downloaded to {job['saved_path']}")
+                run["metrics"].increment("skipped")
+                return True
+
+            # Ask the server whether the image changed since the last run
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        elif run["store"] and self._link_duplicate(run, job["id"], job["url"], job["normalized_url"], save_path):
+            return True
+        elif entry and os.path.exists(part_path):
+            # Continue a partial file, but only if the remote image is unchanged
+            headers["Range"] = f"bytes={os.path.getsize(part_path)}-"
+            validator = entry["etag"] or entry["last_modified"]
+            if validator:
+                headers["If-Range"] = validator
+        elif os.path.exists(part_path):
+            os.remove(part_path)
+        return None
+
+    def _retry_delay(self, run, job, attempt, status=None, error=None, retry_after=None):
+        # Seconds to wait before the next attempt, or None when this outcome is
+        # final. Items that exhaust their retries count against the host's
+        # circuit breaker; any other response shows the host is up.
+        policy = run["retry"]
+        url = job["url"]
+        if error is None and not policy.is_retryable_status(status):
+            run["breaker"].record_success(url)
+            if status not in RATE_LIMIT_STATUSES:
+                run["scheduler"].record_success(url)
+            return None
+        if error is not None and not policy.is_retryable_error(error):
+            return None
+
+        retry_after = parse_retry_after(retry_after)
+        if status in RATE_LIMIT_STATUSES:
+            # Slow this host down for every worker, not just this request
+            run["scheduler"].backoff(url, retry_after)
+        if attempt >= policy.max_retries:
+            if run["breaker"].record_failure(url):
+                self.logger(f"Too many failures on {host_of(url)}, pausing it for {run['breaker'].cooldown:.0f}s")
+            return None
+
+        reason = status if error is None else type(error).__name__
+        run["metrics"].record_error(host_of(url), reason)
+        run["metrics"].increment("retries")
+        delay = policy.delay(attempt, retry_after)
+        self.logger(f"Retrying {job['id']} in {delay:.1f}s ({reason}, attempt {attempt + 2}/{policy.max_retries + 1})")
+        return delay
+
+    def _fail_fast(self, run, job):
+        # The host's circuit is open: fail without a request so a rerun can retry it
+        self.logger(f"✗ Skipped {job['id']}: {host_of(job['url'])} is failing, "
+                    f"retrying it in {run['breaker'].retry_in(job['url']):.0f}s")
+        run["metrics"].record_error(host_of(job["url"]), "circuit_open")
+        status = STATUS_PARTIAL if os.path.exists(job["part_path"]) else STATUS_FAILED
+        run["manifest"].record(job["url"], status, path=job["save_path"], normalized_url=job["normalized_url"])
+        return False
+
+    def _handle_status(self, run, job, status_code):
+        # Any response other than 200/206
+        if status_code == 304:
+            self.logger(f"✓ Unchanged since last run: {job['saved_path']}")
+            run["metrics"].increment("not_modified")
+            return True
+
+        self.logger(f"✗ Failed to download {job['id']}. Status code: {status_code}")
+        run["metrics"].record_error(host_of(job["url"]), status_code)
+        if status_code == 416 and os.path.exists(job["part_path"]):
+            # The partial file no longer matches the remote image
+            os.remove(job["part_path"])
+        run["manifest"].record(job["url"], STATUS_FAILED, path=job["save_path"], normalized_url=job["normalized_url"])
+        return False
+
+    def _handle_error(self, run, job, error):
+        self.logger(f"✗ Error downloading {job['id']}: {str(error)}")
+        run["metrics"].record_error(host_of(job["url"]), type(error).__name__)
+        status = STATUS_PARTIAL if os.path.exists(job["part_path"]) else STATUS_FAILED
+        run["manifest"].record(job["url"], status, path=job["save_path"], normalized_url=job["normalized_url"])
+        return False
+
+    def _link_duplicate(self, run, image_id, image_url, normalized_url, save_path):
+        # Reuse a stored object when another spelling of this URL was already fetched
+        duplicate = run["manifest"].find_complete(normalized_url)
+        if not duplicate or not run["store"].has(duplicate["sha256"]):
+            return False
+
+        run["store"].link(duplicate["sha256"], save_path)
+        # The validators come along so revalidation sends a conditional request for this URL too
+        run["manifest"].record(image_url, STATUS_COMPLETE, path=save_path, size=duplicate["size"],
+                               sha256=duplicate["sha256"], etag=duplicate["etag"],
+                               last_modified=duplicate["last_modified"], normalized_url=normalized_url)
+        self.logger(f"✓ {image_id} duplicates {duplicate['url']}, linked to {save_path}")
+        run["metrics"].increment("linked")
+        return True
+
+    def _rename_changed(self, run, job, entry):
+        # A changed record may keep its image under a new title: the stored
+        # file moves to the new name, with the extension post-processing chose
+        stored_path = entry["path"]
+        new_path = os.path.splitext(job["save_path"])[0] + os.path.splitext(stored_path)[1]
+        if os.path.abspath(new_path) == os.path.abspath(stored_path):
+            return
+        if run["store"] and run["store"].has(entry["sha256"]):
+            run["store"].link(entry["sha256"], new_path)
+            os.remove(stored_path)
+        else:
+            os.replace(stored_path, new_path)
+        run["manifest"].record(job["url"], STATUS_COMPLETE, path=new_path)
+        job["saved_path"] = new_path
+        self.logger(f"✓ {job['id']} changed its name, moved {stored_path} to {new_path}")
+
+    def _is_intact(self, entry, save_path):
+        return os.path.exists(save_path) and (entry["size"] is None or os.path.getsize(save_path) == entry["size"])
+
+    def _save_response(self, run, response, job):
+        part = self._open_part(run, job, response.status_code == 206, response.headers)
+        stopped = False
+        try:
+            with run["metrics"].phase("transfer"):
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if self.cancel_token.cancelled:
+                        stopped = True
+                        break
+                    if not part.write(chunk):
+                        break
+        finally:
+            part.close()
+            if not getattr(response, "from_cache", False):
+                run["metrics"].increment("bytes", part.received)
+        if stopped:
+            return self._stop_part(job)
+        return self._finish_part(run, job, part)
+
+    def _stop_part(self, job):
+        # The manifest already marks the item partial, so a rerun resumes it
+        self.logger(f"Stopped {job['id']}, kept {job['part_path']} for the next run")
+        return None
+
+    def _open_part(self, run, job, resuming, headers):
+        part = PartFile(job["part_path"], resuming, run["postprocess"], headers.get("ETag"), headers.get("Last-Modified"))
+        if resuming:
+            self.logger(f"Resuming {job['save_path']} from byte {part.resumed_from}")
+
+        # Record the validators first so an interrupted transfer can be resumed
+        run["manifest"].record(job["url"], STATUS_PARTIAL, path=job["save_path"], etag=part.etag,
+                               last_modified=part.last_modified, normalized_url=job["normalized_url"])
+        return part
+
+    def _finish_part(self, run, job, part):
+        # Move a fully received part file into place and record it
+        manifest = run["manifest"]
+        url = job["url"]
+        part_path = job["part_path"]
+        if part.error:
+            os.remove(part_path)
+            self.logger(f"✗ Rejected {url}: {part.error}")
+            run["metrics"].record_error(host_of(url), "invalid_image")
+            manifest.record(url, STATUS_FAILED, path=job["save_path"], normalized_url=job["normalized_url"])
+            return False
+
+        postprocessor = run["postprocess"]
+        save_path = postprocessor.final_path(job["save_path"], part.image_type) if postprocessor else job["save_path"]
+        sha256 = part.hasher.hexdigest()
+        size = os.path.getsize(part_path)
+        with run["metrics"].phase("store"):
+            if run["store"]:
+                # Keep one copy per distinct content and link the titled name to it
+                _, is_new = run["store"].adopt(part_path, sha256)
+                run["store"].link(sha256, save_path)
+                if not is_new:
+                    self.logger(f"Content already stored as {sha256[:12]}, linked instead of duplicating")
+            else:
+                os.replace(part_path, save_path)
+
+        manifest.record(url, STATUS_COMPLETE, path=save_path, size=size, sha256=sha256,
+                        etag=part.etag, last_modified=part.last_modified, normalized_url=job["normalized_url"])
+        self.logger(f"✓ Successfully saved to {save_path}")
+        if postprocessor:
+            postprocessor.submit(url, save_path, part.image_type, part.body_bytes())
+        return True
+
+    def _get_politely(self, run, url, headers=None):
+        # One request once the host allows it, or None when the run is stopped
+        # while waiting; retries are up to the caller
+        # Fresh cache hits never reach the host, so they skip the politeness delay
+        if not (run["cache"] and not headers and run["cache"].has_fresh(url)):
+            with run["metrics"].phase("host_wait"):
+                if not run["scheduler"].acquire(url, self.cancel_token):
+                    return None
+        # A pause that started during the wait holds the request back too
+        if not self.cancel_token.wait_if_paused():
+            return None
+        start = time.perf_counter()
+        response = run["session"].get(url, headers=headers, stream=True, timeout=run["retry"].timeout)
+        if getattr(response, "from_cache", False):
+            run["metrics"].increment("cache_hits")
+            return response
+        run["metrics"].observe("request_latency", time.perf_counter() - start)
+        return response
@@ -0,0 +1,338 @@
+import json
+import time
+import threading
+import multiprocessing.util
+from selenium import webdriver
+
+from app.core.browser_profiles import resolve_profile, blocked_url_patterns
+
+# Settings of the shared pools that keep browsers warm between scrapes; a
+# job's "warm_browser" may override them with a dict
+WARM_POOL_DEFAULTS = {
+    "size": 2,
+    # Jobs a warm browser serves before it is replaced by a fresh one
+    "max_uses": 50,
+    # Memory of a browser (all its processes, needs psutil) above which it is replaced
+    "max_rss_mb": 1024,
+    # Seconds an unused warm browser is kept before it is quit
+    "idle_timeout": 300.0
+}
+
+def create_driver(headless, profile=None):
+    # Setup Chrome options; profile is a name from BROWSER_PROFILES or a dict
+    profile = resolve_profile(profile)
+    chrome_options = webdriver.ChromeOptions()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--incognito")
+    if not profile["images"]:
+        # Neither fetched nor decoded; src attributes stay readable in the DOM
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if not profile["extensions"]:
+        chrome_options.add_argument("--disable-extensions")
+    if not profile["gpu"]:
+        chrome_options.add_argument("--disable-gpu")
+    chrome_options.page_load_strategy = profile["page_load_strategy"]
+    driver = webdriver.Chrome(options=chrome_options)
+    try:
+        apply_profile(driver, profile)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+def apply_profile(driver, profile=None):
+    # Request blocking is set per tab, so a reset session needs it again
+    patterns = blocked_url_patterns(resolve_profile(profile))
+    if patterns:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+def reset_session(driver):
+    # Leave nothing of the last job behind: cookies of every site, the storage
+    # of the page it ended on, and its tabs, which a fresh blank tab replaces
+    origin = driver.execute_script("return window.location.origin")
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        if origin and origin != "null":
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    except Exception:
+        driver.delete_all_cookies()
+        driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+    stale = driver.window_handles
+    driver.switch_to.new_window("tab")
+    fresh = driver.current_window_handle
+    for handle in stale:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(fresh)
+
+def browser_rss_mb(driver):
+    # Resident memory of chromedriver and every browser process it started,
+    # or None when psutil is not installed
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        service = psutil.Process(driver.service.process.pid)
+        processes = [service] + service.children(recursive=True)
+    except Exception:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 1048576
+
+class DriverPool:
+    # Hands out up to `size` Chrome sessions and takes them back for reuse,
+    # so a crawl starts each browser once instead of once per page. A pool with
+    # a parent leases `size` extra browsers from it for its lifetime and hands
+    # them back on close(), so the parent shrinks back to its own size.
+    # The shared pools also reset browsers between jobs, replace them after
+    # max_uses jobs or above max_rss_mb, and quit them after idle_timeout
+    # seconds unused; every browser is health-checked before it is reused.
+    # acquire/release/discard log to the caller's logger when given one, since
+    # a shared pool serves many jobs.
+    def __init__(self, size, headless, logger=None, profile=None, parent=None, reset=False, max_uses=None,
+                 max_rss_mb=None, idle_timeout=None):
+        self.size = max(1, int(size))
+        self.headless = headless
+        self.profile = profile
+        self.logger = logger or (lambda message: None)
+        self.parent = parent
+        self.reset = reset
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._idle = []
+        self._drivers = set()
+        self._uses = {}
+        self._idle_since = {}
+        self._starting = 0
+        self._leased = 0
+        self._closed = False
+        self._stopped = threading.Event()
+        if parent:
+            parent.lease(self.size)
+        if idle_timeout:
+            threading.Thread(target=self._evict_periodically, daemon=True).start()
+
+    def acquire(self, logger=None):
+        # Reuse an idle browser, start a new one while below capacity, otherwise wait
+        logger = logger or self.logger
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+                    if self._idle:
+                        driver = self._idle.pop()
+                        self._idle_since.pop(driver, None)
+                        break
+                    if len(self._drivers) + self._starting < self._capacity():
+                        self._starting += 1
+                        driver = None
+                        break
+                    self._cond.wait()
+            if driver is None:
+                return self._start(logger)
+            if self._healthy(driver):
+                return driver
+            logger("Pooled browser stopped responding, replacing it")
+            self.discard(driver, logger)
+
+    def _capacity(self):
+        # Called with the lock held
+        return self.size + self._leased
+
+    def _start(self, logger):
+        driver = None
+        try:
+            if self.parent:
+                driver = self.parent.acquire(logger)
+            else:
+                logger("Initializing browser...")
+                driver = create_driver(self.headless, self.profile)
+        finally:
+            with self._cond:
+                self._starting -= 1
+                if driver is not None:
+                    self._drivers.add(driver)
+                    self._uses[driver] = 0
+                self._cond.notify()
+        return driver
+
+    def _healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def lease(self, count):
+        # Room for `count` more browsers until end_lease(count)
+        with self._cond:
+            self._leased += count
+            self._cond.notify_all()
+
+    def end_lease(self, count, logger=None):
+        # Idle browsers above the remaining capacity are quit right away,
+        # busy ones when they are released
+        with self._cond:
+            self._leased -= count
+            excess = self._idle[:max(0, len(self._drivers) - self._capacity())]
+            for driver in excess:
+                self._idle.remove(driver)
+                self._forget(driver)
+        for driver in excess:
+            self._hand_back(driver, logger or self.logger)
+
+    def release(self, driver, logger=None):
+        logger = logger or self.logger
+        if not self._ready_for_reuse(driver, logger):
+            self.discard(driver, logger)
+            return
+        with self._cond:
+            if not self._closed and driver in self._drivers and len(self._drivers) <= self._capacity():
+                self._idle.append(driver)
+                self._idle_since[driver] = time.monotonic()
+                self._cond.notify()
+                return
+            self._forget(driver)
+            self._cond.notify()
+        self._hand_back(driver, logger)
+
+    def _ready_for_reuse(self, driver, logger):
+        # Replaces worn-out browsers and resets the others for the next job
+        with self._cond:
+            uses = self._uses[driver] = self._uses.get(driver, 0) + 1
+        if self.max_uses and uses >= self.max_uses:
+            logger(f"Replacing a browser after {uses} uses")
+            return False
+        if self.max_rss_mb:
+            rss = browser_rss_mb(driver)
+            if rss and rss > self.max_rss_mb:
+                logger(f"Replacing a browser using {rss:.0f} MB")
+                return False
+        if self.reset:
+            try:
+                reset_session(driver)
+                apply_profile(driver, self.profile)
+            except Exception as e:
+                logger(f"Error resetting browser: {str(e)}")
+                return False
+        return True
+
+    def discard(self, driver, logger=None):
+        # Drop a broken browser so the next acquire starts a fresh one
+        logger = logger or self.logger
+        with self._cond:
+            self._forget(driver)
+            self._cond.notify()
+        if self.parent:
+            self.parent.discard(driver, logger)
+        else:
+            self._quit(driver, logger)
+
+    def _forget(self, driver):
+        # Called with the lock held
+        self._drivers.discard(driver)
+        self._uses.pop(driver, None)
+        self._idle_since.pop(driver, None)
+
+    def _hand_back(self, driver, logger):
+        if self.parent:
+            self.parent.release(driver, logger)
+        else:
+            self._quit(driver, logger)
+
+    def _quit(self, driver, logger):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger(f"Error closing browser: {str(e)}")
+
+    def evict_idle(self):
+        # Quits the browsers unused for idle_timeout seconds; returns how many
+        if not self.idle_timeout:
+            return 0
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._cond:
+            stale = [driver for driver in self._idle if self._idle_since.get(driver, 0) <= cutoff]
+            for driver in stale:
+                self._idle.remove(driver)
+                self._forget(driver)
+        for driver in stale:
+            self._hand_back(driver, self.logger)
+        if stale:
+            self.logger(f"Closed {len(stale)} idle browser(s)")
+        return len(stale)
+
+    def _evict_periodically(self):
+        while not self._stopped.wait(self.idle_timeout / 2):
+            self.evict_idle()
+
+    def close(self):
+        # Browsers still in use are closed (or handed back) when they are released
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            drivers = self._idle
+            for driver in drivers:
+                self._forget(driver)
+            self._idle = []
+            self._cond.notify_all()
+        self._stopped.set()
+        for driver in drivers:
+            self._hand_back(driver, self.logger)
+        if self.parent:
+            self.parent.end_lease(self.size, self.logger)
+        elif drivers:
+            self.logger(f"Closed {len(drivers)} pooled browser(s)")
+
+def warm_pool_settings(settings=None):
+    # WARM_POOL_DEFAULTS with a job's overrides; True or None means the defaults
+    settings = {} if settings in (None, True) else dict(settings)
+    unknown = [key for key in settings if key not in WARM_POOL_DEFAULTS]
+    if unknown:
+        raise ValueError(f"Unknown warm browser settings: {', '.join(unknown)}")
+    resolved = dict(WARM_POOL_DEFAULTS, **settings)
+    if int(resolved["size"]) < 1:
+        raise ValueError("The warm browser pool needs a size of at least 1")
+    return resolved
+
+# Warm pools shared by every scrape and crawl of this process, one per
+# headless mode, browser profile and pool settings. They have no logger of
+# their own: messages go to the job passing its logger to acquire/release.
+_shared_pools = {}
+_shared_lock = threading.Lock()
+
+def shared_pool(headless, profile=None, settings=None):
+    settings = warm_pool_settings(settings)
+    key = (bool(headless), json.dumps(resolve_profile(profile), sort_keys=True), json.dumps(settings, sort_keys=True))
+    with _shared_lock:
+        pool = _shared_pools.get(key)
+        if pool is None:
+            if not _shared_pools:
+                # Runs at interpreter exit and when a multiprocessing child
+                # ends, where atexit handlers are skipped
+                multiprocessing.util.Finalize(None, close_shared_pools, exitpriority=10)
+            pool = _shared_pools[key] = DriverPool(
+                settings["size"], headless, profile=profile, reset=True, max_uses=settings["max_uses"],
+                max_rss_mb=settings["max_rss_mb"], idle_timeout=settings["idle_timeout"]
+            )
+    return pool
+
+def close_shared_pools():
+    with _shared_lock:
+        pools = list(_shared_pools.values())
+        _shared_pools.clear()
+    for pool in pools:
+        pool.close()
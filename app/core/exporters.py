@@ -0,0 +1,182 @@
+import os
+import json
+import sqlite3
+
+# Binary record formats for large scrapes that feed analytics. Each exporter
+# has a writer that buffers records and flushes them in batches, a reader
+# that streams them back (so the downloader can use any of them as input),
+# the extensions it is picked by and the magic bytes it is detected by.
+# pyarrow is only imported when a Parquet or Arrow file is written or read.
+
+SQLITE_BATCH_SIZE = 1000
+ARROW_BATCH_SIZE = 10000
+ARROW_COMPRESSION = "zstd"
+
+def _cell(value):
+    # SQLite and the string columns of Arrow files hold scalars; nested values become JSON
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+class SqliteWriter:
+    # One "records" table with a column per field (added as new fields appear),
+    # filled in one transaction per batch and indexed on id once complete
+    def __init__(self, path, batch_size=SQLITE_BATCH_SIZE):
+        self.path = path
+        self.count = 0
+        self.batch_size = batch_size
+        self._batch = []
+        self._columns = []
+        if os.path.exists(path):
+            os.remove(path)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE records (_row INTEGER PRIMARY KEY)")
+
+    def write(self, record):
+        self._batch.append(record)
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        for record in self._batch:
+            for name in record:
+                if name not in self._columns:
+                    self._conn.execute(f"ALTER TABLE records ADD COLUMN {_quote(name)}")
+                    self._columns.append(name)
+        columns = ", ".join(_quote(name) for name in self._columns)
+        placeholders = ", ".join("?" for _ in self._columns)
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO records ({columns}) VALUES ({placeholders})",
+                ([_cell(record.get(name)) for name in self._columns] for record in self._batch)
+            )
+        self._batch = []
+
+    def close(self):
+        if self._conn is None:
+            return self.count
+        self._flush()
+        if "id" in self._columns:
+            self._conn.execute("CREATE INDEX IF NOT EXISTS records_id ON records (id)")
+            self._conn.commit()
+        self._conn.close()
+        self._conn = None
+        return self.count
+
+class ArrowWriter:
+    # Parquet or Arrow IPC (Feather v2) file with compressed string columns.
+    # The schema comes from the fields of the first batch, which every record
+    # of a run shares because they come from one extraction plan.
+    def __init__(self, path, file_format="parquet", batch_size=ARROW_BATCH_SIZE, compression=ARROW_COMPRESSION):
+        import pyarrow
+        self._pa = pyarrow
+        self.path = path
+        self.count = 0
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.compression = compression
+        self._batch = []
+        self._schema = None
+        self._writer = None
+        # Fail early if the file cannot be created
+        open(path, "wb").close()
+
+    def write(self, record):
+        self._batch.append(record)
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _open(self, names):
+        pa = self._pa
+        self._schema = pa.schema([(name, pa.string()) for name in names])
+        if self.file_format == "parquet":
+            import pyarrow.parquet
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = pa.ipc.new_file(self.path, self._schema, options=options)
+
+    def _flush(self):
+        if not self._batch:
+            return
+        if self._writer is None:
+            names = []
+            for record in self._batch:
+                names.extend(name for name in record if name not in names)
+            self._open(names)
+        columns = [
+            [None if record.get(name) is None else str(_cell(record.get(name))) for record in self._batch]
+            for name in self._schema.names
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+        self._batch = []
+
+    def close(self):
+        if self._writer is None and not self._batch:
+            # No records: still leave a valid, empty file behind
+            self._open([])
+        self._flush()
+        self._writer.close()
+        return self.count
+
+def read_sqlite(path):
+    # Returns (count, records); rows are streamed from a cursor
+    conn = sqlite3.connect(path)
+    count = conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def rows():
+        try:
+            cursor = conn.execute("SELECT * FROM records ORDER BY _row")
+            names = [column[0] for column in cursor.description]
+            for row in cursor:
+                yield {name: value for name, value in zip(names, row) if name != "_row"}
+        finally:
+            conn.close()
+    return count, rows()
+
+def read_parquet(path):
+    import pyarrow.parquet
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+
+    def rows():
+        for batch in parquet_file.iter_batches(batch_size=ARROW_BATCH_SIZE):
+            yield from batch.to_pylist()
+    return parquet_file.metadata.num_rows, rows()
+
+def read_arrow(path):
+    import pyarrow
+    reader = pyarrow.ipc.open_file(pyarrow.memory_map(path))
+    count = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+    def rows():
+        for i in range(reader.num_record_batches):
+            yield from reader.get_batch(i).to_pylist()
+    return count, rows()
+
+EXPORTERS = {
+    "sqlite": {
+        "writer": SqliteWriter,
+        "reader": read_sqlite,
+        "extensions": (".sqlite", ".sqlite3", ".db"),
+        "magic": b"SQLite format 3\x00"
+    },
+    "parquet": {
+        "writer": lambda path: ArrowWriter(path, "parquet"),
+        "reader": read_parquet,
+        "extensions": (".parquet",),
+        "magic": b"PAR1"
+    },
+    "arrow": {
+        "writer": lambda path: ArrowWriter(path, "arrow"),
+        "reader": read_arrow,
+        "extensions": (".arrow", ".feather"),
+        "magic": b"ARROW1"
+    }
+}
@@ -0,0 +1,144 @@
+import json
+import hashlib
+import threading
+from collections import namedtuple, OrderedDict
+
+from app.core.lazy_images import resolve_lazy_src
+
+# One output field of a record:
+#   selector   CSS selector of the descendant to read, or None for the element itself
+#   source     "attribute", "text", or "default" (no lookup at all)
+#   default    used when the selector matches nothing; "{index}" is replaced by
+#              the element's position, and ELEMENT_TEXT means the element's own text
+#   lazy       resolve lazy-loaded image URLs (data-src, srcset) for this attribute
+PlanField = namedtuple("PlanField", ["name", "selector", "source", "attribute", "default", "lazy"])
+
+ELEMENT_TEXT = "@text"
+
+class ExtractionPlan:
+    # A compiled extraction_config: the fields of every record with their selector,
+    # attribute-or-text source and default, so backends read each element in one
+    # pass instead of interpreting the config (and retrying lookups) per element
+    def __init__(self, content_type, fields, key=None):
+        self.content_type = content_type
+        self.fields = tuple(fields)
+        self.key = key or plan_key(content_type, self.to_dict()["fields"])
+        self.label = "image" if content_type == "image" else "item"
+
+        # Records are de-duplicated by id when ids come from the page, else by their payload
+        id_field = next((field for field in self.fields if field.name == "id"), None)
+        payload = "src" if content_type == "image" else "content"
+        self.dedupe_field = "id" if id_field and id_field.source != "default" else payload
+
+    def to_dict(self):
+        return {"content_type": self.content_type, "fields": [field._asdict() for field in self.fields]}
+
+    @classmethod
+    def from_dict(cls, data, content_type=None):
+        fields = [PlanField(**{name: field.get(name) for name in PlanField._fields}) for field in data["fields"]]
+        return cls(data.get("content_type") or content_type, fields)
+
+    def default_value(self, field, index, element_text):
+        if field.default == ELEMENT_TEXT:
+            return element_text()
+        return field.default.replace("{index}", str(index)) if isinstance(field.default, str) else field.default
+
+    def display_name(self, record):
+        if self.content_type == "image":
+            return record.get("title")
+        return record.get("title") or record.get("id")
+
+    def extract(self, element, index, backend):
+        # backend provides find(elem, selector) -> element or None, attribute(elem, name),
+        # raw_attribute(elem, name), text(elem) and absolute(url)
+        record = {}
+        for field in self.fields:
+            target = None
+            if field.source != "default":
+                target = element if field.selector is None else backend.find(element, field.selector)
+
+            if target is None:
+                record[field.name] = self.default_value(field, index, lambda: backend.text(element))
+            elif field.source == "text":
+                record[field.name] = backend.text(target)
+            else:
+                value = backend.attribute(target, field.attribute)
+                if field.lazy:
+                    lazy_value = resolve_lazy_src(value, lambda name: backend.raw_attribute(target, name))
+                    if lazy_value != value:
+                        value = backend.absolute(lazy_value)
+                record[field.name] = value
+        return record
+
+    def iter_records(self, elements, backend, start_index=0):
+        # Element-by-element extraction shared by the backends, which also provide
+        # logger and update_progress; elements that fail are logged and skipped
+        backend.logger(f"Extracting {self.content_type} data...")
+
+        for i, elem in enumerate(elements):
+            backend.update_progress(30 + (50 * i / len(elements)))
+
+            try:
+                record = self.extract(elem, start_index + i, backend)
+                yield record
+
+                backend.logger(f"Processed {self.label} {i+1}/{len(elements)}: {self.display_name(record)}")
+            except Exception as e:
+                backend.logger(f"Error processing element {i+1}: {str(e)}")
+
+def plan_key(content_type, config):
+    encoded = json.dumps({"content_type": content_type, "config": config}, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+def _build_fields(content_type, config):
+    if content_type == "image":
+        id_attr = config.get("id_attr", "")
+        title_selector = config.get("title_selector", "")
+        img_selector = config.get("img_selector", "")
+        return [
+            PlanField("id", None, "attribute", id_attr, None, False) if id_attr
+            else PlanField("id", None, "default", None, "img_{index}", False),
+            PlanField("title", title_selector, "attribute", "title", "image_{index}", False) if title_selector
+            else PlanField("title", None, "default", None, "image_{index}", False),
+            PlanField("src", img_selector, "attribute", "src", "not_found", bool(config.get("resolve_lazy")))
+            if img_selector else PlanField("src", None, "default", None, "not_found", False)
+        ]
+
+    id_selector = config.get("id_selector", "")
+    title_selector = config.get("title_selector", "")
+    content_selector = config.get("content_selector", "")
+    return [
+        PlanField("id", id_selector, "text", None, "item_{index}", False) if id_selector
+        else PlanField("id", None, "default", None, "item_{index}", False),
+        PlanField("title", title_selector, "text", None, "", False) if title_selector
+        else PlanField("title", None, "default", None, "", False),
+        PlanField("content", content_selector or None, "text", None, ELEMENT_TEXT, False)
+    ]
+
+# Compiled plans kept per process; the least recently used ones are dropped
+# first, so long-lived job processes do not keep every config they ever saw
+MAX_CACHED_PLANS = 128
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+def compile_plan(content_type, config):
+    # Plans are cached by a hash of the config, so repeated runs, crawl pages and
+    # scroll rounds with the same settings share one compiled plan. A config that
+    # already holds "fields" (a saved plan or preset) is used as is.
+    config = config or {}
+    key = plan_key(content_type, config)
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+    if plan is None:
+        if "fields" in config:
+            plan = ExtractionPlan.from_dict(config, content_type)
+        else:
+            plan = ExtractionPlan(content_type, _build_fields(content_type, config), key)
+        with _plans_lock:
+            _plans[key] = plan
+            while len(_plans) > MAX_CACHED_PLANS:
+                _plans.popitem(last=False)
+    return plan
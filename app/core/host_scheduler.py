@@ -0,0 +1,84 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class _HostState:
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_allowed = 0.0
+
+class HostScheduler:
+    # Spaces out requests to each host by a minimum interval while letting
+    # requests to different hosts run at the same time
+    def __init__(self, min_interval, max_interval=60.0, backoff_factor=2.0, recovery_factor=0.75):
+        self.min_interval = max(0.0, float(min_interval))
+        self.max_interval = max(self.min_interval, float(max_interval))
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.min_interval)
+        return state
+
+    def reserve(self, url):
+        # Reserve the next free slot for this host; returns how long until it arrives
+        host = host_of(url)
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            start = max(now, state.next_allowed)
+            state.next_allowed = start + state.interval
+        return start - now
+
+    def acquire(self, url, cancel_token=None):
+        # Reserve the next free slot for this host and sleep until it arrives;
+        # returns False when cancel_token is cancelled before that
+        wait_time = self.reserve(url)
+        if wait_time <= 0:
+            return True
+        if cancel_token:
+            return cancel_token.sleep(wait_time)
+        time.sleep(wait_time)
+        return True
+
+    def record_success(self, url):
+        # Let a host that was backed off recover gradually towards the base interval
+        with self._lock:
+            state = self._state(host_of(url))
+            if state.interval > self.min_interval:
+                state.interval = max(self.min_interval, state.interval * self.recovery_factor)
+
+    def backoff(self, url, retry_after=None):
+        # Slow down a host that answered 429/503. A Retry-After says exactly how
+        # long to pause, so only hosts that give none get a longer interval.
+        with self._lock:
+            state = self._state(host_of(url))
+            if retry_after is None:
+                state.interval = min(self.max_interval, max(state.interval * self.backoff_factor, 1.0))
+            pause = retry_after if retry_after is not None else state.interval
+            state.next_allowed = max(state.next_allowed, time.monotonic() + min(pause, self.max_interval))
+            return state.interval
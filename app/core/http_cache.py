@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from app.core.content_store import normalize_url
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".web_scraper_cache", "http")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Request headers that make a response specific to the caller (resume, revalidation, auth)
+BYPASS_REQUEST_HEADERS = ("Range", "If-None-Match", "If-Modified-Since", "If-Range", "Authorization")
+
+# Stored bodies are already decoded, so these no longer describe them (lowercase,
+# since servers may send header names in any case)
+DROPPED_HEADERS = frozenset(("content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"))
+
+FIELDS = ("key", "url", "headers", "size", "stored_at", "expires_at", "etag", "last_modified", "last_access")
+
+def parse_cache_control(value):
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"')
+    return directives
+
+def expires_at(headers, now):
+    # Absolute expiry time from Cache-Control/Expires, or None if the response must not be stored
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return now
+    age = _to_int(headers.get("Age"))
+    for name in ("s-maxage", "max-age"):
+        max_age = _to_int(directives.get(name))
+        if max_age is not None:
+            return now + max_age - (age or 0)
+    if headers.get("Expires"):
+        try:
+            return parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return now
+    # No freshness information: keep it, but revalidate before reuse
+    return now
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class HttpCache:
+    # On-disk HTTP cache shared by the static backend and the downloader.
+    # A SQLite index keyed by normalized URL tracks freshness and validators;
+    # bodies are plain files that are streamed back, never read whole, and
+    # the least recently used entries are evicted once max_bytes is exceeded.
+    # A ttl overrides the server's freshness rules (handy while tuning selectors).
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bodies = os.path.join(directory, "bodies")
+        os.makedirs(self.bodies, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                headers TEXT,
+                size INTEGER,
+                stored_at REAL,
+                expires_at REAL,
+                etag TEXT,
+                last_modified TEXT,
+                last_access REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._conn.commit()
+
+    def body_path(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.bodies, digest[:2], digest)
+
+    def get(self, url):
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(FIELDS)} FROM entries WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        entry = dict(zip(FIELDS, row))
+        if not os.path.exists(self.body_path(key)):
+            self.delete(key)
+            return None
+        entry["headers"] = json.loads(entry["headers"])
+        return entry
+
+    def is_fresh(self, entry, now=None):
+        now = now or time.time()
+        if self.ttl is not None:
+            return entry["stored_at"] + self.ttl > now
+        return entry["expires_at"] > now
+
+    def has_fresh(self, url):
+        entry = self.get(url)
+        return entry is not None and self.is_fresh(entry)
+
+    def open_body(self, entry):
+        with self._lock:
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), entry["key"]))
+            self._conn.commit()
+        return open(self.body_path(entry["key"]), "rb")
+
+    def temp_path(self, url):
+        return f"{self.body_path(normalize_url(url))}.{threading.get_ident()}.tmp"
+
+    def store(self, url, headers, temp_path):
+        # Move a fully received body into place and index it
+        headers = CaseInsensitiveDict(headers)
+        now = time.time()
+        expiry = expires_at(headers, now)
+        if expiry is None and self.ttl is None:
+            os.remove(temp_path)
+            return
+        key = normalize_url(url)
+        path = self.body_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+
+        stored_headers = {name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS}
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO entries ({', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, json.dumps(stored_headers), os.path.getsize(path), now, expiry if expiry is not None else now,
+                 headers.get("ETag"), headers.get("Last-Modified"), now)
+            )
+            self._conn.commit()
+        self.evict()
+
+    def refresh(self, entry, headers):
+        # A 304 confirmed the stored body; take the new freshness information
+        now = time.time()
+        merged = CaseInsensitiveDict(entry["headers"])
+        merged.update({name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS})
+        expiry = expires_at(merged, now)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET headers = ?, stored_at = ?, expires_at = ?, last_access = ? WHERE key = ?",
+                (json.dumps(dict(merged)), now, expiry if expiry is not None else now, now, entry["key"])
+            )
+            self._conn.commit()
+        entry["headers"] = dict(merged)
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+        try:
+            os.remove(self.body_path(key))
+        except OSError:
+            pass
+
+    def total_size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self):
+        # Drop least recently used entries until the cache fits its budget
+        excess = self.total_size() - self.max_bytes
+        if excess <= 0:
+            return
+        with self._lock:
+            rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if excess <= 0:
+                break
+            self.delete(key)
+            excess -= size or 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class CachingAdapter(HTTPAdapter):
+    # Transport adapter that answers GETs from the HttpCache when possible,
+    # revalidates stale entries with their ETag/Last-Modified and tees
+    # cacheable 200 responses to disk while the caller streams them
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        send = lambda prepared: super(CachingAdapter, self).send(prepared, stream=True, timeout=timeout,
+                                                                 verify=verify, cert=cert, proxies=proxies)
+        if request.method != "GET" or any(name in request.headers for name in BYPASS_REQUEST_HEADERS):
+            return send(request)
+
+        entry = self.cache.get(request.url)
+        if entry and self.cache.is_fresh(entry):
+            return self._from_cache(request, entry)
+
+        if entry and (entry["etag"] or entry["last_modified"]):
+            request = request.copy()
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = send(request)
+        if entry and response.status_code == 304:
+            self.cache.refresh(entry, response.headers)
+            response.close()
+            return self._from_cache(request, entry)
+        if response.status_code == 200 and self._cacheable(response):
+            response.raw = _CachingReader(response.raw, self.cache, request.url, response.headers)
+        return response
+
+    def _cacheable(self, response):
+        vary = [name.strip().lower() for name in response.headers.get("Vary", "").split(",") if name.strip()]
+        return not any(name not in ("accept-encoding", "user-agent") for name in vary)
+
+    def _from_cache(self, request, entry):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.raw = self.cache.open_body(entry)
+        response.url = request.url
+        response.request = request
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.connection = self
+        response.from_cache = True
+        return response
+
+class _CachingReader:
+    # Wraps the urllib3 response: every chunk read by the caller is also written
+    # to a temp file, which becomes a cache entry only if the body was read to the end
+    def __init__(self, raw, cache, url, headers):
+        self._raw = raw
+        self._cache = cache
+        self._url = url
+        self._headers = CaseInsensitiveDict(headers)
+        self._temp_path = cache.temp_path(url)
+        os.makedirs(os.path.dirname(self._temp_path), exist_ok=True)
+        self._file = open(self._temp_path, "wb")
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            self._write(chunk)
+            yield chunk
+        self._finish()
+
+    def read(self, amt=None, *args, **kwargs):
+        data = self._raw.read(amt, *args, **kwargs)
+        if data:
+            self._write(data)
+        if not data or amt is None:
+            self._finish()
+        return data
+
+    def _write(self, chunk):
+        if self._file:
+            self._file.write(chunk)
+
+    def _finish(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            try:
+                self._cache.store(self._url, self._headers, self._temp_path)
+            except Exception:
+                self._discard()
+
+    def _discard(self):
+        try:
+            os.remove(self._temp_path)
+        except OSError:
+            pass
+
+    def close(self):
+        if self._file:
+            # The caller stopped early, so the body is incomplete
+            self._file.close()
+            self._file = None
+            self._discard()
+        self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
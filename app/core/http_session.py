@@ -0,0 +1,22 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+# Add headers to mimic browser request
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def create_session(pool_size=1, cache=None):
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    # Size the connection pool so every worker can keep its connection alive;
+    # with an HttpCache, GETs are answered from disk when possible
+    if cache is not None:
+        from app.core.http_cache import CachingAdapter
+        adapter = CachingAdapter(cache, pool_connections=pool_size, pool_maxsize=pool_size)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,224 @@
+import io
+import os
+import json
+import time
+import threading
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+# Optional post-processing of downloaded images. The cheap checks run on the
+# download thread against the first streamed bytes (is this really an image,
+# and which extension does it need); resizing, transcoding, EXIF stripping and
+# perceptual hashing run in a process pool fed with the bytes already held in
+# memory, so CPU work overlaps the network transfers of the next images and
+# no file is read back from disk. Pillow is only needed for the CPU stage.
+
+POSTPROCESS_DEFAULTS = {
+    "verify": True,           # reject bodies whose magic bytes are not an image
+    "fix_extension": True,    # name files after their real type, not the URL suffix
+    "max_size": None,         # longest side in pixels of the processed copy
+    "convert": None,          # "webp", "jpeg" or "png" for the processed copy
+    "quality": 85,
+    "strip_exif": False,      # write a processed copy without metadata
+    "thumbnail": None,        # longest side in pixels of a thumbnail
+    "phash": True,            # difference hash for spotting near-duplicates
+    "workers": None           # processes (default: CPU count)
+}
+
+CONVERT_FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpg"), "png": ("PNG", ".png")}
+
+# Extensions that already describe each detected type correctly
+EXTENSIONS = {
+    "jpeg": (".jpg", ".jpeg", ".jpe", ".jfif"),
+    "png": (".png",),
+    "gif": (".gif",),
+    "webp": (".webp",),
+    "bmp": (".bmp",),
+    "tiff": (".tif", ".tiff"),
+    "ico": (".ico",),
+    "avif": (".avif",),
+    "heic": (".heic", ".heif"),
+    "svg": (".svg",)
+}
+IMAGE_EXTENSIONS = {extension for extensions in EXTENSIONS.values() for extension in extensions}
+
+# Larger images are handed to the workers by path instead of by value
+MAX_INLINE_BYTES = 32 * 1024 * 1024
+
+def sniff_image_type(head):
+    # Image type from the first bytes of a file, or None if they are not an image
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:2] == b"BM":
+        return "bmp"
+    if head[:4] in (b"II*\x00", b"MM\x00*"):
+        return "tiff"
+    if head[:4] == b"\x00\x00\x01\x00":
+        return "ico"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand in (b"avif", b"avis"):
+            return "avif"
+        if brand in (b"heic", b"heix", b"mif1", b"msf1"):
+            return "heic"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n")[:256].lower()
+    if text.startswith(b"<svg") or (text.startswith(b"<?xml") and b"<svg" in text):
+        return "svg"
+    return None
+
+def fix_extension(path, image_type):
+    # Path with the extension of the detected type; unknown suffixes
+    # (a title like "Chart 1.5") are kept and the extension is appended
+    root, extension = os.path.splitext(path)
+    if extension.lower() in EXTENSIONS[image_type]:
+        return path
+    if extension.lower() not in IMAGE_EXTENSIONS:
+        root = path
+    return root + EXTENSIONS[image_type][0]
+
+def pillow_available():
+    return importlib.util.find_spec("PIL") is not None
+
+def difference_hash(image):
+    # 64-bit dHash: brightness gradients of a 9x8 grayscale thumbnail
+    pixels = list(image.convert("L").resize((9, 8)).getdata())
+    bits = 0
+    for row in range(8):
+        for column in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+    return f"{bits:016x}"
+
+def _save_copy(image, path, image_format, quality):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    elif image_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+    # Pillow writes no EXIF unless it is passed explicitly, so copies are stripped
+    temp_path = path + ".tmp"
+    image.save(temp_path, image_format, quality=quality)
+    os.replace(temp_path, path)
+
+def process_image(path, data, options):
+    # Runs in a worker process: decode once and derive every output from it
+    from PIL import Image, ImageOps
+
+    start = time.perf_counter()
+    with Image.open(io.BytesIO(data) if data is not None else path) as source:
+        result = {"path": path, "width": source.width, "height": source.height, "format": source.format}
+        image = ImageOps.exif_transpose(source)
+
+        if options.get("phash"):
+            result["phash"] = difference_hash(image)
+
+        folder, filename = os.path.split(path)
+        stem = os.path.splitext(filename)[0]
+        convert = options.get("convert")
+        image_format, extension = CONVERT_FORMATS.get(convert) or (source.format, os.path.splitext(filename)[1])
+        # Multi-picture JPEGs (camera uploads) are written back as plain JPEG
+        image_format = "JPEG" if image_format == "MPO" else image_format
+        quality = options.get("quality") or 85
+
+        max_size = options.get("max_size")
+        if max_size or convert or options.get("strip_exif"):
+            copy = image.copy()
+            if max_size:
+                copy.thumbnail((max_size, max_size), Image.LANCZOS)
+            processed_path = os.path.join(folder, "processed", stem + extension)
+            _save_copy(copy, processed_path, image_format, quality)
+            result["processed"] = processed_path
+
+        if options.get("thumbnail"):
+            copy = image.copy()
+            copy.thumbnail((options["thumbnail"], options["thumbnail"]), Image.LANCZOS)
+            thumbnail_path = os.path.join(folder, "thumbnails", stem + extension)
+            _save_copy(copy, thumbnail_path, image_format, quality)
+            result["thumbnail"] = thumbnail_path
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+class ImagePostProcessor:
+    # Owned by one download run. Download threads call check() on the first
+    # chunk and submit() once the file is in place; results are appended to
+    # <output_folder>.images.jsonl. In-flight jobs are bounded so a slow pool
+    # holds back downloads instead of piling image bytes up in memory.
+    def __init__(self, options, output_folder, logger, metrics):
+        self.options = dict(POSTPROCESS_DEFAULTS, **(options or {}))
+        self.logger = logger
+        self.metrics = metrics
+        self.results_path = os.path.normpath(output_folder) + ".images.jsonl"
+
+        wants_pixels = (self.options["max_size"] or self.options["convert"] or self.options["strip_exif"]
+                        or self.options["thumbnail"] or self.options["phash"])
+        if self.options["convert"] and self.options["convert"] not in CONVERT_FORMATS:
+            raise ValueError(f"Unsupported image format: {self.options['convert']}")
+        if wants_pixels and not pillow_available():
+            self.logger("Pillow is not installed; images are only verified and renamed")
+            wants_pixels = False
+        self.uses_pool = bool(wants_pixels)
+
+        self._executor = None
+        self._results = None
+        self._lock = threading.Lock()
+        if self.uses_pool:
+            workers = self.options["workers"] or os.cpu_count() or 1
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self._slots = threading.BoundedSemaphore(workers * 4)
+            self._results = open(self.results_path, "a", encoding="utf-8")
+            self.logger(f"Post-processing images with {workers} processes, results in {self.results_path}")
+
+    def check(self, head):
+        # Returns (image_type, error); error is set when the body must be rejected
+        image_type = sniff_image_type(head)
+        if image_type is None and self.options["verify"]:
+            return None, "not an image (unrecognised file signature)"
+        return image_type, None
+
+    def final_path(self, save_path, image_type):
+        if image_type and self.options["fix_extension"]:
+            return fix_extension(save_path, image_type)
+        return save_path
+
+    def keep_bytes(self, image_type):
+        # Whether the download thread should hold the body for the workers
+        return self.uses_pool and image_type not in (None, "svg")
+
+    def submit(self, url, path, image_type, data=None):
+        if not self.keep_bytes(image_type):
+            return
+        if data is not None and len(data) > MAX_INLINE_BYTES:
+            data = None
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(process_image, path, data, self.options)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda done: self._collect(url, done))
+
+    def _collect(self, url, future):
+        self._slots.release()
+        try:
+            result = future.result()
+        except Exception as e:
+            self.logger(f"✗ Post-processing failed for {url}: {str(e)}")
+            self.metrics.increment("postprocess_failed")
+            return
+        self.metrics.add_time("postprocess", result.pop("seconds"))
+        self.metrics.increment("postprocessed")
+        result["url"] = url
+        with self._lock:
+            self._results.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    def close(self):
+        # Waits for queued images, so summaries only follow finished work
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._results.close()
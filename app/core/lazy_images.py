@@ -0,0 +1,43 @@
+import re
+
+# Attributes lazy-loading libraries use to hold the real image URL until it scrolls into view
+LAZY_SRC_ATTRIBUTES = ["data-src", "data-lazy-src", "data-original", "data-lazy", "data-url"]
+LAZY_SRCSET_ATTRIBUTES = ["srcset", "data-srcset", "data-lazy-srcset"]
+
+def is_placeholder(src):
+    # Empty src, inline data: URIs and transparent spacer GIFs mean the real image is elsewhere
+    return not src or src == "not_found" or src.startswith("data:") or src.endswith(("/blank.gif", "/spacer.gif"))
+
+def best_srcset_candidate(srcset):
+    # Pick the widest (or highest density) candidate of a srcset value
+    best_url = None
+    best_size = -1.0
+    for candidate in srcset.split(","):
+        parts = candidate.strip().split()
+        if not parts:
+            continue
+        size = 1.0
+        if len(parts) > 1:
+            match = re.match(r"^([\d.]+)[wx]$", parts[1])
+            if match:
+                size = float(match.group(1))
+        if size > best_size:
+            best_url = parts[0]
+            best_size = size
+    return best_url
+
+def resolve_lazy_src(src, get_attribute):
+    # get_attribute(name) returns the raw attribute value or None
+    if not is_placeholder(src):
+        return src
+    for name in LAZY_SRC_ATTRIBUTES:
+        value = get_attribute(name)
+        if value and not is_placeholder(value):
+            return value
+    for name in LAZY_SRCSET_ATTRIBUTES:
+        value = get_attribute(name)
+        if value:
+            candidate = best_srcset_candidate(value)
+            if candidate:
+                return candidate
+    return src
@@ -0,0 +1,86 @@
+import os
+import time
+import sqlite3
+import threading
+
+STATUS_COMPLETE = "complete"
+STATUS_PARTIAL = "partial"
+STATUS_FAILED = "failed"
+
+FIELDS = ("url", "normalized_url", "path", "status", "size", "sha256", "etag", "last_modified", "updated_at")
+
+class DownloadManifest:
+    # Persistent record of every URL the downloader has handled, kept in a
+    # SQLite file next to the output folder so reruns can pick up where they left off
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS downloads (
+                url TEXT PRIMARY KEY,
+                normalized_url TEXT,
+                path TEXT,
+                status TEXT NOT NULL,
+                size INTEGER,
+                sha256 TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                updated_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS downloads_normalized_url ON downloads (normalized_url)")
+        self._conn.commit()
+
+    @staticmethod
+    def path_for(output_folder):
+        return os.path.normpath(output_folder) + ".manifest.sqlite"
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM downloads WHERE url = ?", (url,)
+            ).fetchone()
+        return dict(zip(FIELDS, row)) if row else None
+
+    def find_complete(self, normalized_url):
+        # Any finished download of the same canonical URL, whatever spelling it used
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM downloads "
+                "WHERE normalized_url = ? AND status = ? AND sha256 IS NOT NULL "
+                "ORDER BY updated_at DESC LIMIT 1",
+                (normalized_url, STATUS_COMPLETE)
+            ).fetchone()
+        return dict(zip(FIELDS, row)) if row else None
+
+    def record(self, url, status, path=None, size=None, sha256=None, etag=None, last_modified=None,
+               normalized_url=None):
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO downloads (url, normalized_url, path, status, size, sha256, etag, last_modified, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    normalized_url = COALESCE(excluded.normalized_url, normalized_url),
+                    path = COALESCE(excluded.path, path),
+                    status = excluded.status,
+                    size = COALESCE(excluded.size, size),
+                    sha256 = COALESCE(excluded.sha256, sha256),
+                    etag = COALESCE(excluded.etag, etag),
+                    last_modified = COALESCE(excluded.last_modified, last_modified),
+                    updated_at = excluded.updated_at
+                """,
+                (url, normalized_url, path, status, size, sha256, etag, last_modified, time.time())
+            )
+            self._conn.commit()
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM downloads GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
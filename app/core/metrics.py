@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+METRICS_FORMATS = ["json", "prometheus"]
+
+class Metrics:
+    # Thread-safe collector for one scrape, crawl or download run: time spent
+    # per phase, counters (items, bytes), latency histograms and per-host errors
+    def __init__(self, run):
+        self.run = run
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._start = time.perf_counter()
+        self._finished = None
+        self.phases = {}
+        self.counters = {}
+        self.histograms = {}
+        self.host_errors = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            phase = self.phases.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            phase["count"] += 1
+            phase["seconds"] += seconds
+            phase["max_seconds"] = max(phase["max_seconds"], seconds)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.setdefault(
+                name, {"buckets": [0] * (len(LATENCY_BUCKETS) + 1), "count": 0, "sum": 0.0}
+            )
+            histogram["buckets"][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+
+    def record_error(self, host, reason):
+        with self._lock:
+            errors = self.host_errors.setdefault(host or "unknown", {})
+            errors[str(reason)] = errors.get(str(reason), 0) + 1
+
+    def finish(self):
+        self._finished = time.perf_counter()
+
+    def elapsed(self):
+        return (self._finished or time.perf_counter()) - self._start
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = self.elapsed()
+            counters = dict(self.counters)
+            return {
+                "run": self.run,
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._started)),
+                "elapsed_seconds": round(elapsed, 3),
+                "items_per_second": round(counters.get("items", 0) / elapsed, 3) if elapsed else 0.0,
+                "bytes_per_second": round(counters.get("bytes", 0) / elapsed, 1) if elapsed else 0.0,
+                "phases": {name: {"count": phase["count"], "seconds": round(phase["seconds"], 4),
+                                  "max_seconds": round(phase["max_seconds"], 4)}
+                           for name, phase in self.phases.items()},
+                "counters": counters,
+                "histograms": {name: {"le": LATENCY_BUCKETS + ["+Inf"], "buckets": list(histogram["buckets"]),
+                                      "count": histogram["count"], "sum": round(histogram["sum"], 4)}
+                               for name, histogram in self.histograms.items()},
+                "host_errors": {host: dict(errors) for host, errors in self.host_errors.items()}
+            }
+
+    def to_prometheus(self):
+        # Prometheus text exposition format; OpenTelemetry collectors can scrape it too
+        snapshot = self.snapshot()
+        run = _label(snapshot["run"])
+        lines = [
+            "# TYPE webscraper_run_seconds gauge",
+            f'webscraper_run_seconds{{run="{run}"}} {snapshot["elapsed_seconds"]}',
+            "# TYPE webscraper_items_per_second gauge",
+            f'webscraper_items_per_second{{run="{run}"}} {snapshot["items_per_second"]}',
+            "# TYPE webscraper_phase_seconds_total counter"
+        ]
+        for name, phase in snapshot["phases"].items():
+            lines.append(f'webscraper_phase_seconds_total{{run="{run}",phase="{_label(name)}"}} {phase["seconds"]}')
+        lines.append("# TYPE webscraper_phase_calls_total counter")
+        for name, phase in snapshot["phases"].items():
+            lines.append(f'webscraper_phase_calls_total{{run="{run}",phase="{_label(name)}"}} {phase["count"]}')
+        for name, value in snapshot["counters"].items():
+            metric = f"webscraper_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f'{metric}{{run="{run}"}} {value}')
+        for name, histogram in snapshot["histograms"].items():
+            metric = f"webscraper_{_metric_name(name)}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram["le"], histogram["buckets"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{run="{run}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{run="{run}"}} {histogram["sum"]}')
+            lines.append(f'{metric}_count{{run="{run}"}} {histogram["count"]}')
+        lines.append("# TYPE webscraper_host_errors_total counter")
+        for host, errors in snapshot["host_errors"].items():
+            for reason, count in errors.items():
+                lines.append(f'webscraper_host_errors_total{{run="{run}",host="{_label(host)}",'
+                             f'reason="{_label(reason)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, metrics_format=None):
+        # .prom/.txt files get the Prometheus text format, anything else JSON
+        metrics_format = metrics_format or ("prometheus" if path.lower().endswith((".prom", ".txt")) else "json")
+        with open(path, "w", encoding="utf-8") as f:
+            if metrics_format == "prometheus":
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name.lower())
@@ -0,0 +1,38 @@
+import os
+import json
+
+from app.core.extraction_plan import compile_plan
+
+# Named extraction presets shared by the GUI and the command-line runner.
+# Each preset keeps the extraction_config it was saved from (to refill the
+# form) and the compiled plan (which the command line can run, or a user can
+# hand-edit to add fields).
+PRESETS_FILE = os.path.join(os.path.expanduser("~"), ".web_scraper_presets.json")
+
+def load_presets(path=PRESETS_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def get_preset(name, path=PRESETS_FILE):
+    presets = load_presets(path)
+    if name not in presets:
+        raise KeyError(f"Unknown extraction preset: {name}")
+    return presets[name]
+
+def save_preset(name, content_type, extraction_config, path=PRESETS_FILE):
+    presets = load_presets(path)
+    presets[name] = {
+        "content_type": content_type,
+        "extraction_config": extraction_config,
+        "plan": compile_plan(content_type, extraction_config).to_dict()
+    }
+    _write(presets, path)
+
+def _write(presets, path):
+    # Write to a temp file first so a crash never leaves a truncated presets file
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(presets, f, indent=2)
+    os.replace(temp_path, path)
@@ -0,0 +1,165 @@
+import re
+import gzip
+import json
+
+from app.core.exporters import EXPORTERS
+
+# SQLite, Parquet and Arrow are the batched binary exporters in app.core.exporters
+OUTPUT_FORMATS = ["json", "jsonl", "jsonl.gz"] + list(EXPORTERS)
+
+# Gzip flushes hurt compression, so compressed output is flushed in batches
+GZIP_FLUSH_EVERY = 100
+
+# JSON arrays are parsed incrementally from chunks of this many characters
+JSON_READ_CHUNK = 1024 * 1024
+_SEPARATORS = re.compile(r"[\s,]*")
+
+def format_from_extension(path):
+    lower = path.lower()
+    if lower.endswith((".jsonl.gz", ".ndjson.gz")):
+        return "jsonl.gz"
+    if lower.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    for name, exporter in EXPORTERS.items():
+        if lower.endswith(exporter["extensions"]):
+            return name
+    return "json"
+
+def detect_format(path):
+    # Sniff the file itself so a JSON Lines file saved as .json still reads correctly
+    with open(path, 'rb') as f:
+        head = f.read(64)
+    if head.startswith(b'\x1f\x8b'):
+        return "jsonl.gz"
+    for name, exporter in EXPORTERS.items():
+        if head.startswith(exporter["magic"]):
+            return name
+    stripped = head.lstrip()
+    if stripped.startswith(b'{'):
+        return "jsonl"
+    if stripped.startswith(b'['):
+        return "json"
+    return format_from_extension(path)
+
+class JsonWriter:
+    # Legacy pretty-printed JSON array; records are kept until close()
+    def __init__(self, path):
+        self.path = path
+        self.records = []
+        self.count = 0
+        # Fail early if the file cannot be created
+        open(path, "w", encoding="utf-8").close()
+
+    def write(self, record):
+        self.records.append(record)
+        self.count += 1
+
+    def close(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f, indent=2, ensure_ascii=False)
+        return self.records
+
+class JsonLinesWriter:
+    # One JSON object per line, flushed as records arrive so a crash keeps what was scraped
+    def __init__(self, path, compress=False):
+        self.path = path
+        self.count = 0
+        if compress:
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._flush_every = GZIP_FLUSH_EVERY
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+            self._flush_every = 1
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+        if self.count % self._flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+        return self.count
+
+def open_writer(path, output_format=None):
+    output_format = output_format or format_from_extension(path)
+    if output_format == "json":
+        return JsonWriter(path)
+    if output_format == "jsonl":
+        return JsonLinesWriter(path)
+    if output_format == "jsonl.gz":
+        return JsonLinesWriter(path, compress=True)
+    if output_format in EXPORTERS:
+        return EXPORTERS[output_format]["writer"](path)
+    raise ValueError(f"Unsupported output format: {output_format}")
+
+def _open_lines(path, input_format):
+    if input_format == "jsonl.gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+def iter_json_array(path, chunk_size=JSON_READ_CHUNK):
+    # Yield the elements of a top-level JSON array while reading the file in
+    # chunks, so arrays with millions of records are never held in memory
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError("JSON file must contain a list of records")
+        position = 1
+        at_end = False
+        while True:
+            position = _SEPARATORS.match(buffer, position).end()
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                if position == len(buffer):
+                    raise json.JSONDecodeError("Unterminated JSON array", buffer, position)
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The next record is cut off by the chunk boundary: read more
+                more = f.read(chunk_size)
+                if not more:
+                    if at_end:
+                        raise
+                    at_end = True
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            at_end = False
+            yield record
+            position = end
+            if position > chunk_size:
+                buffer = buffer[position:]
+                position = 0
+
+def iter_records(path):
+    # Yield records one at a time; neither format is loaded whole
+    input_format = detect_format(path)
+    if input_format == "json":
+        yield from iter_json_array(path)
+        return
+    if input_format in EXPORTERS:
+        yield from EXPORTERS[input_format]["reader"](path)[1]
+        return
+
+    with _open_lines(path, input_format) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def open_records(path):
+    # Returns (count, records); the input is counted in a streaming pass and
+    # then read lazily, so memory does not grow with the number of records
+    input_format = detect_format(path)
+    if input_format == "json":
+        count = sum(1 for _ in iter_json_array(path))
+        return count, iter_json_array(path)
+    if input_format in EXPORTERS:
+        # Binary formats store their row count, so nothing is scanned twice
+        return EXPORTERS[input_format]["reader"](path)
+
+    with _open_lines(path, input_format) as f:
+        count = sum(1 for line in f if line.strip())
+    return count, iter_records(path)
@@ -0,0 +1,107 @@
+import sys
+import time
+import random
+import asyncio
+import threading
+
+import requests
+
+from app.core.host_scheduler import host_of
+
+# Statuses worth another attempt: timeouts, rate limits and server-side failures
+RETRYABLE_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+# Transport failures worth another attempt (resets, refused connections, timeouts)
+RETRYABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError, ConnectionError, TimeoutError, asyncio.TimeoutError)
+
+RETRY_DEFAULTS = {
+    "max_retries": 3,
+    "backoff_base": 0.5,
+    "backoff_max": 30.0,
+    "connect_timeout": 10.0,
+    # Longest silence between two reads, so large images are not cut off while bytes arrive
+    "read_timeout": 30.0,
+    "breaker_threshold": 5,
+    "breaker_cooldown": 60.0
+}
+
+class RetryPolicy:
+    # Decides which failures are retried and how long to wait: exponential
+    # backoff with full jitter (a random wait up to base * 2^attempt, capped)
+    # so workers that failed together do not retry in lockstep
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30.0, connect_timeout=10.0, read_timeout=30.0,
+                 retry_statuses=RETRYABLE_STATUSES):
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+        self.retry_statuses = tuple(retry_statuses)
+
+    @property
+    def timeout(self):
+        # (connect, read) as requests expects it
+        return (self.connect_timeout, self.read_timeout)
+
+    def is_retryable_status(self, status):
+        return status in self.retry_statuses
+
+    def is_retryable_error(self, error):
+        if isinstance(error, RETRYABLE_ERRORS):
+            return True
+        # aiohttp is only loaded by the async engine
+        aiohttp = sys.modules.get("aiohttp")
+        return aiohttp is not None and isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+    def delay(self, attempt, retry_after=None):
+        # A Retry-After from the server is a lower bound on the wait
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            return max(min(retry_after, self.backoff_max), backoff)
+        return backoff
+
+class CircuitBreaker:
+    # Per-host circuit breaker: after `threshold` consecutive failed items (each
+    # having used up its retries) the host is skipped for `cooldown` seconds.
+    # Afterwards requests are let through again; one more failure re-opens the
+    # circuit, a success closes it.
+    def __init__(self, threshold=5, cooldown=60.0):
+        self.threshold = max(1, int(threshold))
+        self.cooldown = float(cooldown)
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._open_until = {}
+
+    def allow(self, url):
+        with self._lock:
+            return self._open_until.get(host_of(url), 0.0) <= time.monotonic()
+
+    def retry_in(self, url):
+        # Seconds until an open circuit lets requests through again
+        with self._lock:
+            return max(0.0, self._open_until.get(host_of(url), 0.0) - time.monotonic())
+
+    def record_success(self, url):
+        host = host_of(url)
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+
+    def record_failure(self, url):
+        # Returns True when this failure opened the circuit
+        host = host_of(url)
+        with self._lock:
+            failures = self._failures[host] = self._failures.get(host, 0) + 1
+            if failures < self.threshold:
+                return False
+            self._open_until[host] = time.monotonic() + self.cooldown
+            return True
+
+def create_retry(settings=None):
+    # RetryPolicy and CircuitBreaker from one settings dict (as used by jobs and the GUI)
+    settings = dict(RETRY_DEFAULTS, **(settings or {}))
+    policy = RetryPolicy(settings["max_retries"], settings["backoff_base"], settings["backoff_max"],
+                         settings["connect_timeout"], settings["read_timeout"],
+                         settings.get("retry_statuses", RETRYABLE_STATUSES))
+    return policy, CircuitBreaker(settings["breaker_threshold"], settings["breaker_cooldown"])
@@ -1,43 +1,55 @@
-import time
 import json
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+import time
+
+from app.core.record_io import open_writer, format_from_extension
+from app.core.metrics import Metrics
+from app.core.extraction_plan import compile_plan
+from app.core.cancellation import CancelToken, Cancelled
+from app.core.change_index import DeltaWriter
+
+BACKENDS = ["selenium", "static", "auto"]
 
 class WebScraper:
     def __init__(self, logger, progress_updater, status_updater):
         self.logger = logger
         self.update_progress = progress_updater
         self.update_status = status_updater
+        self.metrics = Metrics("scrape")
+        self.cache = None
+        self.cancel_token = CancelToken()
+        # Counts and file of the last incremental run's changes
+        self.delta = None
+        # Chrome profile of the current run, see app.core.browser_profiles
+        self.browser_profile = None
+        # Borrow browsers from the process's warm pool instead of starting and quitting one per run;
+        # a dict tunes that pool, see app.core.driver_pool.WARM_POOL_DEFAULTS
+        self.warm_browser = True
         
     def scrape(self, url, selector, selector_type, content_type, output_file, wait_time, headless, 
-               extraction_config):
+               extraction_config, output_format=None, backend="selenium", wait_strategy="fixed",
+               wait_min_count=1, scroll_rounds=0, scroll_pause=1.0, max_items=None, metrics_file=None, http_cache=None,
+               cancel_token=None, incremental=False, browser_profile=None, warm_browser=True):
+        # cancel_token lets the caller stop or pause the run between elements;
+        # incremental also writes what changed since the last run to a delta file
+        self.metrics = Metrics("scrape")
+        self.cancel_token = cancel_token or CancelToken()
+        self.delta = None
+        self.browser_profile = browser_profile
+        self.warm_browser = warm_browser
+        self.cache = self._open_cache(http_cache)
         self.logger(f"Starting to scrape: {url}")
         self.update_status("Scraping in progress...")
         self.update_progress(10)
         
-        # Setup Chrome options
-        chrome_options = webdriver.ChromeOptions()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--incognito")
-        
-        driver = None
+        page = None
         try:
-            # Initialize WebDriver
-            self.logger("Initializing browser...")
-            driver = webdriver.Chrome(options=chrome_options)
-            
-            # Visit the URL
-            self.logger(f"Visiting URL: {url}")
-            driver.get(url)
-            
-            # Wait for the page to load
-            self.logger(f"Waiting {wait_time} seconds for page to load...")
-            time.sleep(wait_time)
-            
-            # Select elements based on selector type
-            self.logger(f"Looking for elements with {selector_type}: {selector}")
-            elements = self._find_elements(driver, selector_type, selector)
+            # Load the page and select elements based on selector type
+            self.cancel_token.check()
+            page, elements = self._open_page(
+                backend, url, selector, selector_type, wait_time, headless,
+                wait_strategy=wait_strategy, wait_min_count=wait_min_count
+            )
+            self.cancel_token.check()
                 
             if not elements:
                 self.logger("No elements found with the given selector.")
@@ -48,138 +60,187 @@ class WebScraper:
             self.logger(f"Found {len(elements)} elements")
             self.update_progress(30)
             
-            # Extract data based on content type
-            data = []
+            # Records are handed to the writer as they are extracted; JSON Lines
+            # output is flushed incrementally instead of dumped at the end
+            output_format = output_format or format_from_extension(output_file)
+            self.logger(f"Saving data to {output_file} ({output_format})...")
             
-            if content_type == "image":
-                data = self._extract_image_data(elements, extraction_config)
+            try:
+                writer = open_writer(output_file, output_format)
+            except Exception as e:
+                self.logger(f"Error saving JSON file: {str(e)}")
+                return None, None
+                
+            # Extract data based on content type, scrolling for more items if requested
+            plan = self._compile_plan(content_type, extraction_config, scroll_rounds)
+            if incremental:
+                writer = self._track_changes(writer, output_file, output_format, [url], plan)
+                if writer is None:
+                    return None, None
+            if scroll_rounds and hasattr(page, "harvest"):
+                self.logger(f"Auto-scrolling for up to {scroll_rounds} rounds...")
+                records = page.harvest(selector_type, selector, plan, scroll_rounds, scroll_pause, max_items)
             else:
-                data = self._extract_text_data(elements, extraction_config)
-                        
-            # Save data to JSON file
+                if scroll_rounds:
+                    self.logger("Auto-scroll needs the browser backend, extracting the fetched page only")
+                records = page.iter_records(elements, plan)
+                
+            try:
+                self._write_records(records, writer)
+            except Exception:
+                # Keep whatever was extracted before the failure
+                writer.close()
+                raise
+                
+            # The JSON writer returns the records, streaming writers only their count
             self.update_progress(90)
-            self.logger(f"Saving data to {output_file}...")
-            
             try:
-                with open(output_file, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                self.logger(f"Successfully saved {len(data)} items to {output_file}")
+                with self.metrics.phase("write"):
+                    if incremental:
+                        # Items cut off by max_items are not removals
+                        writer.finish(complete=not (max_items and writer.count >= max_items))
+                    data = writer.close()
             except Exception as e:
                 self.logger(f"Error saving JSON file: {str(e)}")
                 return None, None
                 
+            self.logger(f"Successfully saved {writer.count} items to {output_file}")
+            if incremental:
+                self._report_changes(writer)
+                
             self.update_status("Scraping completed")
             self.update_progress(100)
             return output_file, data
             
+        except Cancelled:
+            # Records written before the stop are kept in the output file
+            self.logger("Scraping cancelled")
+            self.update_status("Scraping cancelled")
+            self.update_progress(0)
+            return None, None
         except Exception as e:
             self.logger(f"Error during scraping: {str(e)}")
             self.update_status("Error occurred")
             self.update_progress(0)
             return None, None
         finally:
-            if driver:
-                driver.quit()
-                self.logger("Browser closed")
-    
-    def _find_elements(self, driver, selector_type, selector):
-        elements = []
+            if page:
+                page.close()
+            self._close_cache()
+            self._report_metrics(metrics_file)
+                
+    def _write_records(self, records, writer):
+        # Extraction is lazy, so time spent in the writer is split out of the loop
+        write_time = 0.0
+        start = time.perf_counter()
+        for record in records:
+            self.cancel_token.check()
+            write_start = time.perf_counter()
+            writer.write(record)
+            write_time += time.perf_counter() - write_start
+            self.metrics.increment("items")
+        self.metrics.add_time("extraction", time.perf_counter() - start - write_time)
+        self.metrics.add_time("write", write_time)
+        
+    def _track_changes(self, writer, output_file, output_format, urls, plan):
+        # The index belongs to one listing: its URLs and extraction plan
         try:
-            if selector_type == "class":
-                elements = driver.find_elements(By.CLASS_NAME, selector)
-            elif selector_type == "id":
-                elements = [driver.find_element(By.ID, selector)]
-            elif selector_type == "tag":
-                elements = driver.find_elements(By.TAG_NAME, selector)
-            elif selector_type == "css_selector":
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-            elif selector_type == "xpath":
-                elements = driver.find_elements(By.XPATH, selector)
+            source = json.dumps({"urls": urls, "plan": plan.key})
+            writer = DeltaWriter(writer, output_file, output_format, source, plan.dedupe_field)
         except Exception as e:
-            self.logger(f"Error finding elements: {str(e)}")
-            elements = []
-        return elements
+            writer.close()
+            self.logger(f"Error opening the change index: {str(e)}")
+            return None
+        if writer.index.is_new:
+            self.logger("No change index for this listing yet, every item counts as added")
+        return writer
+        
+    def _report_changes(self, writer):
+        self.delta = writer.summary()
+        self.logger(f"Changes since the last run: {self.delta['added']} added, {self.delta['changed']} changed, "
+                    f"{self.delta['removed']} removed, saved to {self.delta['file']}")
         
-    def _extract_image_data(self, elements, config):
-        id_attr = config.get("id_attr", "")
-        title_selector = config.get("title_selector", "")
-        img_selector = config.get("img_selector", "")
+    def _compile_plan(self, content_type, extraction_config, scroll_rounds=0):
+        # Galleries worth scrolling nearly always lazy-load their images
+        if scroll_rounds and content_type == "image" and "fields" not in extraction_config:
+            extraction_config = dict(extraction_config, resolve_lazy=True)
+        return compile_plan(content_type, extraction_config)
         
-        data = []
-        self.logger("Extracting image data...")
+    def _open_cache(self, http_cache):
+        # http_cache holds HttpCache settings (directory, max_bytes, ttl); only the
+        # static backend fetches through it, the browser keeps its own cache
+        if not http_cache:
+            return None
+        from app.core.http_cache import HttpCache
+        cache = HttpCache(**http_cache)
+        self.logger(f"Using HTTP cache: {cache.directory}")
+        return cache
         
-        for i, elem in enumerate(elements):
-            self.update_progress(30 + (50 * i / len(elements)))
+    def _close_cache(self):
+        if self.cache:
+            self.cache.close()
+            self.cache = None
             
+    def _report_metrics(self, metrics_file):
+        self.metrics.finish()
+        snapshot = self.metrics.snapshot()
+        phases = ", ".join(f"{name} {phase['seconds']:.2f}s" for name, phase in snapshot["phases"].items())
+        self.logger(f"Timing: {phases or 'n/a'} | {snapshot['items_per_second']} items/s")
+        if metrics_file:
             try:
-                # Extract image ID from the data attribute
-                image_id = elem.get_attribute(id_attr) if id_attr else f"img_{i}"
-                
-                # Get image title
-                try:
-                    image_title = elem.find_element(By.CSS_SELECTOR, title_selector).get_attribute("title")
-                except:
-                    try:
-                        image_title = elem.find_element(By.CSS_SELECTOR, title_selector).text
-                    except:
-                        image_title = f"image_{i}"
-                        
-                # Get image source
-                try:
-                    image_src = elem.find_element(By.CSS_SELECTOR, img_selector).get_attribute("src")
-                except:
-                    image_src = "not_found"
-                    
-                data.append({
-                    "id": image_id,
-                    "title": image_title,
-                    "src": image_src
-                })
-                
-                self.logger(f"Processed image {i+1}/{len(elements)}: {image_title}")
+                self.metrics.write(metrics_file)
+                self.logger(f"Metrics saved to {metrics_file}")
             except Exception as e:
-                self.logger(f"Error processing element {i+1}: {str(e)}")
+                self.logger(f"Error saving metrics: {str(e)}")
                 
-        return data
+    def _create_backend(self, name, headless, pool=None, session=None):
+        # Backends are imported lazily so the static path never loads Selenium
+        if name == "static":
+            from app.core.static_backend import StaticBackend
+            return StaticBackend(self.logger, self.update_progress, session, self.metrics, self.cache)
+        if name == "selenium":
+            from app.core.selenium_backend import SeleniumBackend
+            if pool is None and self.warm_browser:
+                from app.core.driver_pool import shared_pool
+                pool = shared_pool(headless, self.browser_profile, self.warm_browser)
+            return SeleniumBackend(self.logger, self.update_progress, headless, pool, self.metrics,
+                                   self.browser_profile, self.cancel_token)
+        raise ValueError(f"Unknown scraping backend: {name}")
         
-    def _extract_text_data(self, elements, config):
-        id_selector = config.get("id_selector", "")
-        title_selector = config.get("title_selector", "")
-        content_selector = config.get("content_selector", "")
+    def _open_page(self, backend, url, selector, selector_type, wait_time, headless, pool=None, session=None,
+                   wait_strategy="fixed", wait_min_count=1):
+        wait = {
+            "strategy": wait_strategy,
+            "selector_type": selector_type,
+            "selector": selector,
+            "min_count": wait_min_count
+        }
         
-        data = []
-        self.logger("Extracting text data...")
-        
-        for i, elem in enumerate(elements):
-            self.update_progress(30 + (50 * i / len(elements)))
-            
+        # "auto" tries a plain HTTP fetch first and only starts Chrome when it finds nothing
+        if backend == "auto":
+            page = self._create_backend("static", headless, pool, session)
             try:
-                # Extract ID/name
-                try:
-                    item_id = elem.find_element(By.CSS_SELECTOR, id_selector).text if id_selector else f"item_{i}"
-                except:
-                    item_id = f"item_{i}"
-                    
-                # Get title
-                try:
-                    item_title = elem.find_element(By.CSS_SELECTOR, title_selector).text if title_selector else ""
-                except:
-                    item_title = ""
-                    
-                # Get content
-                try:
-                    item_content = elem.find_element(By.CSS_SELECTOR, content_selector).text if content_selector else elem.text
-                except:
-                    item_content = elem.text
-                    
-                data.append({
-                    "id": item_id,
-                    "title": item_title,
-                    "content": item_content
-                })
-                
-                self.logger(f"Processed item {i+1}/{len(elements)}: {item_title if item_title else item_id}")
+                page.open(url, wait_time, wait)
+                self.logger(f"Looking for elements with {selector_type}: {selector}")
+                with self.metrics.phase("element_lookup"):
+                    elements = page.find_elements(selector_type, selector)
             except Exception as e:
-                self.logger(f"Error processing element {i+1}: {str(e)}")
+                self.logger(f"Static fetch failed: {str(e)}")
+                elements = []
+            if elements:
+                return page, elements
                 
-        return data
\ No newline at end of file
+            page.close()
+            self.logger("No matches in the server-rendered HTML, falling back to the browser")
+            backend = "selenium"
+            
+        page = self._create_backend(backend, headless, pool, session)
+        try:
+            page.open(url, wait_time, wait)
+            self.logger(f"Looking for elements with {selector_type}: {selector}")
+            with self.metrics.phase("element_lookup"):
+                elements = page.find_elements(selector_type, selector)
+        except Exception:
+            page.close()
+            raise
+        return page, elements
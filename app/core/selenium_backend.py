@@ -0,0 +1,213 @@
+import time
+from urllib.parse import urljoin
+from selenium.webdriver.common.by import By
+
+from app.core.bulk_extractor import bulk_extract
+from app.core.driver_pool import create_driver
+from app.core.waits import wait_for_page
+from app.core.metrics import Metrics
+from app.core.cancellation import CancelToken
+
+# Returns matched elements not seen in an earlier round and marks them as seen
+NEW_ELEMENTS_SCRIPT = """
+var selectorType = arguments[0], selector = arguments[1], found = [];
+try {
+    if (selectorType === 'class') found = Array.from(document.getElementsByClassName(selector));
+    else if (selectorType === 'id') found = document.getElementById(selector) ? [document.getElementById(selector)] : [];
+    else if (selectorType === 'tag') found = Array.from(document.getElementsByTagName(selector));
+    else if (selectorType === 'css_selector') found = Array.from(document.querySelectorAll(selector));
+    else if (selectorType === 'xpath') {
+        var snapshot = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < snapshot.snapshotLength; i++) found.push(snapshot.snapshotItem(i));
+    }
+} catch (e) {}
+var fresh = found.filter(function (el) { return el.nodeType === 1 && !el.hasAttribute('data-ws-harvested'); });
+fresh.forEach(function (el) { el.setAttribute('data-ws-harvested', '1'); });
+return fresh;
+"""
+
+SCROLL_SCRIPT = """
+var last = arguments[0];
+if (last) last.scrollIntoView({block: 'end'});
+window.scrollTo(0, document.documentElement.scrollHeight);
+"""
+
+# Transfer size of the document and every subresource loaded so far
+PAGE_BYTES_SCRIPT = """
+return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))
+    .reduce(function (total, entry) { return total + (entry.transferSize || 0); }, 0);
+"""
+
+# Rounds in a row without new items before auto-scrolling gives up
+IDLE_ROUNDS_TO_STOP = 2
+
+class SeleniumBackend:
+    # Renders pages in Chrome; needed for pages that build their content with JavaScript
+    name = "selenium"
+    
+    def __init__(self, logger, progress_updater, headless, pool=None, metrics=None, profile=None, cancel_token=None):
+        self.logger = logger
+        self.update_progress = progress_updater
+        self.headless = headless
+        self.pool = pool
+        self.profile = profile
+        self.metrics = metrics or Metrics("selenium")
+        # Stops page waits and scroll rounds; checked with check(), so a stop raises Cancelled
+        self.cancel_token = cancel_token or CancelToken()
+        self.driver = None
+        
+    def open(self, url, wait_time, wait=None):
+        # Initialize WebDriver, borrowing a running browser when pooled
+        if self.driver is None:
+            with self.metrics.phase("browser_init"):
+                if self.pool:
+                    self.driver = self.pool.acquire(self.logger)
+                else:
+                    self.logger("Initializing browser...")
+                    self.driver = create_driver(self.headless, self.profile)
+        
+        # Visit the URL
+        self.logger(f"Visiting URL: {url}")
+        with self.metrics.phase("navigation"):
+            self.driver.get(url)
+        
+        # Wait for the page to load, either for the full wait time or until it is ready
+        wait = wait or {"strategy": "fixed"}
+        if wait["strategy"] == "fixed":
+            self.logger(f"Waiting {wait_time} seconds for page to load...")
+        else:
+            self.logger(f"Waiting up to {wait_time} seconds for the page ({wait['strategy']})...")
+            
+        waited, ready = wait_for_page(
+            self.driver, wait["strategy"], wait_time, wait.get("selector_type"), wait.get("selector"),
+            wait.get("min_count", 1), self.cancel_token
+        )
+        self.metrics.add_time("page_wait", waited)
+        self.cancel_token.check()
+        if ready:
+            self.logger(f"Page ready after {waited:.2f}s")
+        else:
+            self.logger(f"Page not ready after {waited:.2f}s, continuing anyway")
+        self._count_page_bytes()
+        
+    def _count_page_bytes(self):
+        # Bytes the browser received for this page so far; blocked requests count as 0
+        try:
+            received = self.driver.execute_script(PAGE_BYTES_SCRIPT)
+        except Exception:
+            return
+        self.metrics.increment("page_bytes", int(received or 0))
+        
+    def close(self):
+        if self.driver:
+            if self.pool:
+                self.pool.release(self.driver, self.logger)
+            else:
+                self.driver.quit()
+                self.logger("Browser closed")
+            self.driver = None
+            
+    def next_page_url(self, selector):
+        links = self.driver.find_elements(By.CSS_SELECTOR, selector)
+        return links[0].get_attribute("href") if links else None
+            
+    def find_elements(self, selector_type, selector):
+        driver = self.driver
+        elements = []
+        try:
+            if selector_type == "class":
+                elements = driver.find_elements(By.CLASS_NAME, selector)
+            elif selector_type == "id":
+                elements = [driver.find_element(By.ID, selector)]
+            elif selector_type == "tag":
+                elements = driver.find_elements(By.TAG_NAME, selector)
+            elif selector_type == "css_selector":
+                elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            elif selector_type == "xpath":
+                elements = driver.find_elements(By.XPATH, selector)
+        except Exception as e:
+            self.logger(f"Error finding elements: {str(e)}")
+            elements = []
+        return elements
+        
+    def harvest(self, selector_type, selector, plan, max_rounds, scroll_pause, max_items=None):
+        # Scroll step by step and extract only elements that appeared since the
+        # previous round; items re-rendered by virtualized lists are skipped by key
+        seen = set()
+        start_index = 0
+        idle_rounds = 0
+        
+        for round_number in range(max_rounds + 1):
+            # Paused harvests scroll no further; cancelled ones raise Cancelled
+            self.cancel_token.check()
+            fresh = self.driver.execute_script(NEW_ELEMENTS_SCRIPT, selector_type, selector)
+            new_items = 0
+            
+            for record in self.iter_records(fresh, plan, start_index) if fresh else []:
+                key = record[plan.dedupe_field]
+                if key in seen:
+                    continue
+                seen.add(key)
+                new_items += 1
+                yield record
+                
+                if max_items and len(seen) >= max_items:
+                    self.logger(f"Reached the limit of {max_items} items")
+                    return
+                    
+            start_index += len(fresh)
+            self.logger(f"Scroll round {round_number}: {new_items} new items, {len(seen)} total")
+            
+            idle_rounds = idle_rounds + 1 if not new_items else 0
+            if idle_rounds >= IDLE_ROUNDS_TO_STOP or round_number == max_rounds:
+                break
+                
+            self.driver.execute_script(SCROLL_SCRIPT, fresh[-1] if fresh else None)
+            self.cancel_token.sleep(scroll_pause)
+            
+    def iter_records(self, elements, plan, start_index=0):
+        # Collect all elements in one browser call, and fall back to the
+        # per-element WebDriver path if the script cannot run
+        start = time.perf_counter()
+        try:
+            results = bulk_extract(self.driver, elements, plan, start_index)
+        except Exception as e:
+            self.logger(f"Bulk extraction unavailable ({str(e)}), extracting element by element")
+            results = None
+            
+        if results is None or len(results) != len(elements):
+            yield from plan.iter_records(elements, self, start_index)
+            return
+            
+        self.logger(f"Extracted {len(elements)} elements in one pass ({time.perf_counter() - start:.3f}s)")
+        
+        for i, result in enumerate(results):
+            self.update_progress(30 + (50 * i / len(results)))
+            
+            if "error" in result:
+                self.logger(f"Error processing element {i+1}: {result['error']}")
+                continue
+                
+            record = result["record"]
+            yield record
+            
+            self.logger(f"Processed {plan.label} {i+1}/{len(results)}: {plan.display_name(record)}")
+            
+    # Element access used by ExtractionPlan.extract on the per-element path
+    def find(self, elem, selector):
+        try:
+            return elem.find_element(By.CSS_SELECTOR, selector)
+        except Exception:
+            return None
+            
+    def attribute(self, elem, name):
+        return elem.get_attribute(name)
+        
+    def raw_attribute(self, elem, name):
+        return elem.get_dom_attribute(name)
+        
+    def text(self, elem):
+        return elem.text
+        
+    def absolute(self, url):
+        return urljoin(self.driver.current_url, url)
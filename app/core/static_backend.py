@@ -0,0 +1,161 @@
+import re
+import time
+from functools import lru_cache
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml.cssselect import CSSSelector
+
+from app.core.http_session import create_session
+from app.core.host_scheduler import host_of
+from app.core.metrics import Metrics
+
+# Elements whose src/href the browser exposes as an absolute URL property
+URL_PROPERTY_TAGS = {
+    "src": {"img", "script", "iframe", "source", "audio", "video", "embed", "input", "track"},
+    "href": {"a", "link", "area", "base"}
+}
+
+# Elements the browser never renders as text
+HIDDEN_TAGS = {"script", "style", "noscript", "template", "head", "title"}
+
+# Elements that start a new line of rendered text
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "p", "pre", "section", "table", "tr", "ul"
+}
+
+@lru_cache(maxsize=256)
+def compile_selector(selector):
+    return CSSSelector(selector, translator="html")
+
+class StaticBackend:
+    # Fetches the server-rendered HTML with requests and queries it with lxml,
+    # which avoids starting a browser for pages that need no JavaScript
+    name = "static"
+
+    def __init__(self, logger, progress_updater, session=None, metrics=None, cache=None):
+        self.logger = logger
+        self.update_progress = progress_updater
+        self.session = session
+        self.metrics = metrics or Metrics("static")
+        self.cache = cache
+        self._owns_session = session is None
+        self.document = None
+        self.base_url = None
+
+    def open(self, url, wait_time, wait=None):
+        # The HTML is complete once fetched, so wait strategies do not apply here
+        if self.session is None:
+            self.session = create_session(cache=self.cache)
+
+        self.logger(f"Fetching URL: {url}")
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=max(10, wait_time))
+            elapsed = time.perf_counter() - start
+            self.metrics.add_time("fetch", elapsed)
+            if getattr(response, "from_cache", False):
+                self.metrics.increment("cache_hits")
+            else:
+                self.metrics.observe("request_latency", elapsed)
+                self.metrics.increment("bytes", len(response.content))
+            response.raise_for_status()
+        except Exception as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            self.metrics.record_error(host_of(url), status or type(e).__name__)
+            raise
+        source = " from cache" if getattr(response, "from_cache", False) else ""
+        self.logger(f"Fetched {len(response.content)} bytes{source} in {elapsed:.2f}s")
+
+        self.document = lxml.html.fromstring(response.content, base_url=response.url)
+        self.document.resolve_base_href()
+        self.base_url = self.document.base_url or response.url
+
+    def close(self):
+        if self.session is not None and self._owns_session:
+            self.session.close()
+        self.session = None
+        self.document = None
+
+    def next_page_url(self, selector):
+        link = self._find(self.document, selector)
+        return self._get_attribute(link, "href") if link is not None else None
+
+    def find_elements(self, selector_type, selector):
+        doc = self.document
+        elements = []
+        try:
+            if selector_type == "class":
+                elements = doc.find_class(selector)
+            elif selector_type == "id":
+                elements = [doc.get_element_by_id(selector)]
+            elif selector_type == "tag":
+                elements = list(doc.iter(selector.lower()))
+            elif selector_type == "css_selector":
+                elements = compile_selector(selector)(doc)
+            elif selector_type == "xpath":
+                # XPath can also select text or attributes; keep only elements
+                elements = [e for e in doc.xpath(selector) if isinstance(e, lxml.html.HtmlElement)]
+        except Exception as e:
+            self.logger(f"Error finding elements: {str(e)}")
+            elements = []
+        return elements
+
+    def iter_records(self, elements, plan, start_index=0):
+        return plan.iter_records(elements, self, start_index)
+
+    def _find(self, elem, selector):
+        # Like WebElement.find_element: first matching descendant, never the element itself
+        try:
+            matches = compile_selector(selector)(elem)
+        except Exception:
+            return None
+        for match in matches:
+            if match is not elem:
+                return match
+        return None
+
+    def _get_attribute(self, elem, name):
+        # Mirror WebElement.get_attribute, which resolves URL properties against the page
+        value = elem.get(name)
+        if name in URL_PROPERTY_TAGS:
+            if value is not None:
+                return urljoin(self.base_url, value.strip())
+            return "" if elem.tag in URL_PROPERTY_TAGS[name] else None
+        if value is None and name in ("title", "id", "class"):
+            return ""
+        return value
+
+    def _text(self, elem):
+        # Approximate WebElement.text: rendered text, one line per block, whitespace collapsed
+        parts = []
+        self._collect_text(elem, parts)
+        lines = (re.sub(r"[ \t\u00a0]+", " ", line).strip() for line in "".join(parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+    def _collect_text(self, node, parts):
+        if not isinstance(node.tag, str) or node.tag in HIDDEN_TAGS or node.get("hidden") is not None:
+            return
+        if node.tag == "br" or node.tag in BLOCK_TAGS:
+            parts.append("\n")
+        if node.text:
+            parts.append(node.text.replace("\n", " "))
+        for child in node:
+            self._collect_text(child, parts)
+            if child.tail:
+                parts.append(child.tail.replace("\n", " "))
+        if node.tag in BLOCK_TAGS:
+            parts.append("\n")
+
+    # Element access used by ExtractionPlan.extract
+    find = _find
+    attribute = _get_attribute
+    text = _text
+
+    def raw_attribute(self, elem, name):
+        return elem.get(name)
+
+    def absolute(self, url):
+        return urljoin(self.base_url, url)
@@ -0,0 +1,71 @@
+import time
+
+from app.core.cancellation import CancelToken
+
+# "fixed" sleeps for the whole wait time; every other strategy polls the page
+# and returns as soon as it is ready, using the wait time only as a ceiling
+WAIT_STRATEGIES = ["fixed", "ready_state", "selector", "stable", "network_idle"]
+
+POLL_INTERVAL = 0.25
+
+# How long the element count or the resource list must stay unchanged
+QUIET_PERIOD = 1.0
+
+COUNT_ELEMENTS_SCRIPT = """
+var selectorType = arguments[0], selector = arguments[1];
+try {
+    if (selectorType === 'class') return document.getElementsByClassName(selector).length;
+    if (selectorType === 'id') return document.getElementById(selector) ? 1 : 0;
+    if (selectorType === 'tag') return document.getElementsByTagName(selector).length;
+    if (selectorType === 'css_selector') return document.querySelectorAll(selector).length;
+    if (selectorType === 'xpath') {
+        return document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;
+    }
+} catch (e) {}
+return 0;
+"""
+
+READY_STATE_SCRIPT = "return document.readyState;"
+
+RESOURCE_COUNT_SCRIPT = "return performance.getEntriesByType('resource').length;"
+
+def wait_for_page(driver, strategy, timeout, selector_type=None, selector=None, min_count=1, cancel_token=None):
+    # Returns (seconds waited, whether the page became ready before the timeout);
+    # cancelling cancel_token ends the wait early with the page not ready
+    cancel_token = cancel_token or CancelToken()
+    start = time.perf_counter()
+    if strategy == "fixed":
+        finished = cancel_token.sleep(timeout)
+        return time.perf_counter() - start, finished
+
+    deadline = start + timeout
+    last_value = None
+    last_change = start
+
+    while True:
+        now = time.perf_counter()
+        if strategy == "ready_state":
+            ready = driver.execute_script(READY_STATE_SCRIPT) == "complete"
+        elif strategy == "selector":
+            ready = driver.execute_script(COUNT_ELEMENTS_SCRIPT, selector_type, selector) >= min_count
+        elif strategy in ("stable", "network_idle"):
+            # Ready once the watched value has not changed for QUIET_PERIOD
+            if strategy == "stable":
+                value = driver.execute_script(COUNT_ELEMENTS_SCRIPT, selector_type, selector)
+                settled = value >= min_count
+            else:
+                value = driver.execute_script(RESOURCE_COUNT_SCRIPT)
+                settled = driver.execute_script(READY_STATE_SCRIPT) == "complete"
+            if value != last_value:
+                last_value = value
+                last_change = now
+            ready = settled and now - last_change >= QUIET_PERIOD
+        else:
+            raise ValueError(f"Unknown wait strategy: {strategy}")
+
+        if ready:
+            return time.perf_counter() - start, True
+        if now >= deadline:
+            return time.perf_counter() - start, False
+        if not cancel_token.sleep(min(POLL_INTERVAL, max(0.0, deadline - now))):
+            return time.perf_counter() - start, False
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+
+# Persistent job queue shared by the GUI, the CLI and the worker process.
+# Jobs are the same dicts the job files describe (see app.jobs); the queue
+# keeps their priority, status, progress and final summary in SQLite, so a
+# worker restart or a GUI crash loses nothing. Clients only submit, watch and
+# cancel jobs; a JobWorker claims and runs them.
+
+JOBS_DIR = os.path.join(os.path.expanduser("~"), ".web_scraper_jobs")
+QUEUE_FILE = os.path.join(JOBS_DIR, "queue.sqlite")
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_OK = "ok"
+STATUS_PARTIAL = "partial"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+FINAL_STATUSES = (STATUS_OK, STATUS_PARTIAL, STATUS_FAILED, STATUS_CANCELLED)
+STATUSES = (STATUS_QUEUED, STATUS_RUNNING) + FINAL_STATUSES
+
+FIELDS = ("id", "name", "kind", "priority", "status", "spec", "summary", "progress", "message", "log_file",
+          "worker", "cancel_requested", "paused", "submitted_at", "started_at", "finished_at")
+
+# A worker that has not written a heartbeat for this long is considered gone
+WORKER_TIMEOUT = 15.0
+
+def log_path_for(job_id, queue_path=QUEUE_FILE):
+    return os.path.join(os.path.dirname(queue_path), "logs", f"{job_id}.log")
+
+class JobQueue:
+    def __init__(self, path=QUEUE_FILE):
+        # Absolute, so log paths stay valid for workers started elsewhere
+        self.path = path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode, so claim() can take the write lock with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                kind TEXT,
+                priority INTEGER DEFAULT 0,
+                status TEXT,
+                spec TEXT,
+                summary TEXT,
+                progress REAL DEFAULT 0,
+                message TEXT,
+                log_file TEXT,
+                worker TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                paused INTEGER DEFAULT 0,
+                submitted_at REAL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, id)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY,
+                pid INTEGER,
+                host TEXT,
+                heartbeat REAL
+            )
+        """)
+
+    def _row(self, row):
+        if not row:
+            return None
+        job = dict(zip(FIELDS, row))
+        job["spec"] = json.loads(job["spec"])
+        job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+        return job
+
+    def submit(self, job, priority=0):
+        # Returns the id of the queued job
+        kind = job.get("kind", "scrape")
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (name, kind, priority, status, spec, submitted_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.get("name", kind), kind, int(priority), STATUS_QUEUED, json.dumps(job), time.time())
+            )
+            job_id = cursor.lastrowid
+            self._conn.execute("UPDATE jobs SET log_file = ? WHERE id = ?", (log_path_for(job_id, self.path), job_id))
+        return job_id
+
+    def claim(self, worker_id, exclude_kinds=()):
+        # Atomically move the most urgent queued job to running; kinds at
+        # their concurrency cap are skipped so other work can go first
+        query = f"SELECT {', '.join(FIELDS)} FROM jobs WHERE status = ? AND NOT paused"
+        params = [STATUS_QUEUED]
+        if exclude_kinds:
+            query += f" AND kind NOT IN ({', '.join('?' for _ in exclude_kinds)})"
+            params.extend(exclude_kinds)
+        query += " ORDER BY priority DESC, id LIMIT 1"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(query, params).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, started_at = ?, progress = 0 WHERE id = ?",
+                        (STATUS_RUNNING, worker_id, time.time(), row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._row(row)
+        if job:
+            job["status"] = STATUS_RUNNING
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def list(self, status=None, limit=50):
+        query = f"SELECT {', '.join(FIELDS)} FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row(row) for row in rows]
+
+    def update_progress(self, job_id, progress=None, message=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = COALESCE(?, progress), message = COALESCE(?, message) WHERE id = ?",
+                (progress, message, job_id)
+            )
+
+    def finish(self, job_id, summary):
+        # A job that completed before its worker acted on a cancellation keeps its result
+        status = summary.get("status", STATUS_FAILED)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, summary = ?, progress = 100, finished_at = ? WHERE id = ? AND status = ?",
+                (status, json.dumps(summary), time.time(), job_id, STATUS_RUNNING)
+            )
+
+    def cancel(self, job_id):
+        # Queued jobs are cancelled at once; running ones are flagged for their worker.
+        # Returns the job's status afterwards, or None for an unknown id.
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, cancel_requested = 1, finished_at = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED)
+            )
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                               (job_id, STATUS_RUNNING))
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_paused(self, job_id, paused):
+        # Running jobs stop issuing new requests until resumed; queued jobs
+        # are not claimed while paused. Returns the job's status, or None.
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET paused = ?, message = ? WHERE id = ? AND status IN (?, ?)",
+                (int(bool(paused)), "Paused" if paused else "Resumed", job_id, STATUS_QUEUED, STATUS_RUNNING)
+            )
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def control(self, job_id):
+        # (cancel_requested, paused) as polled by the job's own process
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested, paused FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return (bool(row[0]), bool(row[1])) if row else (True, False)
+
+    def cancel_requested(self, job_ids):
+        # Running jobs among job_ids whose cancellation was requested
+        if not job_ids:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE cancel_requested = 1 AND id IN ({', '.join('?' for _ in job_ids)})",
+                list(job_ids)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def mark_cancelled(self, job_id, message="Cancelled"):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, message, time.time(), job_id, STATUS_RUNNING)
+            )
+
+    def requeue(self, job_id):
+        # A running job goes back in the queue (its worker is shutting down)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN cancel_requested THEN ? ELSE ? END, worker = NULL "
+                "WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, STATUS_QUEUED, job_id, STATUS_RUNNING)
+            )
+
+    def heartbeat(self, worker_id):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workers (id, pid, host, heartbeat) VALUES (?, ?, ?, ?)",
+                (worker_id, os.getpid(), socket.gethostname(), time.time())
+            )
+
+    def remove_worker(self, worker_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def live_workers(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM workers WHERE heartbeat > ?",
+                                      (time.time() - WORKER_TIMEOUT,)).fetchall()
+        return [row[0] for row in rows]
+
+    def requeue_orphans(self):
+        # Jobs left running by a worker that stopped heartbeating go back in the queue
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN cancel_requested THEN ? ELSE ? END, worker = NULL "
+                "WHERE status = ? AND (worker IS NULL OR worker NOT IN "
+                "(SELECT id FROM workers WHERE heartbeat > ?))",
+                (STATUS_CANCELLED, STATUS_QUEUED, STATUS_RUNNING, time.time() - WORKER_TIMEOUT)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,224 @@
+import json
+import os
+import sys
+import time
+
+from app.core.scraper import WebScraper
+from app.core.crawler import Crawler
+from app.core.downloader import ImageDownloader
+from app.core.presets import PRESETS_FILE, get_preset
+from app.core.browser_profiles import resolve_profile
+from app.core.cancellation import CancelToken
+
+# Jobs mirror the fields of the scraper and downloader tabs; anything left out
+# falls back to the same defaults the GUI starts with
+JOB_DEFAULTS = {
+    "selector_type": "class",
+    "content_type": "image",
+    "wait_time": 5,
+    "headless": True,
+    "extraction_config": {}
+}
+
+DOWNLOAD_DEFAULTS = {
+    "delay": 0.5,
+    "max_workers": 4
+}
+
+SCRAPE_OPTIONS = ["output_format", "backend", "wait_strategy", "wait_min_count", "scroll_rounds", "scroll_pause",
+                  "max_items", "metrics_file", "http_cache", "incremental", "browser_profile",
+                  "warm_browser"]
+CRAWL_OPTIONS = ["page_range", "next_page_selector", "max_pages", "workers"]
+DOWNLOAD_OPTIONS = ["max_workers", "resume", "revalidate", "dedupe", "metrics_file", "http_cache", "postprocess",
+                    "engine", "retry", "retry_failed"]
+
+class JobError(Exception):
+    pass
+
+def load_job_file(path):
+    # A job file holds one job, a list of jobs, or {"defaults": {...}, "jobs": [...]}
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise JobError(f"{path}: reading YAML job files needs PyYAML (pip install pyyaml)")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+
+    defaults = {}
+    if isinstance(spec, dict) and "jobs" in spec:
+        defaults = spec.get("defaults") or {}
+        spec = spec["jobs"]
+    if isinstance(spec, dict):
+        spec = [spec]
+    if not isinstance(spec, list):
+        raise JobError(f"{path}: expected a job, a list of jobs or a 'jobs' section")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for index, entry in enumerate(spec):
+        job = merge_job(defaults, entry)
+        job.setdefault("name", f"{os.path.splitext(os.path.basename(path))[0]}-{index + 1}")
+        jobs.append(normalize_job(job, base_dir))
+    return jobs
+
+def merge_job(defaults, entry):
+    if not isinstance(entry, dict):
+        raise JobError(f"Job entries must be mappings, got {type(entry).__name__}")
+    job = dict(defaults)
+    job.update(entry)
+    # Nested sections are merged key by key so defaults can set e.g. the download delay
+    for section in ("extraction_config", "download"):
+        if isinstance(defaults.get(section), dict) and isinstance(entry.get(section), dict):
+            job[section] = dict(defaults[section], **entry[section])
+    return job
+
+def download_folder_for(output_file):
+    # gallery.json -> gallery/, also for incremental scrapes whose downloads
+    # read the delta file but share the full output's folder and manifest
+    folder_name = os.path.splitext(os.path.basename(output_file))[0]
+    return os.path.join(os.path.dirname(output_file), folder_name)
+
+def normalize_job(job, base_dir="."):
+    name = job.get("name", "job")
+    if job.get("kind") == "download":
+        return normalize_download_job(job, base_dir)
+    if job.get("preset"):
+        # A named preset supplies the content type and its compiled plan
+        try:
+            preset = get_preset(job["preset"], job.get("presets_file", PRESETS_FILE))
+        except (KeyError, OSError, ValueError) as e:
+            raise JobError(f"{name}: {str(e)}")
+        job = dict({"content_type": preset["content_type"], "extraction_config": preset["plan"]}, **job)
+    job = dict(JOB_DEFAULTS, **job)
+    if not job.get("url") and not job.get("urls"):
+        raise JobError(f"{name}: 'url' or 'urls' is required")
+    for key in ("selector", "output_file"):
+        if not job.get(key):
+            raise JobError(f"{name}: '{key}' is required")
+    try:
+        resolve_profile(job.get("browser_profile"))
+    except (TypeError, ValueError) as e:
+        raise JobError(f"{name}: {str(e)}")
+    if isinstance(job.get("warm_browser"), dict):
+        # Pool settings are only checked when given, so static-only jobs need no Selenium
+        from app.core.driver_pool import warm_pool_settings
+        try:
+            job["warm_browser"] = warm_pool_settings(job["warm_browser"])
+        except (TypeError, ValueError) as e:
+            raise JobError(f"{name}: {str(e)}")
+
+    # Relative paths are taken relative to the job file, not the working directory
+    job["output_file"] = os.path.join(base_dir, job["output_file"])
+    if job.get("metrics_file"):
+        job["metrics_file"] = os.path.join(base_dir, job["metrics_file"])
+    if isinstance(job.get("http_cache"), dict) and job["http_cache"].get("directory"):
+        job["http_cache"] = dict(job["http_cache"], directory=os.path.join(base_dir, job["http_cache"]["directory"]))
+    download = job.get("download")
+    if download:
+        download = dict(DOWNLOAD_DEFAULTS, **(download if isinstance(download, dict) else {}))
+        if not download.get("output_folder"):
+            download["output_folder"] = download_folder_for(job["output_file"])
+        else:
+            download["output_folder"] = os.path.join(base_dir, download["output_folder"])
+        # The job's HTTP cache settings also apply to its download unless it has its own
+        download.setdefault("http_cache", job.get("http_cache"))
+        if download.get("metrics_file"):
+            download["metrics_file"] = os.path.join(base_dir, download["metrics_file"])
+        job["download"] = download
+    return job
+
+def normalize_download_job(job, base_dir="."):
+    # A download-only job: {"kind": "download", "json_file": ..., "output_folder": ..., options}
+    name = job.get("name", "download")
+    for key in ("json_file", "output_folder"):
+        if not job.get(key):
+            raise JobError(f"{name}: '{key}' is required")
+    job = dict(DOWNLOAD_DEFAULTS, **job)
+    for key in ("json_file", "output_folder", "metrics_file"):
+        if job.get(key):
+            job[key] = os.path.join(base_dir, job[key])
+    return job
+
+def run_job(job, progress=None, status=None, cancel_token=None):
+    # Runs one job start to finish and returns a JSON-serializable summary;
+    # it is the unit handed to worker processes, so it must never raise.
+    # progress and status receive the core classes' updates (default: ignored / logged);
+    # cancel_token stops or pauses the job, which then ends with status "cancelled".
+    name = job.get("name", "job")
+    summary = {"name": name, "status": "failed", "output_file": None, "items": 0, "download": None}
+    start = time.perf_counter()
+
+    def log(message):
+        for line in str(message).strip("\n").splitlines():
+            print(f"[{name}] {line}", file=sys.stderr, flush=True)
+
+    progress = progress or (lambda value: None)
+    status = status or log
+    cancel_token = cancel_token or CancelToken()
+    if job.get("kind") == "download":
+        summary["metrics"] = {}
+        try:
+            _run_download(job, job["json_file"], summary, log, progress, status, cancel_token)
+        except Exception as e:
+            log(f"Job failed: {str(e)}")
+            summary["error"] = str(e)
+        return _finish_summary(summary, start, cancel_token)
+
+    try:
+        options = {key: job[key] for key in SCRAPE_OPTIONS if key in job}
+        crawl = {key: job[key] for key in CRAWL_OPTIONS if key in job}
+        args = (job["selector"], job["selector_type"], job["content_type"], job["output_file"],
+                job["wait_time"], job["headless"], job["extraction_config"])
+
+        if job.get("urls") or crawl:
+            urls = job.get("urls") or [job["url"]]
+            scraper = Crawler(log, progress, status)
+            json_file, data = scraper.crawl(urls, *args, **options, **crawl, cancel_token=cancel_token)
+        else:
+            scraper = WebScraper(log, progress, status)
+            json_file, data = scraper.scrape(job["url"], *args, **options, cancel_token=cancel_token)
+        summary["metrics"] = {"scrape": scraper.metrics.snapshot()}
+
+        # The JSON writer returns the records, streaming writers only their count
+        items = len(data) if isinstance(data, list) else (data or 0)
+        summary.update(output_file=json_file, items=items)
+        # Incremental jobs only download what was added or changed since the last run
+        delta = summary["delta"] = scraper.delta
+        if delta:
+            items = delta["added"] + delta["changed"]
+            json_file = json_file and delta["file"]
+        if not json_file:
+            if not cancel_token.cancelled:
+                summary["error"] = "scrape failed or found no elements"
+        elif job.get("download") and job["content_type"] == "image" and items:
+            _run_download(job["download"], json_file, summary, log, progress, status, cancel_token)
+        else:
+            summary["status"] = "ok"
+    except Exception as e:
+        log(f"Job failed: {str(e)}")
+        summary["error"] = str(e)
+    return _finish_summary(summary, start, cancel_token)
+
+def _finish_summary(summary, start, cancel_token):
+    if cancel_token.cancelled:
+        summary["status"] = "cancelled"
+    summary["elapsed"] = round(time.perf_counter() - start, 3)
+    return summary
+
+def _run_download(download, json_file, summary, log, progress, status, cancel_token=None):
+    downloader = ImageDownloader(log, progress, status)
+    result = downloader.download(
+        json_file, download["output_folder"], download["delay"],
+        **{key: download[key] for key in DOWNLOAD_OPTIONS if key in download}, cancel_token=cancel_token
+    )
+    summary["download"] = dict(result or {}, output_folder=download["output_folder"])
+    summary["metrics"]["download"] = downloader.metrics.snapshot()
+    if result is None:
+        summary["error"] = "download failed"
+    elif result["failed"]:
+        summary["status"] = "partial"
+    else:
+        summary["status"] = "ok"
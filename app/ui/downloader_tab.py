@@ -1,11 +1,16 @@
+import os
 import tkinter as tk
 from tkinter import ttk, filedialog
 
+from app.ui.event_bus import append_console_lines
+
 class DownloaderTab:
-    def __init__(self, parent, start_downloading_callback, clear_console_callback):
+    def __init__(self, parent, start_downloading_callback, clear_console_callback, stop_callback, pause_callback):
         self.parent = parent
         self.start_downloading = start_downloading_callback
         self.clear_console = clear_console_callback
+        self.stop = stop_callback
+        self.toggle_pause = pause_callback
         
         # JSON File
         ttk.Label(parent, text="JSON File:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
@@ -25,31 +30,91 @@ class DownloaderTab:
         delay_entry = ttk.Entry(parent, textvariable=self.delay_var, width=5)
         delay_entry.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
         
+        # Concurrency
+        ttk.Label(parent, text="Concurrent Downloads:").grid(row=2, column=2, sticky=tk.E, padx=5, pady=5)
+        self.workers_var = tk.StringVar(value="4")
+        workers_entry = ttk.Entry(parent, textvariable=self.workers_var, width=5)
+        workers_entry.grid(row=2, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        # Resume options
+        self.resume_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(parent, text="Skip Completed Downloads", variable=self.resume_var).grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+        self.revalidate_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Re-check Completed Files", variable=self.revalidate_var).grid(row=3, column=1, sticky=tk.W, padx=5, pady=5)
+        self.dedupe_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Deduplicate Identical Images", variable=self.dedupe_var).grid(row=3, column=2, sticky=tk.W, padx=5, pady=5)
+        self.save_metrics_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Save Metrics", variable=self.save_metrics_var).grid(row=3, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        # Opt-in disk cache shared by the static backend and the downloader
+        self.use_cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Use HTTP Cache", variable=self.use_cache_var).grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        # asyncio engine for large inputs and high concurrency (needs aiohttp)
+        self.async_engine_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Async Engine", variable=self.async_engine_var).grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(parent, text="Cache TTL Override (s):").grid(row=4, column=2, sticky=tk.E, padx=5, pady=5)
+        self.cache_ttl_var = tk.StringVar(value="")
+        ttk.Entry(parent, textvariable=self.cache_ttl_var, width=7).grid(row=4, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        # Retries with exponential backoff; a rerun can retry only what failed
+        ttk.Label(parent, text="Max Retries:").grid(row=5, column=0, sticky=tk.W, padx=5, pady=5)
+        self.max_retries_var = tk.StringVar(value="3")
+        ttk.Entry(parent, textvariable=self.max_retries_var, width=5).grid(row=5, column=1, sticky=tk.W, padx=5, pady=5)
+        self.retry_failed_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Retry Failed Only", variable=self.retry_failed_var).grid(row=5, column=2, sticky=tk.W, padx=5, pady=5)
+        
+        # Optional image checks, resizing, conversion and thumbnails
+        self.postprocess_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Post-Process Images", variable=self.postprocess_var).grid(row=6, column=0, sticky=tk.W, padx=5, pady=5)
+        self.strip_exif_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Strip Metadata", variable=self.strip_exif_var).grid(row=6, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(parent, text="Convert Copies To:").grid(row=6, column=2, sticky=tk.E, padx=5, pady=5)
+        self.convert_var = tk.StringVar(value="keep")
+        convert_combo = ttk.Combobox(parent, textvariable=self.convert_var, width=7, state="readonly")
+        convert_combo['values'] = ("keep", "webp", "jpeg", "png")
+        convert_combo.grid(row=6, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(parent, text="Max Size (px):").grid(row=7, column=0, sticky=tk.W, padx=5, pady=5)
+        self.max_size_var = tk.StringVar(value="")
+        ttk.Entry(parent, textvariable=self.max_size_var, width=7).grid(row=7, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(parent, text="Thumbnail Size (px):").grid(row=7, column=2, sticky=tk.E, padx=5, pady=5)
+        self.thumbnail_var = tk.StringVar(value="")
+        ttk.Entry(parent, textvariable=self.thumbnail_var, width=7).grid(row=7, column=3, sticky=tk.W, padx=5, pady=5)
+        
         # Console output
-        ttk.Label(parent, text="Console Output:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(parent, text="Console Output:").grid(row=8, column=0, sticky=tk.W, padx=5, pady=5)
         self.console = tk.Text(parent, height=15, width=70, wrap=tk.WORD)
-        self.console.grid(row=4, column=0, columnspan=4, sticky=tk.W+tk.E+tk.N+tk.S, padx=5, pady=5)
+        self.console.grid(row=9, column=0, columnspan=4, sticky=tk.W+tk.E+tk.N+tk.S, padx=5, pady=5)
         
         # Add scrollbar to console
         scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.console.yview)
-        scrollbar.grid(row=4, column=4, sticky=tk.N+tk.S)
+        scrollbar.grid(row=9, column=4, sticky=tk.N+tk.S)
         self.console.config(yscrollcommand=scrollbar.set)
         
         # Buttons
         button_frame = ttk.Frame(parent)
-        button_frame.grid(row=5, column=0, columnspan=4, pady=10)
+        button_frame.grid(row=10, column=0, columnspan=4, pady=10)
         
         ttk.Button(button_frame, text="Start Download", command=self.on_start_downloading).pack(side=tk.LEFT, padx=5)
+        self.pause_button = ttk.Button(button_frame, text="Pause", command=self.toggle_pause)
+        self.pause_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Stop", command=self.stop).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Clear Console", command=self.clear_console).pack(side=tk.LEFT, padx=5)
         
         # Make the download console expandable
-        parent.grid_rowconfigure(4, weight=1)
+        parent.grid_rowconfigure(9, weight=1)
         parent.grid_columnconfigure(1, weight=1)
     
     def browse_json_file(self):
         file_path = filedialog.askopenfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"), ("JSON Lines files", "*.jsonl *.jsonl.gz"),
+                       ("SQLite databases", "*.sqlite *.sqlite3 *.db"), ("Parquet/Arrow files", "*.parquet *.arrow *.feather"),
+                       ("All files", "*.*")]
         )
         if file_path:
             self.json_file_entry.delete(0, tk.END)
@@ -67,11 +132,48 @@ class DownloaderTab:
             self.output_folder_entry.delete(0, tk.END)
             self.output_folder_entry.insert(0, folder_path)
             
+    def get_download_options(self):
+        return {
+            "max_workers": int(self.workers_var.get()),
+            "resume": self.resume_var.get(),
+            "revalidate": self.revalidate_var.get(),
+            "dedupe": self.dedupe_var.get(),
+            # Saved next to the download manifest
+            "metrics_file": os.path.normpath(self.output_folder_entry.get()) + ".metrics.json"
+            if self.save_metrics_var.get() else None,
+            "http_cache": self.get_cache_settings(),
+            "postprocess": self.get_postprocess_settings(),
+            "engine": "async" if self.async_engine_var.get() else "threads",
+            "retry": {"max_retries": int(self.max_retries_var.get())},
+            "retry_failed": self.retry_failed_var.get()
+        }
+        
+    def get_cache_settings(self):
+        # A blank TTL honors the servers' Cache-Control/ETag headers
+        if not self.use_cache_var.get():
+            return None
+        ttl = self.cache_ttl_var.get().strip()
+        return {"ttl": float(ttl) if ttl else None}
+        
+    def get_postprocess_settings(self):
+        # Blank sizes mean no resized copy or thumbnail; originals are never modified
+        if not self.postprocess_var.get():
+            return None
+        max_size = self.max_size_var.get().strip()
+        thumbnail = self.thumbnail_var.get().strip()
+        return {
+            "convert": None if self.convert_var.get() == "keep" else self.convert_var.get(),
+            "max_size": int(max_size) if max_size else None,
+            "thumbnail": int(thumbnail) if thumbnail else None,
+            "strip_exif": self.strip_exif_var.get()
+        }
+            
     def on_start_downloading(self):
         # Get input values
         json_file = self.json_file_entry.get().strip()
         output_folder = self.output_folder_entry.get().strip()
         delay = float(self.delay_var.get())
+        options = self.get_download_options()
         
         # Validate inputs
         if not json_file:
@@ -82,10 +184,16 @@ class DownloaderTab:
             tk.messagebox.showerror("Error", "Output folder is required")
             return
             
+        if options["max_workers"] < 1:
+            tk.messagebox.showerror("Error", "Concurrent downloads must be at least 1")
+            return
+            
         # Call the callback function
-        self.start_downloading(json_file, output_folder, delay)
+        self.start_downloading(json_file, output_folder, delay, options)
+        
+    def set_paused(self, paused):
+        self.pause_button.config(text="Resume" if paused else "Pause")
         
-    def log(self, message):
-        self.console.insert(tk.END, message + "\n")
-        self.console.see(tk.END)
-        self.parent.update_idletasks()
\ No newline at end of file
+    def log_lines(self, lines):
+        # Called on the main thread with a batch of lines from the event bus
+        append_console_lines(self.console, lines)
\ No newline at end of file
@@ -0,0 +1,63 @@
+import queue
+import tkinter as tk
+
+# How often the Tk main loop drains the queue, and how many events one drain may handle
+DRAIN_INTERVAL_MS = 100
+MAX_EVENTS_PER_DRAIN = 5000
+
+# Consoles keep only the most recent lines so memory stays flat on huge runs
+MAX_CONSOLE_LINES = 5000
+
+def append_console_lines(console, lines, max_lines=MAX_CONSOLE_LINES):
+    # One insert per batch, then trim the oldest lines (ring buffer)
+    lines = lines[-max_lines:]
+    console.insert(tk.END, "\n".join(lines) + "\n")
+    line_count = int(console.index("end-1c").split(".")[0]) - 1
+    if line_count > max_lines:
+        console.delete("1.0", f"{line_count - max_lines + 1}.0")
+    console.see(tk.END)
+
+class UIEventBus:
+    # Worker threads only put events on a queue; the Tk main loop drains it in
+    # batches on a timer, so widgets are touched from the main thread only.
+    # Log lines are grouped per console and the status keeps only the latest value.
+    def __init__(self, root, on_status, interval_ms=DRAIN_INTERVAL_MS):
+        self.root = root
+        self.on_status = on_status
+        self.interval_ms = interval_ms
+        self.log_handlers = {}
+        self.queue = queue.SimpleQueue()
+        self.root.after(self.interval_ms, self._drain)
+
+    def add_log_handler(self, target, handler):
+        # handler(lines) receives every line logged to `target` since the last drain
+        self.log_handlers[target] = handler
+
+    def log(self, target, message):
+        self.queue.put(("log", (target, message)))
+
+    def status(self, message):
+        self.queue.put(("status", message))
+
+    def _drain(self):
+        logs = {}
+        status = None
+
+        for _ in range(MAX_EVENTS_PER_DRAIN):
+            try:
+                kind, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                target, message = payload
+                logs.setdefault(target, []).append(message)
+            elif kind == "status":
+                status = payload
+
+        try:
+            for target, lines in logs.items():
+                self.log_handlers[target](lines)
+            if status is not None:
+                self.on_status(status)
+        finally:
+            self.root.after(self.interval_ms, self._drain)
@@ -1,13 +1,22 @@
 import tkinter as tk
-from tkinter import ttk, filedialog
+from tkinter import ttk, filedialog, simpledialog
+
+from app.core.record_io import OUTPUT_FORMATS, format_from_extension
+from app.core.scraper import BACKENDS
+from app.core.browser_profiles import BROWSER_PROFILES
+from app.core.waits import WAIT_STRATEGIES
+from app.core.presets import load_presets, save_preset
+from app.ui.event_bus import append_console_lines
 
 class ScraperTab:
-    def __init__(self, parent, start_scraping_callback, clear_console_callback):
+    def __init__(self, parent, start_scraping_callback, clear_console_callback, stop_callback, pause_callback):
         self.parent = parent
         self.start_scraping = start_scraping_callback
         self.clear_console = clear_console_callback
+        self.stop = stop_callback
+        self.toggle_pause = pause_callback
         
-        # Website URL
+        # Website URL (several URLs separated by spaces, or a URL containing {page}, start a crawl)
         ttk.Label(parent, text="Website URL:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
         self.url_entry = ttk.Entry(parent, width=60)
         self.url_entry.grid(row=0, column=1, columnspan=3, sticky=tk.W+tk.E, padx=5, pady=5)
@@ -24,6 +33,13 @@ class ScraperTab:
         selector_dropdown = ttk.Combobox(parent, textvariable=self.selector_type, values=selector_types)
         selector_dropdown.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
         
+        # Browser Profile ("lean" skips images, media, fonts and analytics)
+        ttk.Label(parent, text="Browser Profile:").grid(row=2, column=2, sticky=tk.E, padx=5, pady=5)
+        self.browser_profile = tk.StringVar(value="standard")
+        profile_dropdown = ttk.Combobox(parent, textvariable=self.browser_profile, values=list(BROWSER_PROFILES),
+                                        state="readonly", width=10)
+        profile_dropdown.grid(row=2, column=3, sticky=tk.W, padx=5, pady=5)
+        
         # Content Type
         ttk.Label(parent, text="Content Type:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
         self.content_type = tk.StringVar(value="image")
@@ -32,6 +48,14 @@ class ScraperTab:
         content_dropdown.grid(row=3, column=1, sticky=tk.W, padx=5, pady=5)
         content_dropdown.bind("<<ComboboxSelected>>", self.toggle_extraction_fields)
         
+        # Named extraction presets
+        self.preset = tk.StringVar(value="")
+        self.preset_dropdown = ttk.Combobox(parent, textvariable=self.preset, state="readonly", width=18)
+        self.preset_dropdown.grid(row=3, column=2, sticky=tk.E, padx=5, pady=5)
+        self.preset_dropdown.bind("<<ComboboxSelected>>", self.apply_preset)
+        ttk.Button(parent, text="Save Preset", command=self.on_save_preset).grid(row=3, column=3, sticky=tk.W, padx=5, pady=5)
+        self.refresh_presets()
+        
         # Frame for extraction fields
         self.extraction_frame = ttk.LabelFrame(parent, text="Extraction Configuration")
         self.extraction_frame.grid(row=4, column=0, columnspan=4, sticky=tk.W+tk.E, padx=5, pady=5)
@@ -45,35 +69,105 @@ class ScraperTab:
         self.output_file_entry.grid(row=5, column=1, columnspan=2, sticky=tk.W+tk.E, padx=5, pady=5)
         ttk.Button(parent, text="Browse", command=self.browse_save_location).grid(row=5, column=3, padx=5, pady=5)
         
+        # Output format
+        ttk.Label(parent, text="Output Format:").grid(row=6, column=0, sticky=tk.W, padx=5, pady=5)
+        self.output_format = tk.StringVar(value="json")
+        format_dropdown = ttk.Combobox(parent, textvariable=self.output_format, values=OUTPUT_FORMATS)
+        format_dropdown.grid(row=6, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        # Scraping backend
+        ttk.Label(parent, text="Backend:").grid(row=6, column=2, sticky=tk.E, padx=5, pady=5)
+        self.backend = tk.StringVar(value="selenium")
+        backend_dropdown = ttk.Combobox(parent, textvariable=self.backend, values=BACKENDS, width=10)
+        backend_dropdown.grid(row=6, column=3, sticky=tk.W, padx=5, pady=5)
+        
         # Wait time
-        ttk.Label(parent, text="Wait Time (seconds):").grid(row=6, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(parent, text="Wait Time (seconds):").grid(row=7, column=0, sticky=tk.W, padx=5, pady=5)
         self.wait_time_var = tk.StringVar(value="5")
         wait_time_entry = ttk.Entry(parent, textvariable=self.wait_time_var, width=5)
-        wait_time_entry.grid(row=6, column=1, sticky=tk.W, padx=5, pady=5)
+        wait_time_entry.grid(row=7, column=1, sticky=tk.W, padx=5, pady=5)
         
         # Headless mode
         self.headless_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(parent, text="Headless Browser", variable=self.headless_var).grid(row=6, column=2, padx=5, pady=5)
+        ttk.Checkbutton(parent, text="Headless Browser", variable=self.headless_var).grid(row=7, column=2, padx=5, pady=5)
+        
+        # Timing/throughput metrics, saved next to the output file
+        self.save_metrics_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Save Metrics", variable=self.save_metrics_var).grid(row=7, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        # Wait strategy; anything but "fixed" uses the wait time as a timeout
+        ttk.Label(parent, text="Wait Strategy:").grid(row=8, column=0, sticky=tk.W, padx=5, pady=5)
+        self.wait_strategy = tk.StringVar(value="fixed")
+        wait_dropdown = ttk.Combobox(parent, textvariable=self.wait_strategy, values=WAIT_STRATEGIES)
+        wait_dropdown.grid(row=8, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(parent, text="Min Elements:").grid(row=8, column=2, sticky=tk.E, padx=5, pady=5)
+        self.wait_min_count_var = tk.StringVar(value="1")
+        ttk.Entry(parent, textvariable=self.wait_min_count_var, width=5).grid(row=8, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        # Auto-scroll for infinite-scroll galleries
+        ttk.Label(parent, text="Scroll Rounds (0 = off):").grid(row=9, column=0, sticky=tk.W, padx=5, pady=5)
+        self.scroll_rounds_var = tk.StringVar(value="0")
+        ttk.Entry(parent, textvariable=self.scroll_rounds_var, width=5).grid(row=9, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(parent, text="Max Items:").grid(row=9, column=2, sticky=tk.E, padx=5, pady=5)
+        self.max_items_var = tk.StringVar(value="")
+        ttk.Entry(parent, textvariable=self.max_items_var, width=7).grid(row=9, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        # Opt-in disk cache shared by the static backend and the downloader
+        self.use_cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Use HTTP Cache", variable=self.use_cache_var).grid(row=10, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        # Keep a change index and write only new/changed/removed items to a .delta file
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Incremental (Changes Only)", variable=self.incremental_var).grid(row=10, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(parent, text="Cache TTL Override (s):").grid(row=10, column=2, sticky=tk.E, padx=5, pady=5)
+        self.cache_ttl_var = tk.StringVar(value="")
+        ttk.Entry(parent, textvariable=self.cache_ttl_var, width=7).grid(row=10, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        # Crawl settings
+        crawl_frame = ttk.LabelFrame(parent, text="Crawl Multiple Pages (optional)")
+        crawl_frame.grid(row=11, column=0, columnspan=4, sticky=tk.W+tk.E, padx=5, pady=5)
+        
+        ttk.Label(crawl_frame, text="Page Range ({page}):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        self.page_range_entry = ttk.Entry(crawl_frame, width=15)
+        self.page_range_entry.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(crawl_frame, text="Next Page Selector:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=5)
+        self.next_page_entry = ttk.Entry(crawl_frame, width=20)
+        self.next_page_entry.grid(row=0, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(crawl_frame, text="Parallel Pages:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        self.crawl_workers_var = tk.StringVar(value="2")
+        ttk.Entry(crawl_frame, textvariable=self.crawl_workers_var, width=5).grid(row=1, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(crawl_frame, text="Max Pages:").grid(row=1, column=2, sticky=tk.W, padx=5, pady=5)
+        self.max_pages_var = tk.StringVar(value="50")
+        ttk.Entry(crawl_frame, textvariable=self.max_pages_var, width=5).grid(row=1, column=3, sticky=tk.W, padx=5, pady=5)
         
         # Console output
-        ttk.Label(parent, text="Console Output:").grid(row=7, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(parent, text="Console Output:").grid(row=12, column=0, sticky=tk.W, padx=5, pady=5)
         self.console = tk.Text(parent, height=10, width=70, wrap=tk.WORD)
-        self.console.grid(row=8, column=0, columnspan=4, sticky=tk.W+tk.E+tk.N+tk.S, padx=5, pady=5)
+        self.console.grid(row=13, column=0, columnspan=4, sticky=tk.W+tk.E+tk.N+tk.S, padx=5, pady=5)
         
         # Add scrollbar to console
         scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.console.yview)
-        scrollbar.grid(row=8, column=4, sticky=tk.N+tk.S)
+        scrollbar.grid(row=13, column=4, sticky=tk.N+tk.S)
         self.console.config(yscrollcommand=scrollbar.set)
         
         # Buttons
         button_frame = ttk.Frame(parent)
-        button_frame.grid(row=9, column=0, columnspan=4, pady=10)
+        button_frame.grid(row=14, column=0, columnspan=4, pady=10)
         
         ttk.Button(button_frame, text="Start Scraping", command=self.on_start_scraping).pack(side=tk.LEFT, padx=5)
+        self.pause_button = ttk.Button(button_frame, text="Pause", command=self.toggle_pause)
+        self.pause_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Stop", command=self.stop).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Clear Console", command=self.clear_console).pack(side=tk.LEFT, padx=5)
         
         # Make the console expandable
-        parent.grid_rowconfigure(8, weight=1)
+        parent.grid_rowconfigure(13, weight=1)
         parent.grid_columnconfigure(1, weight=1)
     
     def setup_image_extraction_fields(self):
@@ -97,6 +191,10 @@ class ScraperTab:
         self.img_selector_entry.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
         self.img_selector_entry.insert(0, "img")
         
+        self.resolve_lazy_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.extraction_frame, text="Resolve Lazy-Loaded Images (data-src/srcset)",
+                        variable=self.resolve_lazy_var).grid(row=3, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        
     def setup_text_extraction_fields(self):
         # Clear frame
         for widget in self.extraction_frame.winfo_children():
@@ -122,14 +220,57 @@ class ScraperTab:
         else:
             self.setup_text_extraction_fields()
             
+    def refresh_presets(self):
+        try:
+            self.presets = load_presets()
+        except Exception as e:
+            self.presets = {}
+            tk.messagebox.showerror("Error", f"Could not read presets: {str(e)}")
+        self.preset_dropdown["values"] = sorted(self.presets)
+        
+    def apply_preset(self, event=None):
+        preset = self.presets.get(self.preset.get())
+        if not preset:
+            return
+        self.content_type.set(preset["content_type"])
+        self.toggle_extraction_fields()
+        
+        config = preset.get("extraction_config", {})
+        if preset["content_type"] == "image":
+            entries = {"id_attr": self.id_attr_entry, "title_selector": self.title_selector_entry,
+                       "img_selector": self.img_selector_entry}
+            self.resolve_lazy_var.set(bool(config.get("resolve_lazy")))
+        else:
+            entries = {"id_selector": self.text_id_selector, "title_selector": self.text_title_selector,
+                       "content_selector": self.text_content_selector}
+        for key, entry in entries.items():
+            entry.delete(0, tk.END)
+            entry.insert(0, config.get(key, ""))
+            
+    def on_save_preset(self):
+        name = simpledialog.askstring("Save Preset", "Preset name:", initialvalue=self.preset.get())
+        if not name:
+            return
+        try:
+            save_preset(name, self.content_type.get(), self.get_extraction_config())
+        except Exception as e:
+            tk.messagebox.showerror("Error", f"Could not save preset: {str(e)}")
+            return
+        self.refresh_presets()
+        self.preset.set(name)
+        
     def browse_save_location(self):
         file_path = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"), ("JSON Lines files", "*.jsonl *.jsonl.gz"),
+                       ("SQLite databases", "*.sqlite *.sqlite3 *.db"), ("Parquet/Arrow files", "*.parquet *.arrow *.feather"),
+                       ("All files", "*.*")]
         )
         if file_path:
             self.output_file_entry.delete(0, tk.END)
             self.output_file_entry.insert(0, file_path)
+            # Follow the chosen extension (.jsonl.gz, .sqlite, .parquet, ...)
+            self.output_format.set(format_from_extension(file_path))
             
     def get_extraction_config(self):
         config = {}
@@ -139,7 +280,8 @@ class ScraperTab:
             config = {
                 "id_attr": self.id_attr_entry.get(),
                 "title_selector": self.title_selector_entry.get(),
-                "img_selector": self.img_selector_entry.get()
+                "img_selector": self.img_selector_entry.get(),
+                "resolve_lazy": self.resolve_lazy_var.get()
             }
         else:
             config = {
@@ -150,6 +292,45 @@ class ScraperTab:
             
         return config
             
+    def get_crawl_config(self):
+        # Returns None for a plain single-page scrape
+        urls = self.url_entry.get().split()
+        page_range = self.page_range_entry.get().strip()
+        next_page_selector = self.next_page_entry.get().strip()
+        
+        if len(urls) <= 1 and not page_range and not next_page_selector:
+            return None
+            
+        return {
+            "urls": urls,
+            "page_range": page_range or None,
+            "next_page_selector": next_page_selector or None,
+            "max_pages": int(self.max_pages_var.get()),
+            "workers": int(self.crawl_workers_var.get())
+        }
+        
+    def get_scrape_options(self):
+        return {
+            "output_format": self.output_format.get(),
+            "backend": self.backend.get(),
+            "wait_strategy": self.wait_strategy.get(),
+            "wait_min_count": int(self.wait_min_count_var.get()),
+            "scroll_rounds": int(self.scroll_rounds_var.get() or 0),
+            "max_items": int(self.max_items_var.get()) if self.max_items_var.get().strip() else None,
+            "metrics_file": self.output_file_entry.get() + ".metrics.json" if self.save_metrics_var.get() else None,
+            "http_cache": self.get_cache_settings(),
+            "incremental": self.incremental_var.get(),
+            "browser_profile": self.browser_profile.get(),
+            "crawl": self.get_crawl_config()
+        }
+        
+    def get_cache_settings(self):
+        # A blank TTL honors the servers' Cache-Control/ETag headers
+        if not self.use_cache_var.get():
+            return None
+        ttl = self.cache_ttl_var.get().strip()
+        return {"ttl": float(ttl) if ttl else None}
+            
     def on_start_scraping(self):
         # Get all input values
         url = self.url_entry.get().strip()
@@ -160,6 +341,7 @@ class ScraperTab:
         wait_time = int(self.wait_time_var.get())
         headless = self.headless_var.get()
         extraction_config = self.get_extraction_config()
+        options = self.get_scrape_options()
         
         # Validate inputs
         if not url:
@@ -175,9 +357,12 @@ class ScraperTab:
             return
             
         # Call the callback function
-        self.start_scraping(url, selector, selector_type, content_type, output_file, wait_time, headless, extraction_config)
+        self.start_scraping(url, selector, selector_type, content_type, output_file, wait_time, headless, extraction_config,
+                            options)
+        
+    def set_paused(self, paused):
+        self.pause_button.config(text="Resume" if paused else "Pause")
         
-    def log(self, message):
-        self.console.insert(tk.END, message + "\n")
-        self.console.see(tk.END)
-        self.parent.update_idletasks()
\ No newline at end of file
+    def log_lines(self, lines):
+        # Called on the main thread with a batch of lines from the event bus
+        append_console_lines(self.console, lines)
\ No newline at end of file
@@ -5,8 +5,15 @@ import os
 
 from app.ui.scraper_tab import ScraperTab
 from app.ui.downloader_tab import DownloaderTab
-from app.core.scraper import WebScraper
-from app.core.downloader import ImageDownloader
+from app.ui.event_bus import UIEventBus
+from app.jobs import normalize_job, download_folder_for
+from app.job_queue import JobQueue, FINAL_STATUSES
+from app.worker import JobWorker
+
+# Scrapes and downloads started here are submitted to the local job queue and
+# run by a worker process; the GUI only watches their progress and logs. When
+# no worker is running, one is started inside the app.
+WATCH_INTERVAL_MS = 500
 
 class WebScraperApp:
     def __init__(self, root):
@@ -50,78 +57,176 @@ class WebScraperApp:
         self.scraper_tab = ScraperTab(
             scraper_tab, 
             self.start_scraping, 
-            lambda: self.scraper_tab.console.delete(1.0, tk.END)
+            lambda: self.scraper_tab.console.delete(1.0, tk.END),
+            lambda: self.stop_job("scraper"),
+            lambda: self.toggle_pause("scraper")
         )
         
         self.downloader_tab = DownloaderTab(
             downloader_tab, 
             self.start_downloading, 
-            lambda: self.downloader_tab.console.delete(1.0, tk.END)
-        )
-        
-        # Initialize core components
-        self.scraper = WebScraper(
-            self.log_scraper, 
-            self.update_progress, 
-            self.update_status
-        )
-        
-        self.downloader = ImageDownloader(
-            self.log_downloader, 
-            self.update_progress, 
-            self.update_status
+            lambda: self.downloader_tab.console.delete(1.0, tk.END),
+            lambda: self.stop_job("downloader"),
+            lambda: self.toggle_pause("downloader")
         )
+        self.tabs = {"scraper": self.scraper_tab, "downloader": self.downloader_tab}
+        
+        # Worker threads report through the event bus, which the main loop drains
+        self.events = UIEventBus(root, self.status_var.set)
+        self.events.add_log_handler("scraper", self.scraper_tab.log_lines)
+        self.events.add_log_handler("downloader", self.downloader_tab.log_lines)
+        
+        # Jobs go through the queue; watched jobs map to the console showing them
+        self.queue = JobQueue()
+        self.worker = None
+        self.worker_thread = None
+        self.watched = {}
+        # The job each tab's Stop and Pause buttons act on
+        self.active = {"scraper": None, "downloader": None}
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(WATCH_INTERVAL_MS, self._watch_jobs)
     
+    # Runs on the embedded worker's thread, so it only queues an event for the main loop
     def update_status(self, message):
-        self.status_var.set(message)
-        self.root.update_idletasks()
-        
-    def update_progress(self, value):
-        self.progress_var.set(value)
-        self.root.update_idletasks()
-        
-    def log_scraper(self, message):
-        self.scraper_tab.log(message)
-        
-    def log_downloader(self, message):
-        self.downloader_tab.log(message)
+        self.events.status(message)
     
-    def start_scraping(self, url, selector, selector_type, content_type, output_file, wait_time, headless, extraction_config):
-        # Start scraping in a separate thread
-        threading.Thread(target=self._scrape_thread, args=(
-            url, selector, selector_type, content_type, output_file, 
-            wait_time, headless, extraction_config
-        ), daemon=True).start()
-        
-    def _scrape_thread(self, url, selector, selector_type, content_type, output_file, wait_time, headless, extraction_config):
-        json_file, data = self.scraper.scrape(
-            url, selector, selector_type, content_type, output_file, 
-            wait_time, headless, extraction_config
-        )
-        
-        if json_file and data:
+    def start_scraping(self, url, selector, selector_type, content_type, output_file, wait_time, headless, extraction_config,
+                       options):
+        job = dict(options, name="scrape", url=url, selector=selector, selector_type=selector_type,
+                   content_type=content_type, output_file=output_file, wait_time=wait_time, headless=headless,
+                   extraction_config=extraction_config)
+        # Crawls are flattened into the job fields the crawler takes
+        crawl = job.pop("crawl", None)
+        if crawl:
+            job.update(crawl)
+        self._submit(job, "scraper")
+        
+    def start_downloading(self, json_file, output_folder, delay, options):
+        job = dict(options, kind="download", name="download", json_file=json_file, output_folder=output_folder,
+                   delay=delay)
+        self._submit(job, "downloader")
+        
+    def _submit(self, job, console):
+        try:
+            # Paths are made absolute, since the worker may run in another directory
+            job = normalize_job(job, os.getcwd())
+            job_id = self.queue.submit(job)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not queue the job: {str(e)}")
+            return
+        self.watched[job_id] = {"console": console, "name": job["name"], "offset": 0, "partial": b""}
+        self.active[console] = job_id
+        self.tabs[console].set_paused(False)
+        self.update_status(f"Job {job_id} queued")
+        self._ensure_worker()
+        
+    def stop_job(self, console):
+        # The job stops at its next check; finished work and partial files are kept
+        job_id = self.active[console]
+        if job_id is None:
+            self.status_var.set("Nothing to stop")
+            return
+        status = self.queue.cancel(job_id)
+        self.status_var.set(f"Stopping job {job_id}..." if status == "running" else f"Job {job_id} {status}")
+        
+    def toggle_pause(self, console):
+        job_id = self.active[console]
+        job = self.queue.get(job_id) if job_id is not None else None
+        if job is None or job["status"] in FINAL_STATUSES:
+            self.status_var.set("Nothing to pause")
+            return
+        paused = not job["paused"]
+        self.queue.set_paused(job_id, paused)
+        self.tabs[console].set_paused(paused)
+        self.status_var.set(f"Job {job_id} {'paused' if paused else 'resumed'}")
+        
+    def _ensure_worker(self):
+        # Start a worker inside the app unless one is already serving the queue
+        if self.worker_thread and self.worker_thread.is_alive():
+            return
+        if self.queue.live_workers():
+            return
+        self.worker = JobWorker(self.queue.path, logger=self.update_status)
+        self.worker_thread = threading.Thread(target=self.worker.run, daemon=True)
+        self.worker_thread.start()
+        
+    def _watch_jobs(self):
+        # Runs on the main loop: tail each watched job's log into its console
+        # and show the latest progress and status of the queue row
+        try:
+            for job_id, watch in list(self.watched.items()):
+                job = self.queue.get(job_id)
+                if job is None:
+                    del self.watched[job_id]
+                    continue
+                self._tail_log(job, watch)
+                if job["status"] == "running":
+                    self.progress_var.set(job["progress"] or 0)
+                    if job["message"]:
+                        self.status_var.set(job["message"])
+                elif job["status"] in FINAL_STATUSES:
+                    del self.watched[job_id]
+                    self._job_finished(job, watch)
+        except Exception as e:
+            self.status_var.set(f"Could not read the job queue: {str(e)}")
+        finally:
+            self.root.after(WATCH_INTERVAL_MS, self._watch_jobs)
+            
+    def _tail_log(self, job, watch):
+        try:
+            with open(job["log_file"], "rb") as f:
+                f.seek(watch["offset"])
+                data = f.read()
+        except FileNotFoundError:
+            return
+        watch["offset"] += len(data)
+        data = watch["partial"] + data
+        complete, _, watch["partial"] = data.rpartition(b"\n")
+        if not complete:
+            return
+        # The job log prefixes every line with the job name, which the console does not need
+        prefix = f"[{watch['name']}] "
+        for line in complete.decode("utf-8", errors="replace").split("\n"):
+            self.events.log(watch["console"], line[len(prefix):] if line.startswith(prefix) else line)
+        
+    def _job_finished(self, job, watch):
+        summary = job["summary"] or {}
+        if self.active[watch["console"]] == job["id"]:
+            self.active[watch["console"]] = None
+            self.tabs[watch["console"]].set_paused(False)
+        self.progress_var.set(100 if job["status"] != "cancelled" else 0)
+        self.status_var.set(f"Job {job['id']} {job['status']}")
+        if summary.get("error"):
+            self.events.log(watch["console"], f"Job {job['id']} {job['status']}: {summary['error']}")
+        
+        output_file = summary.get("output_file")
+        json_file = output_file
+        items = summary.get("items")
+        delta = summary.get("delta")
+        if json_file and delta:
+            # Incremental scrapes hand only their changes to the downloader
+            json_file = delta["file"]
+            items = delta["added"] + delta["changed"]
+        if watch["console"] == "scraper" and json_file and items:
             # Auto-fill the downloader tab fields
-            self.root.after(0, lambda: self._update_downloader_fields(json_file))
+            self._update_downloader_fields(json_file, output_file)
             
             # Switch to downloader tab if we're extracting images
-            if content_type == "image":
-                self.root.after(0, lambda: self.notebook.select(1))  # Switch to second tab
+            if job["spec"].get("content_type") == "image":
+                self.notebook.select(1)  # Switch to second tab
                 
-    def _update_downloader_fields(self, json_file):
+    def _update_downloader_fields(self, json_file, output_file):
         self.downloader_tab.json_file_entry.delete(0, tk.END)
         self.downloader_tab.json_file_entry.insert(0, json_file)
         
-        # Auto-set output folder based on JSON filename
-        folder_name = os.path.splitext(os.path.basename(json_file))[0]
-        folder_path = os.path.join(os.path.dirname(json_file), folder_name)
+        # Auto-set output folder based on the full output's filename, the same
+        # folder (and manifest) a job's own download uses
         self.downloader_tab.output_folder_entry.delete(0, tk.END)
-        self.downloader_tab.output_folder_entry.insert(0, folder_path)
+        self.downloader_tab.output_folder_entry.insert(0, download_folder_for(output_file))
     
-    def start_downloading(self, json_file, output_folder, delay):
-        # Start downloading in a separate thread
-        threading.Thread(target=self._download_thread, args=(
-            json_file, output_folder, delay
-        ), daemon=True).start()
-        
-    def _download_thread(self, json_file, output_folder, delay):
-        self.downloader.download(json_file, output_folder, delay)
\ No newline at end of file
+    def on_close(self):
+        # Jobs of the embedded worker go back in the queue for the next worker
+        if self.worker:
+            self.worker.stop()
+            self.worker_thread.join(timeout=10)
+        self.root.destroy()
@@ -0,0 +1,299 @@
+import os
+import sys
+import time
+import uuid
+import signal
+import socket
+import threading
+import multiprocessing
+
+from app.job_queue import JobQueue, QUEUE_FILE, STATUS_FAILED, log_path_for
+from app.jobs import run_job
+from app.core.cancellation import CancelToken
+from app.core.driver_pool import close_shared_pools
+
+# Long-running worker that drains the job queue. Claimed jobs run in job
+# processes (a browser or a download run never shares an interpreter with
+# another running job), write their log to the job's log file and their
+# progress to the queue, and store their summary when they end. A job process
+# that finished a job waits for the next one, so the warm browsers of its
+# driver pool start the next scrape without a browser launch. The worker itself
+# only claims, watches and reaps. Stop and pause requests are picked up by the
+# job process, which winds down cooperatively; the worker only terminates it
+# if it does not stop within CANCEL_GRACE seconds.
+
+# Seconds between two progress writes of one job
+PROGRESS_INTERVAL = 0.5
+
+# Seconds a terminated job process gets to exit before it is killed
+TERMINATE_TIMEOUT = 5.0
+
+# Seconds between two looks of a job process at its stop/pause flags
+CONTROL_INTERVAL = 0.5
+
+# Seconds a cancelled job gets to stop cooperatively before it is terminated
+CANCEL_GRACE = 30.0
+
+# Jobs a job process runs before it is replaced by a fresh one
+JOBS_PER_PROCESS = 20
+
+# Seconds an idle job process is kept for the next job
+PROCESS_IDLE_TIMEOUT = 300.0
+
+class _QueueReporter:
+    # progress/status callbacks of a job process: throttled writes to its queue row
+    def __init__(self, queue, job_id, interval=PROGRESS_INTERVAL):
+        self.queue = queue
+        self.job_id = job_id
+        self.interval = interval
+        self._last_write = 0.0
+        self._progress = None
+        self._message = None
+        self._written_message = None
+
+    def progress(self, value):
+        self._progress = value
+        self._write(value >= 100)
+
+    def status(self, message):
+        self._message = message
+        self._write(False)
+
+    def _write(self, force):
+        now = time.monotonic()
+        if force or now - self._last_write >= self.interval:
+            self._last_write = now
+            # Only new messages are written, so a "Paused" set by the GUI stays visible
+            message = self._message if self._message != self._written_message else None
+            self._written_message = self._message
+            self.queue.update_progress(self.job_id, self._progress, message)
+
+def _follow_controls(queue, job_id, token, done):
+    # Mirrors the job's stop/pause flags from the queue onto its cancel token
+    while not done.wait(CONTROL_INTERVAL):
+        try:
+            cancel, paused = queue.control(job_id)
+        except Exception:
+            continue
+        if cancel:
+            token.cancel()
+            return
+        if paused:
+            token.pause()
+        else:
+            token.resume()
+
+def _run_queued_job(queue_path, job_id, job):
+    log_file = log_path_for(job_id, queue_path)
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    stderr = sys.stderr
+    sys.stderr = open(log_file, "a", encoding="utf-8", buffering=1)
+    queue = JobQueue(queue_path)
+    reporter = _QueueReporter(queue, job_id)
+    token = CancelToken()
+    done = threading.Event()
+    threading.Thread(target=_follow_controls, args=(queue, job_id, token, done), daemon=True).start()
+    try:
+        summary = run_job(job, reporter.progress, reporter.status, token)
+        summary["job_id"] = job_id
+        queue.update_progress(job_id, message=f"Finished: {summary['status']}")
+        queue.finish(job_id, summary)
+    finally:
+        done.set()
+        queue.close()
+        sys.stderr.close()
+        sys.stderr = stderr
+
+def _serve_jobs(queue_path, connection):
+    # Entry point of a job process: runs the (job_id, job) pairs the worker
+    # sends, one at a time, until it sends None
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            job_id, job = message
+            _run_queued_job(queue_path, job_id, job)
+            connection.send(job_id)
+    except EOFError:
+        pass
+    finally:
+        # Also on terminate(), so stopped jobs do not leave browsers behind
+        close_shared_pools()
+
+class _JobProcess:
+    # A job process as seen by the worker
+    def __init__(self, context, queue_path):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_serve_jobs, args=(queue_path, child_connection))
+        self.process.start()
+        child_connection.close()
+        self.jobs = 0
+        self.idle_since = None
+
+    def run(self, job_id, job):
+        self.jobs += 1
+        self.idle_since = None
+        self.connection.send((job_id, job))
+
+    def finished(self):
+        # True once the running job has stored its summary
+        try:
+            return self.connection.poll() and self.connection.recv() is not None
+        except (EOFError, OSError):
+            return False
+
+    def retire(self):
+        # Asks an idle job process to close its browsers and exit
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.connection.close()
+
+class JobWorker:
+    # max_jobs caps the jobs running at once; kind_limits optionally caps a job
+    # kind, e.g. {"scrape": 1} to keep a single browser alongside downloads
+    def __init__(self, queue_path=QUEUE_FILE, max_jobs=2, kind_limits=None, poll_interval=1.0, logger=None):
+        self.queue_path = queue_path
+        self.max_jobs = max(1, int(max_jobs))
+        self.kind_limits = dict(kind_limits or {})
+        self.poll_interval = poll_interval
+        self.logger = logger or (lambda message: print(message, file=sys.stderr, flush=True))
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = {}
+        self._idle = []
+        self._retired = []
+        self._cancelling = {}
+        self._stop = threading.Event()
+
+    def stop(self):
+        # Safe to call from another thread or a signal handler
+        self._stop.set()
+
+    def run(self, until_idle=False):
+        # Runs until stop() is called, or with until_idle until the queue is empty
+        queue = JobQueue(self.queue_path)
+        queue.heartbeat(self.worker_id)
+        requeued = queue.requeue_orphans()
+        if requeued:
+            self.logger(f"Requeued {requeued} job(s) left running by a stopped worker")
+        self.logger(f"Worker {self.worker_id} started ({self.max_jobs} job(s) at a time)")
+        try:
+            while not self._stop.is_set():
+                queue.heartbeat(self.worker_id)
+                queue.requeue_orphans()
+                self._reap(queue)
+                self._cancel(queue)
+                self._retire_idle()
+                started = self._start_jobs(queue)
+                if until_idle and not self._processes and not started:
+                    break
+                self._stop.wait(self.poll_interval)
+        finally:
+            self._shutdown(queue)
+            queue.remove_worker(self.worker_id)
+            queue.close()
+            self.logger(f"Worker {self.worker_id} stopped")
+
+    def _start_jobs(self, queue):
+        started = 0
+        while len(self._processes) < self.max_jobs:
+            running = [kind for _, kind in self._processes.values()]
+            full = [kind for kind, limit in self.kind_limits.items() if running.count(kind) >= limit]
+            job = queue.claim(self.worker_id, full)
+            if job is None:
+                break
+            process = self._job_process()
+            process.run(job["id"], job["spec"])
+            self._processes[job["id"]] = (process, job["kind"])
+            self.logger(f"Started job {job['id']} ({job['name']}, {job['kind']})")
+            started += 1
+        return started
+
+    def _job_process(self):
+        # The most recently used idle job process, or a new one
+        while self._idle:
+            process = self._idle.pop()
+            if process.process.is_alive():
+                return process
+        return _JobProcess(self._context, self.queue_path)
+
+    def _reap(self, queue):
+        for job_id, (job_process, kind) in list(self._processes.items()):
+            process = job_process.process
+            if job_process.finished():
+                del self._processes[job_id]
+                if job_process.jobs >= JOBS_PER_PROCESS:
+                    self._retire(job_process)
+                else:
+                    job_process.idle_since = time.monotonic()
+                    self._idle.append(job_process)
+            elif process.is_alive():
+                continue
+            else:
+                process.join()
+                del self._processes[job_id]
+                # finish() only touches running jobs, so this is a no-op when the job stored its summary
+                if process.exitcode != 0 and job_id in self._cancelling:
+                    queue.mark_cancelled(job_id)
+                elif process.exitcode != 0:
+                    queue.finish(job_id, {"job_id": job_id, "status": STATUS_FAILED,
+                                          "error": f"job process exited with code {process.exitcode}"})
+            self._cancelling.pop(job_id, None)
+            job = queue.get(job_id)
+            self.logger(f"Job {job_id} finished: {job['status'] if job else 'unknown'}")
+
+    def _cancel(self, queue):
+        # The job process sees the request itself; give it time to stop cleanly
+        now = time.monotonic()
+        for job_id in queue.cancel_requested(list(self._processes)):
+            if job_id not in self._cancelling:
+                self._cancelling[job_id] = now + CANCEL_GRACE
+                self.logger(f"Job {job_id} stopping")
+            elif now >= self._cancelling[job_id]:
+                job_process, _ = self._processes.pop(job_id)
+                del self._cancelling[job_id]
+                self._terminate(job_process.process)
+                queue.mark_cancelled(job_id)
+                self.logger(f"Job {job_id} did not stop in {CANCEL_GRACE:.0f}s and was terminated")
+
+    def _terminate(self, process):
+        process.terminate()
+        process.join(TERMINATE_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def _retire(self, job_process):
+        job_process.retire()
+        self._retired.append(job_process.process)
+
+    def _retire_idle(self):
+        cutoff = time.monotonic() - PROCESS_IDLE_TIMEOUT
+        for job_process in [process for process in self._idle if process.idle_since <= cutoff]:
+            self._idle.remove(job_process)
+            self._retire(job_process)
+        # Retired processes exit once their browsers are closed
+        for process in [process for process in self._retired if not process.is_alive()]:
+            process.join()
+            self._retired.remove(process)
+
+    def _shutdown(self, queue):
+        # Jobs interrupted by a shutdown go back in the queue for the next worker
+        for job_id, (job_process, _) in list(self._processes.items()):
+            self._terminate(job_process.process)
+            queue.requeue(job_id)
+            self.logger(f"Job {job_id} interrupted and requeued")
+        for job_process in self._idle:
+            self._retire(job_process)
+        for process in self._retired:
+            process.join(TERMINATE_TIMEOUT)
+            if process.is_alive():
+                self._terminate(process)
+        self._processes = {}
+        self._idle = []
+        self._retired = []
+        self._cancelling = {}
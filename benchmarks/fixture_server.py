@@ -0,0 +1,169 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Local HTTP fixture for the benchmarks:
+#   /gallery?items=N&page=P&pages=K  gallery page with N image cards (same markup
+#                                    the scraper tab defaults expect) and a next link
+#   /img/<id>.jpg                    image payload of the configured size and latency
+#   /assets/<name>                   page weight every gallery pulls in like a real
+#                                    site: a web font, an autoplaying clip and an
+#                                    analytics script (see ASSETS)
+# A deterministic share of images fails with the configured status on its
+# first attempts, so retry and backoff paths are exercised too.
+
+GALLERY_SELECTOR = "SearchResultImageItem"
+EXTRACTION_CONFIG = {"id_attr": "data-image-id", "title_selector": "p[title]", "img_selector": "img"}
+
+# name -> (content type, size in bytes)
+ASSETS = {
+    "font.woff2": ("font/woff2", 96 * 1024),
+    "clip.mp4": ("video/mp4", 512 * 1024),
+    "analytics.js": ("application/javascript", 48 * 1024)
+}
+
+class FixtureServer:
+    def __init__(self, image_size=100 * 1024, latency=0.0, error_rate=0.0, error_status=429, error_attempts=1,
+                 port=0):
+        self.image_size = image_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_attempts = error_attempts
+        self._attempts = {}
+        self._lock = threading.Lock()
+        # Response body bytes sent since the last reset()
+        self.bytes_sent = 0
+        self._payload = (hashlib.sha256(b"fixture").digest() * (image_size // 32 + 1))[:image_size]
+
+        handler = type("FixtureHandler", (_Handler,), {"fixture": self})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset(self):
+        # Forget failed attempts so every benchmark case sees the same injected errors
+        with self._lock:
+            self._attempts.clear()
+            self.bytes_sent = 0
+
+    def count_sent(self, size):
+        with self._lock:
+            self.bytes_sent += size
+
+    def gallery_url(self, items, page=None, pages=1):
+        # With page=None the URL keeps a {page} placeholder for crawl mode
+        return f"{self.base_url}/gallery?items={items}&pages={pages}&page={'{page}' if page is None else page}"
+
+    def image_url(self, image_id):
+        return f"{self.base_url}/img/{image_id}.jpg"
+
+    def should_fail(self, path):
+        # Fail the first error_attempts requests for a fixed share of paths
+        if not self.error_rate:
+            return False
+        bucket = int(hashlib.md5(path.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if bucket >= self.error_rate:
+            return False
+        with self._lock:
+            self._attempts[path] = self._attempts.get(path, 0) + 1
+            return self._attempts[path] <= self.error_attempts
+
+    def render_gallery(self, items, page, pages):
+        offset = (page - 1) * items
+        cards = [
+            f'<div class="{GALLERY_SELECTOR}" data-image-id="{offset + i}">'
+            f'<p title="Image {offset + i}">Image {offset + i}</p>'
+            f'<img src="/img/{offset + i}.jpg" alt=""></div>'
+            for i in range(items)
+        ]
+        next_link = f'<a class="next" href="/gallery?items={items}&pages={pages}&page={page + 1}">Next</a>' \
+            if page < pages else ""
+        head = ("<style>@font-face{font-family:Fixture;src:url(/assets/font.woff2) format('woff2')}"
+                "body{font-family:Fixture,sans-serif}</style>"
+                '<script src="/assets/analytics.js" async></script>')
+        clip = '<video src="/assets/clip.mp4" autoplay muted preload="auto"></video>'
+        return (f"<!DOCTYPE html><html><head><title>Gallery {page}</title>{head}</head><body>"
+                f"{clip}{''.join(cards)}{next_link}</body></html>").encode()
+
+    def render_asset(self, name):
+        content_type, size = ASSETS[name]
+        if name.endswith(".js"):
+            # A valid script of the given size
+            return ("/*" + "x" * (size - 4) + "*/").encode(), content_type
+        return self._payload[:size].ljust(size, b"\0"), content_type
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fixture = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/gallery":
+            query = parse_qs(url.query)
+            items = int(query.get("items", ["100"])[0])
+            pages = int(query.get("pages", ["1"])[0])
+            page = int(query.get("page", ["1"])[0])
+            self._send(200, self.fixture.render_gallery(items, page, pages), "text/html; charset=utf-8")
+        elif url.path.startswith("/img/"):
+            if self.fixture.latency:
+                time.sleep(self.fixture.latency)
+            if self.fixture.should_fail(url.path):
+                self._send(self.fixture.error_status, b"", "text/plain", {"Retry-After": "0"})
+            else:
+                etag = f'"{len(self.fixture._payload)}"'
+                self._send(200, self.fixture._payload, "image/jpeg", {"ETag": etag})
+        elif url.path.startswith("/assets/") and url.path[len("/assets/"):] in ASSETS:
+            body, content_type = self.fixture.render_asset(url.path[len("/assets/"):])
+            self._send(200, body, content_type)
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.fixture.count_sent(len(body))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the benchmark fixture for manual testing")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--image-size", type=int, default=100 * 1024)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    args = parser.parse_args()
+
+    server = FixtureServer(args.image_size, args.latency, args.error_rate, args.error_status, port=args.port)
+    print(f"Serving {server.gallery_url(100, page=1)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
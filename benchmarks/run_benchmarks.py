@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixture_server import FixtureServer, GALLERY_SELECTOR, EXTRACTION_CONFIG
+
+# Runs scraper, crawler and downloader cases against the local fixture server
+# and stores pages/sec, items/sec, MB/sec and peak RSS as JSON. Every case
+# runs in a fresh process so its peak RSS is not inflated by earlier cases.
+# Browser cases run once per --browser-profiles entry and also report the
+# page-load time and the bytes fetched per page.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def peak_rss_mb():
+    # Peak resident memory of this (Python) process; browsers run as separate processes
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1048576 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return round(getattr(info, "peak_wset", info.rss) / 1048576, 1)
+        except ImportError:
+            return None
+
+def run_case(case):
+    # Executed in a child process; returns one result row
+    from app.core.scraper import WebScraper
+    from app.core.crawler import Crawler
+    from app.core.downloader import ImageDownloader
+
+    quiet = lambda *args: None
+    work_dir = tempfile.mkdtemp(prefix="ws-bench-")
+    result = dict(case)
+    start = time.perf_counter()
+    try:
+        if case["mode"] == "scrape":
+            runner = WebScraper(quiet, quiet, quiet)
+            output_file, data = runner.scrape(
+                case["url"], GALLERY_SELECTOR, "class", "image", os.path.join(work_dir, "out.jsonl"),
+                case["wait_time"], True, EXTRACTION_CONFIG, backend=case["backend"], wait_strategy="selector",
+                browser_profile=case.get("profile")
+            )
+        elif case["mode"] == "crawl":
+            runner = Crawler(quiet, quiet, quiet)
+            output_file, data = runner.crawl(
+                [case["url"]], GALLERY_SELECTOR, "class", "image", os.path.join(work_dir, "out.jsonl"),
+                case["wait_time"], True, EXTRACTION_CONFIG, backend=case["backend"], page_range=f"1-{case['pages']}",
+                workers=case["workers"], wait_strategy="selector", browser_profile=case.get("profile")
+            )
+        else:
+            records_file = os.path.join(work_dir, "images.jsonl")
+            with open(records_file, "w", encoding="utf-8") as f:
+                for i in range(case["items"]):
+                    f.write(json.dumps({"id": str(i), "title": f"image_{i}", "src": f"{case['url']}/img/{i}.jpg"}) + "\n")
+            runner = ImageDownloader(quiet, quiet, quiet)
+            summary = runner.download(records_file, os.path.join(work_dir, "images"), case["delay"],
+                                      max_workers=case["workers"], resume=False, engine=case["engine"])
+            output_file = records_file if summary else None
+            result["failed"] = summary["failed"] if summary else None
+        seconds = time.perf_counter() - start
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    snapshot = runner.metrics.snapshot()
+    items = snapshot["counters"].get("items", 0)
+    megabytes = snapshot["counters"].get("bytes", 0) / 1048576
+    phases = {name: phase["seconds"] for name, phase in snapshot["phases"].items()}
+    if case.get("profile"):
+        # Navigation plus waiting for the items, and what the browser fetched, per page
+        result["page_load_sec"] = round((phases.get("navigation", 0) + phases.get("page_wait", 0)) / case["pages"], 3)
+        result["browser_kb_per_page"] = round(snapshot["counters"].get("page_bytes", 0) / case["pages"] / 1024, 1)
+    result.update(
+        ok=bool(output_file),
+        seconds=round(seconds, 3),
+        items_done=items,
+        pages_per_sec=round(case.get("pages", 1) / seconds, 3) if case["mode"] != "download" else None,
+        items_per_sec=round(items / seconds, 1),
+        mb_per_sec=round(megabytes / seconds, 2),
+        megabytes=round(megabytes, 2),
+        peak_rss_mb=peak_rss_mb(),
+        phases=phases,
+        host_errors=snapshot["host_errors"]
+    )
+    return result
+
+def build_cases(args, server):
+    cases = []
+    for backend in args.backends:
+        # The static backend never starts a browser, so it has no profile to compare
+        for profile in args.browser_profiles if backend != "static" else [None]:
+            # Standard-profile cases keep their names so older results stay comparable
+            label = f"{backend}-{profile}" if profile and profile != "standard" else backend
+            for items in args.items:
+                cases.append({"name": f"scrape-{label}-{items}", "mode": "scrape", "backend": backend,
+                              "profile": profile, "items": items, "pages": 1,
+                              "url": server.gallery_url(items, page=1), "wait_time": args.wait_time})
+            if args.crawl_pages:
+                cases.append({"name": f"crawl-{label}-{args.crawl_pages}x{args.crawl_items}", "mode": "crawl",
+                              "backend": backend, "profile": profile, "items": args.crawl_items * args.crawl_pages,
+                              "pages": args.crawl_pages, "workers": args.crawl_workers,
+                              "url": server.gallery_url(args.crawl_items, pages=args.crawl_pages),
+                              "wait_time": args.wait_time})
+    for engine in args.download_engines:
+        for workers in args.download_workers:
+            cases.append({"name": f"download-{engine}-{workers}w-{args.images}", "mode": "download",
+                          "backend": "requests", "engine": engine, "items": args.images, "workers": workers,
+                          "delay": args.delay, "url": server.base_url})
+    return cases
+
+def int_list(text):
+    return [int(value) for value in text.split(",") if value]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scraping and downloading against a local fixture server")
+    parser.add_argument("--backends", default="static", type=lambda text: text.split(","),
+                        help="Comma-separated scraping backends (static, selenium, auto)")
+    parser.add_argument("--browser-profiles", default="standard,lean", type=lambda text: text.split(","),
+                        help="Comma-separated browser profiles for the selenium and auto backends")
+    parser.add_argument("--items", default="100,1000,10000", type=int_list,
+                        help="Gallery sizes for single-page scrapes (100-50000)")
+    parser.add_argument("--crawl-pages", type=int, default=10, help="Pages for the crawl case (0 to skip)")
+    parser.add_argument("--crawl-items", type=int, default=100)
+    parser.add_argument("--crawl-workers", type=int, default=4)
+    parser.add_argument("--images", type=int, default=500, help="Images for the download cases")
+    parser.add_argument("--download-workers", default="1,8", type=int_list)
+    parser.add_argument("--download-engines", default="threads", type=lambda text: text.split(","),
+                        help="Comma-separated download engines (threads, async)")
+    parser.add_argument("--image-size", type=int, default=100 * 1024, help="Image payload size in bytes")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds before each image response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of images that fail first")
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--delay", type=float, default=0.0, help="Downloader per-host delay")
+    parser.add_argument("--wait-time", type=int, default=10)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    results = []
+
+    with FixtureServer(args.image_size, args.latency, args.error_rate, args.error_status) as server:
+        for case in build_cases(args, server):
+            print(f"Running {case['name']}...", file=sys.stderr, flush=True)
+            server.reset()
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                result = executor.submit(run_case, case).result()
+            result.pop("url", None)
+            if case["mode"] != "download":
+                # Everything the fixture served for the case: HTML plus whatever the browser requested
+                result["served_kb_per_page"] = round(server.bytes_sent / case["pages"] / 1024, 1)
+            results.append(result)
+            if "error" in result:
+                print(f"  error: {result['error']}", file=sys.stderr)
+            else:
+                print(f"  {result['seconds']}s, {result['items_per_sec']} items/s, {result['mb_per_sec']} MB/s, "
+                      f"peak RSS {result['peak_rss_mb']} MB", file=sys.stderr)
+                if "page_load_sec" in result:
+                    print(f"  page load {result['page_load_sec']}s, {result['served_kb_per_page']} KB/page served",
+                          file=sys.stderr)
+
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(output)
+    return 0 if all("error" not in result and result.get("ok") for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
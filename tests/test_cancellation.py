@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.core import downloader as downloader_module
+from app.core.async_downloader import AsyncDownloadEngine
+from app.core.cancellation import CancelToken, Cancelled
+from app.core.downloader import ImageDownloader
+from app.core.host_scheduler import HostScheduler
+from app.core.metrics import Metrics
+from app.core.selenium_backend import SeleniumBackend
+from app.core.waits import wait_for_page
+
+def cancel_after(token, seconds):
+    timer = threading.Timer(seconds, token.cancel)
+    timer.start()
+    return timer
+
+def quiet(*args):
+    pass
+
+def test_host_wait_ends_on_cancel():
+    scheduler = HostScheduler(30.0)
+    token = CancelToken()
+    assert scheduler.acquire("https://a.example.com/1", token) is True
+    cancel_after(token, 0.1)
+    start = time.monotonic()
+    assert scheduler.acquire("https://a.example.com/2", token) is False
+    assert time.monotonic() - start < 5
+
+class FakeResponse:
+    status_code = 404
+    headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+class FakeSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return FakeResponse()
+
+    def close(self):
+        pass
+
+def test_stop_sends_no_requests_queued_behind_the_host_delay(tmp_path, monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(downloader_module, "create_session", lambda max_workers, cache=None: session)
+    json_file = tmp_path / "images.json"
+    json_file.write_text(json.dumps([{"id": str(i), "src": f"https://a.example.com/{i}.jpg"} for i in range(4)]))
+
+    token = CancelToken()
+    cancel_after(token, 0.5)
+    start = time.monotonic()
+    result = ImageDownloader(quiet, quiet, quiet).download(str(json_file), str(tmp_path / "images"), 2.0,
+                                                           max_workers=4, cancel_token=token)
+    assert result["cancelled"]
+    assert len(session.urls) == 1
+    assert time.monotonic() - start < 2
+
+def test_pause_holds_a_request_that_waited_for_its_slot():
+    token = CancelToken()
+    downloader = ImageDownloader(quiet, quiet, quiet)
+    downloader.cancel_token = token
+    session = FakeSession()
+    run = {"cache": None, "scheduler": HostScheduler(0.0), "session": session, "metrics": Metrics("download"),
+           "retry": None}
+    token.pause()
+    cancel_after(token, 0.2)
+    assert downloader._get_politely(run, "https://a.example.com/1.jpg") is None
+    assert session.urls == []
+
+def test_async_host_wait_ends_on_cancel():
+    token = CancelToken()
+    downloader = ImageDownloader(quiet, quiet, quiet)
+    downloader.cancel_token = token
+    scheduler = HostScheduler(30.0)
+    scheduler.reserve("https://a.example.com/0.jpg")
+    engine = AsyncDownloadEngine(downloader, {"scheduler": scheduler, "metrics": Metrics("download")}, 1, ".", 1)
+    engine.session = FakeSession()
+    cancel_after(token, 0.1)
+    start = time.monotonic()
+    assert asyncio.run(engine._get_politely("https://a.example.com/1.jpg", {})) is None
+    assert engine.session.urls == []
+    assert time.monotonic() - start < 5
+
+def test_fixed_page_wait_ends_on_cancel():
+    token = CancelToken()
+    cancel_after(token, 0.1)
+    waited, ready = wait_for_page(None, "fixed", 30, cancel_token=token)
+    assert not ready
+    assert waited < 5
+
+class IdleDriver:
+    # A page whose selector never matches anything new
+    def __init__(self):
+        self.scrolls = 0
+
+    def execute_script(self, script, *args):
+        if "scrollTo" in script:
+            self.scrolls += 1
+        return []
+
+def test_harvest_stops_during_a_scroll_pause():
+    token = CancelToken()
+    backend = SeleniumBackend(quiet, quiet, True, cancel_token=token)
+    backend.driver = IdleDriver()
+    cancel_after(token, 0.1)
+    start = time.monotonic()
+    with pytest.raises(Cancelled):
+        list(backend.harvest("css_selector", ".item", None, 5, 30.0))
+    assert backend.driver.scrolls == 1
+    assert time.monotonic() - start < 5
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from app.core.change_index import (ChangeIndex, DeltaWriter, CHANGE_ADDED, CHANGE_CHANGED, CHANGE_REMOVED,
+                                   delta_path_for, fingerprint)
+from app.core.record_io import open_writer
+
+SOURCE = "https://example.com/gallery"
+
+def records(*items):
+    return [{"id": key, "title": title, "src": f"https://example.com/{key}.jpg"} for key, title in items]
+
+def run(path, batch, source=SOURCE, commit=True):
+    # One scrape of `batch`: changes per record and the removed records
+    index = ChangeIndex(path, source, "id")
+    changes = [index.observe(record) for record in batch]
+    removed = index.pop_removed()
+    is_new = index.is_new
+    if commit:
+        index.commit()
+    index.close()
+    return changes, removed, is_new
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "gallery.json.index.sqlite")
+
+def test_first_run_adds_everything(index_path):
+    changes, removed, is_new = run(index_path, records(("1", "a"), ("2", "b")))
+    assert changes == [CHANGE_ADDED, CHANGE_ADDED]
+    assert removed == []
+    assert is_new
+
+def test_second_run_reports_added_changed_and_removed(index_path):
+    run(index_path, records(("1", "a"), ("2", "b"), ("3", "c")))
+    changes, removed, is_new = run(index_path, records(("1", "a"), ("2", "B"), ("4", "d")))
+    assert changes == [None, CHANGE_CHANGED, CHANGE_ADDED]
+    assert [record["id"] for record in removed] == ["3"]
+    assert not is_new
+
+    changes, removed, _ = run(index_path, records(("1", "a"), ("2", "B"), ("4", "d")))
+    assert changes == [None, None, None]
+    assert removed == []
+
+def test_repeated_item_in_one_run_is_reported_once(index_path):
+    changes, _, _ = run(index_path, records(("1", "a"), ("1", "a")))
+    assert changes == [CHANGE_ADDED, None]
+
+def test_moving_to_another_page_is_not_a_change(index_path):
+    first = [dict(record, page_url="https://example.com/gallery?page=1", page_index=0)
+             for record in records(("1", "a"))]
+    moved = [dict(record, page_url="https://example.com/gallery?page=2", page_index=1)
+             for record in records(("1", "a"))]
+    run(index_path, first)
+    changes, _, _ = run(index_path, moved)
+    assert changes == [None]
+    assert fingerprint(first[0]) == fingerprint(moved[0])
+
+def test_another_source_starts_over(index_path):
+    run(index_path, records(("1", "a")))
+    changes, removed, is_new = run(index_path, records(("1", "a")), source="https://example.com/other")
+    assert changes == [CHANGE_ADDED]
+    assert removed == []
+    assert is_new
+
+def test_uncommitted_run_is_rolled_back(index_path):
+    run(index_path, records(("1", "a"), ("2", "b")))
+    run(index_path, records(("1", "A")), commit=False)
+    changes, removed, _ = run(index_path, records(("1", "A"), ("2", "b")))
+    assert changes == [CHANGE_CHANGED, None]
+    assert removed == []
+
+@pytest.mark.parametrize("output_file, expected", [
+    ("gallery.json", "gallery.delta.json"),
+    ("gallery.jsonl.gz", "gallery.delta.jsonl.gz"),
+    ("out/gallery.csv", "out/gallery.delta.csv"),
+])
+def test_delta_path_for(output_file, expected):
+    assert delta_path_for(output_file) == expected
+
+def scrape(output_file, batch, complete=True):
+    writer = DeltaWriter(open_writer(output_file, "jsonl"), output_file, "jsonl", SOURCE, "id")
+    try:
+        for record in batch:
+            writer.write(record)
+        writer.finish(complete)
+    finally:
+        writer.close()
+    return writer.summary()
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_delta_writer_writes_changes_and_removals(tmp_path):
+    output_file = str(tmp_path / "gallery.jsonl")
+    scrape(output_file, records(("1", "a"), ("2", "b")))
+    summary = scrape(output_file, records(("1", "A"), ("3", "c")))
+
+    assert summary == {CHANGE_ADDED: 1, CHANGE_CHANGED: 1, CHANGE_REMOVED: 1, "file": delta_path_for(output_file)}
+    assert len(read_lines(output_file)) == 2
+    delta = {record["id"]: record["change"] for record in read_lines(summary["file"])}
+    assert delta == {"1": CHANGE_CHANGED, "3": CHANGE_ADDED, "2": CHANGE_REMOVED}
+
+def test_incomplete_scrape_reports_no_removals(tmp_path):
+    output_file = str(tmp_path / "gallery.jsonl")
+    scrape(output_file, records(("1", "a"), ("2", "b")))
+    summary = scrape(output_file, records(("1", "a")), complete=False)
+    assert summary[CHANGE_REMOVED] == 0
+    assert read_lines(summary["file"]) == []
@@ -0,0 +1,25 @@
+import pytest
+
+from app.core.content_store import normalize_url
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.COM/a.jpg", "http://example.com/a.jpg"),
+    ("https://example.com:443/a.jpg", "https://example.com/a.jpg"),
+    ("http://example.com:8080/a.jpg", "http://example.com:8080/a.jpg"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com/a.jpg#top", "https://example.com/a.jpg"),
+    ("  https://example.com/a.jpg  ", "https://example.com/a.jpg"),
+])
+def test_normalize_url_canonical_forms(url, expected):
+    assert normalize_url(url) == expected
+
+def test_normalize_url_sorts_query_and_drops_tracking_params():
+    assert normalize_url("https://example.com/a.jpg?w=2&utm_source=x&h=1&fbclid=y") == \
+        "https://example.com/a.jpg?h=1&w=2"
+
+def test_normalize_url_unifies_percent_encoding():
+    assert normalize_url("https://example.com/my%20image.jpg") == normalize_url("https://example.com/my image.jpg")
+
+def test_normalize_url_keeps_meaningful_differences():
+    assert normalize_url("https://example.com/a.jpg?w=1") != normalize_url("https://example.com/a.jpg?w=2")
+    assert normalize_url("http://example.com/a.jpg") != normalize_url("https://example.com/a.jpg")
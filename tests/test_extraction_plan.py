@@ -0,0 +1,114 @@
+import lxml.html
+
+from app.core import extraction_plan
+from app.core.extraction_plan import compile_plan
+from app.core.selenium_backend import SeleniumBackend
+from app.core.static_backend import StaticBackend
+
+PAGE_URL = "https://example.com/gallery/"
+
+GALLERY = """
+<html><body>
+  <div class="card" data-id="a1"><img src="img/1.jpg"><span class="title" title="First">First</span></div>
+  <div class="card" data-id="a2"><img src="data:image/gif;base64,R0lGOD" data-src="/img/2.jpg"></div>
+  <div class="card"><span class="title" title="Third">Third</span></div>
+</body></html>
+"""
+
+POSTS = """
+<html><body>
+  <article class="post"><span class="num">7</span><h2>Hello   world</h2><p>Line one</p>
+    <script>track()</script><p>Line <b>two</b></p></article>
+  <article class="post"><h2>Second</h2><p>Body</p></article>
+</body></html>
+"""
+
+class BrowserElement:
+    # What Chrome reports for an element: URL properties already absolute,
+    # raw DOM attributes, rendered text, and its descendants by selector
+    def __init__(self, properties=None, dom=None, text="", children=None):
+        self.properties = properties or {}
+        self.dom = dom or {}
+        self.text = text
+        self.children = children or {}
+
+    def find_element(self, by, selector):
+        if selector not in self.children:
+            raise LookupError(selector)
+        return self.children[selector]
+
+    def get_attribute(self, name):
+        return self.properties.get(name)
+
+    def get_dom_attribute(self, name):
+        return self.dom.get(name)
+
+class NoScriptDriver:
+    # Bulk extraction needs a real browser, so the backend falls back to the per-element path
+    current_url = PAGE_URL
+
+    def execute_script(self, script, *args):
+        raise RuntimeError("no JavaScript here")
+
+BROWSER_GALLERY = [
+    BrowserElement({"data-id": "a1"}, children={
+        "img": BrowserElement({"src": "https://example.com/gallery/img/1.jpg"}, {"src": "img/1.jpg"}),
+        ".title": BrowserElement({"title": "First"}, text="First")
+    }),
+    BrowserElement({"data-id": "a2"}, children={
+        "img": BrowserElement({"src": "data:image/gif;base64,R0lGOD"},
+                              {"src": "data:image/gif;base64,R0lGOD", "data-src": "/img/2.jpg"})
+    }),
+    BrowserElement({}, children={".title": BrowserElement({"title": "Third"}, text="Third")})
+]
+
+BROWSER_POSTS = [
+    BrowserElement(text="7\nHello world\nLine one\nLine two", children={
+        ".num": BrowserElement(text="7"), "h2": BrowserElement(text="Hello world")
+    }),
+    BrowserElement(text="Second\nBody", children={"h2": BrowserElement(text="Second")})
+]
+
+def quiet(*args):
+    pass
+
+def static_records(html, selector, plan):
+    backend = StaticBackend(quiet, quiet)
+    backend.document = lxml.html.fromstring(html, base_url=PAGE_URL)
+    backend.base_url = PAGE_URL
+    return list(backend.iter_records(backend.find_elements("css_selector", selector), plan))
+
+def browser_records(elements, plan):
+    backend = SeleniumBackend(quiet, quiet, True)
+    backend.driver = NoScriptDriver()
+    return list(backend.iter_records(elements, plan))
+
+def test_backends_extract_the_same_image_records():
+    plan = compile_plan("image", {"id_attr": "data-id", "title_selector": ".title", "img_selector": "img",
+                                  "resolve_lazy": True})
+    expected = [
+        {"id": "a1", "title": "First", "src": "https://example.com/gallery/img/1.jpg"},
+        {"id": "a2", "title": "image_1", "src": "https://example.com/img/2.jpg"},
+        {"id": None, "title": "Third", "src": "not_found"}
+    ]
+    assert static_records(GALLERY, "div.card", plan) == expected
+    assert browser_records(BROWSER_GALLERY, plan) == expected
+
+def test_backends_extract_the_same_text_records():
+    plan = compile_plan("text", {"id_selector": ".num", "title_selector": "h2"})
+    expected = [
+        {"id": "7", "title": "Hello world", "content": "7\nHello world\nLine one\nLine two"},
+        {"id": "item_1", "title": "Second", "content": "Second\nBody"}
+    ]
+    assert static_records(POSTS, "article.post", plan) == expected
+    assert browser_records(BROWSER_POSTS, plan) == expected
+
+def test_plans_are_shared_and_the_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(extraction_plan, "MAX_CACHED_PLANS", 3)
+    monkeypatch.setattr(extraction_plan, "_plans", extraction_plan.OrderedDict())
+    first = compile_plan("image", {"img_selector": "img"})
+    assert compile_plan("image", {"img_selector": "img"}) is first
+    for i in range(3):
+        compile_plan("image", {"img_selector": f"img.size-{i}"})
+    assert len(extraction_plan._plans) == 3
+    assert compile_plan("image", {"img_selector": "img"}) is not first
@@ -0,0 +1,61 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core import host_scheduler
+from app.core.host_scheduler import HostScheduler, parse_retry_after
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(host_scheduler.time, "monotonic", lambda: now[0])
+    return now
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after(" 12 ") == 12.0
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(later) <= 30
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=30), usegmt=True)
+    assert parse_retry_after(earlier) == 0.0
+
+def test_reserve_spaces_requests_per_host(clock):
+    scheduler = HostScheduler(1.0)
+    assert scheduler.reserve("https://a.example.com/1") == 0
+    assert scheduler.reserve("https://a.example.com/2") == 1.0
+    assert scheduler.reserve("https://b.example.com/1") == 0
+
+def test_backoff_with_retry_after_pauses_exactly_that_long(clock):
+    scheduler = HostScheduler(0.5)
+    url = "https://a.example.com/1"
+    assert scheduler.backoff(url, retry_after=20.0) == 0.5
+    assert scheduler.reserve(url) == 20.0
+
+def test_backoff_without_retry_after_grows_the_interval(clock):
+    scheduler = HostScheduler(0.5, max_interval=5.0)
+    url = "https://a.example.com/1"
+    assert scheduler.backoff(url) == 1.0
+    assert scheduler.backoff(url) == 2.0
+    assert scheduler.backoff(url) == 4.0
+    assert scheduler.backoff(url) == 5.0
+
+def test_retry_after_is_capped_by_max_interval(clock):
+    scheduler = HostScheduler(0.5, max_interval=10.0)
+    url = "https://a.example.com/1"
+    scheduler.backoff(url, retry_after=3600.0)
+    assert scheduler.reserve(url) == 10.0
+
+def test_success_recovers_towards_the_base_interval(clock):
+    scheduler = HostScheduler(0.5, recovery_factor=0.5)
+    url = "https://a.example.com/1"
+    scheduler.backoff(url)
+    scheduler.backoff(url)
+    scheduler.record_success(url)
+    scheduler.record_success(url)
+    scheduler.record_success(url)
+    clock[0] += 100
+    scheduler.reserve(url)
+    assert scheduler.reserve(url) == 0.5
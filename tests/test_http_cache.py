@@ -0,0 +1,116 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.core.http_cache import HttpCache, CachingAdapter, expires_at
+
+BODY = b"<html><body>" + b"cached page " * 200 + b"</body></html>"
+ETAG = '"v1"'
+
+class Handler(BaseHTTPRequestHandler):
+    # /stale needs revalidation on every use, /fresh may be reused for a minute,
+    # /gzip sends its encoding header in lowercase
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/stale" and self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Cache-Control", "max-age=60")
+            self.end_headers()
+            return
+        body = gzip.compress(BODY) if self.path == "/gzip" else BODY
+        self.send_response(200)
+        if self.path == "/gzip":
+            self.send_header("content-encoding", "gzip")
+            self.send_header("cache-control", "max-age=60")
+            self.send_header("etag", ETAG)
+        elif self.path == "/fresh":
+            self.send_header("Cache-Control", "max-age=60")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    Handler.requests_seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache(str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+@pytest.fixture
+def session(cache):
+    session = requests.Session()
+    session.mount("http://", CachingAdapter(cache))
+    yield session
+    session.close()
+
+def fetch(session, url):
+    response = session.get(url, stream=True)
+    with response:
+        return response, response.content
+
+def test_fresh_entry_is_served_without_a_request(server, session):
+    fetch(session, server + "/fresh")
+    response, body = fetch(session, server + "/fresh")
+    assert body == BODY
+    assert getattr(response, "from_cache", False)
+    assert len(Handler.requests_seen) == 1
+
+def test_stale_entry_is_revalidated_and_refreshed(server, session, cache):
+    first, _ = fetch(session, server + "/stale")
+    assert not getattr(first, "from_cache", False)
+    assert cache.get(server + "/stale")["etag"] == ETAG
+
+    response, body = fetch(session, server + "/stale")
+    assert body == BODY
+    assert response.from_cache
+    assert Handler.requests_seen[-1] == ("/stale", ETAG)
+
+    # The 304 brought a max-age, so the next use needs no request at all
+    entry = cache.get(server + "/stale")
+    assert entry["headers"]["Cache-Control"] == "max-age=60"
+    assert cache.is_fresh(entry)
+    fetch(session, server + "/stale")
+    assert len(Handler.requests_seen) == 2
+
+def test_partially_read_body_is_not_cached(server, session, cache):
+    response = session.get(server + "/fresh", stream=True)
+    next(response.iter_content(16))
+    response.close()
+    assert cache.get(server + "/fresh") is None
+
+def test_lowercase_encoding_header_is_not_replayed(server, session, cache):
+    fetch(session, server + "/gzip")
+    entry = cache.get(server + "/gzip")
+    assert entry["etag"] == ETAG
+    assert not any(name.lower() in ("content-encoding", "content-length") for name in entry["headers"])
+
+    response, body = fetch(session, server + "/gzip")
+    assert response.from_cache
+    assert body == BODY
+
+def test_expires_at():
+    assert expires_at({"Cache-Control": "no-store"}, 100.0) is None
+    assert expires_at({"Cache-Control": "no-cache, max-age=60"}, 100.0) == 100.0
+    assert expires_at({"Cache-Control": "max-age=60", "Age": "10"}, 100.0) == 150.0
+    assert expires_at({}, 100.0) == 100.0
@@ -0,0 +1,152 @@
+import hashlib
+
+import pytest
+
+from app.core.content_store import ContentStore, normalize_url
+from app.core.downloader import ImageDownloader
+from app.core.manifest import DownloadManifest, STATUS_COMPLETE, STATUS_PARTIAL, STATUS_FAILED
+from app.core.metrics import Metrics
+
+URL = "https://cdn.example.com/a.jpg"
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = DownloadManifest(DownloadManifest.path_for(str(tmp_path / "images")))
+    yield manifest
+    manifest.close()
+
+def test_path_for_sits_next_to_the_output_folder(tmp_path):
+    assert DownloadManifest.path_for(str(tmp_path / "images") + "/") == str(tmp_path / "images.manifest.sqlite")
+
+def test_record_keeps_earlier_validators(manifest):
+    manifest.record(URL, STATUS_PARTIAL, path="a.jpg", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    manifest.record(URL, STATUS_COMPLETE, size=3, sha256="abc")
+    entry = manifest.get(URL)
+    assert entry["status"] == STATUS_COMPLETE
+    assert entry["path"] == "a.jpg"
+    assert entry["size"] == 3
+    assert entry["etag"] == '"v1"'
+    assert entry["last_modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+def test_record_replaces_validators_when_given(manifest):
+    manifest.record(URL, STATUS_COMPLETE, etag='"v1"')
+    manifest.record(URL, STATUS_COMPLETE, etag='"v2"')
+    assert manifest.get(URL)["etag"] == '"v2"'
+
+def test_find_complete_needs_a_finished_hashed_download(manifest):
+    normalized = normalize_url(URL)
+    manifest.record(URL, STATUS_PARTIAL, normalized_url=normalized)
+    assert manifest.find_complete(normalized) is None
+    manifest.record(URL, STATUS_COMPLETE, normalized_url=normalized)
+    assert manifest.find_complete(normalized) is None
+    manifest.record(URL, STATUS_COMPLETE, sha256="abc")
+    assert manifest.find_complete(normalized)["url"] == URL
+
+def test_counts_by_status(manifest):
+    manifest.record(URL, STATUS_COMPLETE)
+    manifest.record(URL + "?2", STATUS_FAILED)
+    manifest.record(URL + "?3", STATUS_FAILED)
+    assert manifest.counts() == {STATUS_COMPLETE: 1, STATUS_FAILED: 2}
+
+def test_manifest_survives_reopening(tmp_path):
+    path = str(tmp_path / "m.sqlite")
+    first = DownloadManifest(path)
+    first.record(URL, STATUS_PARTIAL, etag='"v1"')
+    first.close()
+    second = DownloadManifest(path)
+    assert second.get(URL)["etag"] == '"v1"'
+    second.close()
+
+@pytest.fixture
+def prepare(tmp_path, manifest):
+    # Runs ImageDownloader._prepare_item for URL against the fixture manifest
+    downloader = ImageDownloader(lambda message: None, lambda value: None, lambda status: None)
+    output_folder = tmp_path / "images"
+    output_folder.mkdir()
+
+    def prepare(url=URL, title="a.jpg", revalidate=False, store=None, change=None):
+        run = {"manifest": manifest, "resume": True, "revalidate": revalidate, "store": store,
+               "metrics": Metrics("download")}
+        job = downloader._describe_item(0, {"id": "1", "title": title, "src": url, "change": change},
+                                        str(output_folder))
+        return downloader._prepare_item(run, job), job
+
+    prepare.folder = output_folder
+    return prepare
+
+def test_complete_download_is_skipped(prepare, manifest):
+    (prepare.folder / "a.jpg").write_bytes(b"abc")
+    manifest.record(URL, STATUS_COMPLETE, path=str(prepare.folder / "a.jpg"), size=3)
+    assert prepare()[0] is True
+
+def test_truncated_download_is_fetched_again(prepare, manifest):
+    (prepare.folder / "a.jpg").write_bytes(b"ab")
+    manifest.record(URL, STATUS_COMPLETE, path=str(prepare.folder / "a.jpg"), size=3)
+    done, job = prepare()
+    assert done is None
+    assert job["headers"] == {}
+
+def test_revalidation_sends_conditional_headers(prepare, manifest):
+    (prepare.folder / "a.jpg").write_bytes(b"abc")
+    manifest.record(URL, STATUS_COMPLETE, path=str(prepare.folder / "a.jpg"), size=3, etag='"v1"',
+                    last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    done, job = prepare(revalidate=True)
+    assert done is None
+    assert job["headers"] == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+def test_partial_download_resumes_with_range_and_validator(prepare, manifest):
+    (prepare.folder / "a.jpg.part").write_bytes(b"12345")
+    manifest.record(URL, STATUS_PARTIAL, path=str(prepare.folder / "a.jpg"), etag='"v1"')
+    done, job = prepare()
+    assert done is None
+    assert job["headers"] == {"Range": "bytes=5-", "If-Range": '"v1"'}
+
+def test_part_file_without_manifest_entry_is_discarded(prepare):
+    (prepare.folder / "a.jpg.part").write_bytes(b"12345")
+    done, job = prepare()
+    assert done is None
+    assert job["headers"] == {}
+    assert not (prepare.folder / "a.jpg.part").exists()
+
+def test_duplicate_is_linked_with_its_validators(prepare, manifest):
+    body = b"image bytes"
+    sha256 = hashlib.sha256(body).hexdigest()
+    store = ContentStore(str(prepare.folder))
+    original = prepare.folder / "a.jpg"
+    original.write_bytes(body)
+    store.adopt(str(original), sha256)
+    manifest.record(URL, STATUS_COMPLETE, path=str(original), size=len(body), sha256=sha256, etag='"v1"',
+                    normalized_url=normalize_url(URL))
+
+    duplicate_url = "https://CDN.example.com/a.jpg?utm_source=feed"
+    done, job = prepare(url=duplicate_url, title="b.jpg", store=store)
+    assert done is True
+    assert (prepare.folder / "b.jpg").read_bytes() == body
+    entry = manifest.get(duplicate_url)
+    assert entry["status"] == STATUS_COMPLETE
+    assert entry["sha256"] == sha256
+    assert entry["etag"] == '"v1"'
+
+def test_changed_record_moves_to_its_new_name(prepare, manifest):
+    (prepare.folder / "old.jpg").write_bytes(b"abc")
+    manifest.record(URL, STATUS_COMPLETE, path=str(prepare.folder / "old.jpg"), size=3)
+    done, job = prepare(title="new.jpg", change="changed")
+    assert done is True
+    assert (prepare.folder / "new.jpg").read_bytes() == b"abc"
+    assert not (prepare.folder / "old.jpg").exists()
+    assert manifest.get(URL)["path"] == str(prepare.folder / "new.jpg")
+
+def test_changed_record_moves_its_store_link(prepare, manifest):
+    body = b"image bytes"
+    sha256 = hashlib.sha256(body).hexdigest()
+    store = ContentStore(str(prepare.folder))
+    (prepare.folder / "old.jpg").write_bytes(body)
+    store.adopt(str(prepare.folder / "old.jpg"), sha256)
+    store.link(sha256, str(prepare.folder / "old.jpg"))
+    manifest.record(URL, STATUS_COMPLETE, path=str(prepare.folder / "old.jpg"), size=len(body), sha256=sha256)
+
+    done, job = prepare(title="new.jpg", change="changed", store=store)
+    assert done is True
+    assert (prepare.folder / "new.jpg").read_bytes() == body
+    assert not (prepare.folder / "old.jpg").exists()
+    assert store.has(sha256)
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from app.core.record_io import iter_json_array, open_records
+
+def write_array(tmp_path, records, **dump_options):
+    path = tmp_path / "records.json"
+    path.write_text(json.dumps(records, **dump_options), encoding="utf-8")
+    return str(path)
+
+def test_iter_json_array_yields_every_record(tmp_path):
+    records = [{"id": str(i), "title": f"image {i}", "src": f"http://example.com/{i}.jpg"} for i in range(50)]
+    assert list(iter_json_array(write_array(tmp_path, records))) == records
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+def test_iter_json_array_records_across_chunk_boundaries(tmp_path, chunk_size):
+    records = [{"id": i, "nested": {"text": "a, b ] c"}, "list": [1, 2, 3]} for i in range(20)]
+    path = write_array(tmp_path, records, indent=2)
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == records
+
+def test_iter_json_array_empty_array(tmp_path):
+    assert list(iter_json_array(write_array(tmp_path, []))) == []
+
+def test_iter_json_array_rejects_non_arrays(tmp_path):
+    path = tmp_path / "object.json"
+    path.write_text('{"id": 1}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(path)))
+
+def test_iter_json_array_truncated_file(tmp_path):
+    path = tmp_path / "truncated.json"
+    path.write_text('[{"id": 1}, {"id": 2', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(str(path), chunk_size=4))
+
+def test_open_records_counts_without_consuming(tmp_path):
+    records = [{"id": i} for i in range(5)]
+    count, iterator = open_records(write_array(tmp_path, records))
+    assert count == 5
+    assert list(iterator) == records
@@ -0,0 +1,52 @@
+import requests
+
+from app.core import retry_policy
+from app.core.retry_policy import RetryPolicy, CircuitBreaker, create_retry, RETRY_DEFAULTS
+
+def test_retryable_statuses_and_errors():
+    policy = RetryPolicy()
+    assert policy.is_retryable_status(429)
+    assert policy.is_retryable_status(503)
+    assert not policy.is_retryable_status(404)
+    assert policy.is_retryable_error(requests.exceptions.ConnectionError())
+    assert policy.is_retryable_error(TimeoutError())
+    assert not policy.is_retryable_error(ValueError())
+
+def test_delay_is_capped_full_jitter(monkeypatch):
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=3.0)
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: high)
+    assert policy.delay(0) == 0.5
+    assert policy.delay(2) == 2.0
+    assert policy.delay(10) == 3.0
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: low)
+    assert policy.delay(5) == 0
+
+def test_delay_honors_retry_after_up_to_the_cap(monkeypatch):
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=10.0)
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: low)
+    assert policy.delay(0, retry_after=4.0) == 4.0
+    assert policy.delay(0, retry_after=60.0) == 10.0
+
+def test_circuit_opens_after_threshold_and_closes_on_success(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(retry_policy.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, cooldown=30.0)
+    url = "https://cdn.example.com/a.jpg"
+
+    assert breaker.record_failure(url) is False
+    assert breaker.allow(url)
+    assert breaker.record_failure(url) is True
+    assert not breaker.allow(url)
+    assert breaker.allow("https://other.example.com/a.jpg")
+    assert breaker.retry_in(url) == 30.0
+
+    now[0] += 30.0
+    assert breaker.allow(url)
+    breaker.record_success(url)
+    assert breaker.record_failure(url) is False
+
+def test_create_retry_merges_settings():
+    policy, breaker = create_retry({"max_retries": 1, "breaker_threshold": 7})
+    assert policy.max_retries == 1
+    assert policy.backoff_max == RETRY_DEFAULTS["backoff_max"]
+    assert breaker.threshold == 7